@@ -0,0 +1,80 @@
+"""Helpers shared by the benchmark scripts: percentiles, memory readings and JSON results."""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+SERVER_DIR = ROOT_DIR / "server"
+RESULTS_DIR = BENCH_DIR / "results"
+
+def summarize(seconds):
+    """Latency summary in milliseconds (nearest-rank percentiles)"""
+    if not seconds:
+        return None
+    values = sorted(seconds)
+    def rank(q):
+        return values[min(len(values) - 1, max(0, int(q * len(values) + 0.5) - 1))]
+    return {
+        "p50": round(rank(0.50) * 1000, 3),
+        "p95": round(rank(0.95) * 1000, 3),
+        "p99": round(rank(0.99) * 1000, 3),
+        "mean": round(sum(values) / len(values) * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+def _status_kb(pid, field):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+def rss_mb(pid="self"):
+    """Resident memory of a process in MB (Linux only; None elsewhere)"""
+    kb = _status_kb(pid, "VmRSS")
+    return round(kb / 1024, 1) if kb is not None else None
+
+def peak_rss_mb(pid="self"):
+    kb = _status_kb(pid, "VmHWM")
+    if kb is None and pid == "self":
+        # ru_maxrss is KB on Linux, bytes on macOS
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        kb = kb / 1024 if sys.platform == "darwin" else kb
+    return round(kb / 1024, 1) if kb is not None else None
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def save_results(name, results, params, out=None):
+    """Write results with enough context (commit, machine, parameters) to compare runs later"""
+    commit = git_commit()
+    payload = {
+        "benchmark": name,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    path = Path(out) if out else RESULTS_DIR / f"{name}-{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2))
+    print(f"[OK] Results saved to {path}")
+    return path
@@ -0,0 +1,71 @@
+"""Compare two benchmark result files (from load.py or micro.py) case by case.
+
+Usage: python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 10] [--fail]
+
+Prints every numeric metric with its change; changes worse than --threshold
+percent are marked REGRESSION, and --fail exits non-zero if there are any.
+"""
+import argparse
+import json
+import sys
+
+# Everything else (latencies, memory, build times) is better when lower
+HIGHER_IS_BETTER = ("rps", "msgs_per_s", "pages_per_s")
+# Descriptive fields, not measurements
+IGNORED = {"route", "concurrency", "requests", "batch", "mode", "docs", "passages", "pages", "bytes"}
+
+def flatten(result, prefix=""):
+    metrics = {}
+    for key, value in result.items():
+        if key == "case" or key in IGNORED:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data, {r["case"]: flatten(r) for r in data["results"]}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0)
+    parser.add_argument("--fail", action="store_true")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.baseline)
+    cand_meta, cand = load(args.candidate)
+    if base_meta["benchmark"] != cand_meta["benchmark"]:
+        raise SystemExit(f"Cannot compare {base_meta['benchmark']} results with {cand_meta['benchmark']} results")
+    if base_meta["params"] != cand_meta["params"]:
+        print("[WARN] Runs used different parameters; only matching cases are compared")
+    print(f"{base_meta['benchmark']}: {base_meta['commit']} -> {cand_meta['commit']}")
+
+    regressions = 0
+    for case in base:
+        if case not in cand:
+            continue
+        for name, old in base[case].items():
+            new = cand[case].get(name)
+            if new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if name.split(".")[0] in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{case:>28}  {name:<28} {old:>12g} {new:>12g} {change:>+8.1f}%{flag}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:g}%")
+    if args.fail and regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
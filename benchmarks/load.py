@@ -0,0 +1,238 @@
+"""Load-test /api/chat and /api/stream by replaying a weighted message mix.
+
+By default a server is started on a free port with the fake Gemini backend
+(configurable latency) and a throwaway SQLite database. Each concurrency
+level sends --requests requests per route and reports RPS, latency
+percentiles, time to first token (stream) and server memory.
+
+Usage: python benchmarks/load.py [--concurrency 1,8,32] [--requests 200]
+                                 [--routes chat,stream] [--messages FILE]
+                                 [--first-token-ms 300] [--chunk-ms 30]
+                                 [--url http://host:8000 [--pid PID]] [--out FILE]
+
+--messages takes JSON lines with a "message" (or "user_message", as written by
+/api/history/export) and an optional "weight".
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from common import BENCH_DIR, ROOT_DIR, SERVER_DIR, peak_rss_mb, rss_mb, save_results, summarize
+
+DEFAULT_MESSAGES = BENCH_DIR / "messages.jsonl"
+
+def load_messages(path):
+    messages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            text = row.get("message") or row.get("user_message")
+            if text:
+                messages.append((text.replace(" [PDF: Yes]", ""), float(row.get("weight", 1))))
+    if not messages:
+        raise SystemExit(f"No messages in {path}")
+    return messages
+
+def message_mix(messages, n, seed=42, unique=False):
+    rng = random.Random(seed)
+    texts, weights = zip(*messages)
+    picked = rng.choices(texts, weights=weights, k=n)
+    # Unique messages defeat the response caches and measure the full path
+    return [f"{text} (#{i})" for i, text in enumerate(picked)] if unique else picked
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def ensure_models():
+    """Train the classifier and build the store once if this checkout has none"""
+    if (ROOT_DIR / "models" / "classifier").is_dir() or (ROOT_DIR / "models" / "vectorizer.pkl").exists():
+        return
+    print("[INFO] No trained models found, running retrain_model.py first")
+    subprocess.run([sys.executable, str(ROOT_DIR / "retrain_model.py")], cwd=ROOT_DIR, check=True, stdout=subprocess.DEVNULL)
+
+def start_server(args, workdir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        GEMINI_BACKEND="fake",
+        DATABASE_URL=f"sqlite:///{workdir}/bench.db",
+        FAKE_GEMINI_FIRST_TOKEN_MS=str(args.first_token_ms),
+        FAKE_GEMINI_CHUNK_MS=str(args.chunk_ms),
+    )
+    log = open(os.path.join(workdir, "server.log"), "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited during startup, see {log.name}")
+        try:
+            status, _, _ = request(url, "GET", "/api/health")
+            if status == 200:
+                return process, url, log
+        except OSError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit(f"Server did not become healthy, see {log.name}")
+
+_local = threading.local()
+
+def _connection(url):
+    # One keep-alive connection per client thread
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        parts = urlsplit(url)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=120)
+        _local.conn = conn
+    return conn
+
+def request(url, method, path, body=None, stream=False):
+    """Returns (status, seconds to first content frame or None, total seconds)"""
+    conn = _connection(url)
+    payload = json.dumps(body) if body is not None else None
+    headers = {"Content-Type": "application/json"} if payload else {}
+    start = time.perf_counter()
+    try:
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        first = None
+        if stream:
+            for line in response:
+                if first is None and line.startswith(b"data:") and b'"content": ""' not in line:
+                    first = time.perf_counter() - start
+                if b'"done": true' in line:
+                    break
+        response.read()
+    except (OSError, http.client.HTTPException):
+        conn.close()
+        _local.conn = None
+        raise
+    return response.status, first, time.perf_counter() - start
+
+def run_level(url, route, messages, concurrency, pid=None):
+    path = "/api/stream" if route == "stream" else "/api/chat"
+    # One session per virtual user, so conversation memory and history grow as in real use
+    sessions = itertools.cycle([f"bench-{route}-{concurrency}-{i}" for i in range(concurrency)])
+    jobs = [(message, next(sessions)) for message in messages]
+    latencies, ttfts = [], []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(job):
+        nonlocal errors
+        message, session_id = job
+        try:
+            status, first, total = request(url, "POST", path, {"message": message, "session_id": session_id}, stream=route == "stream")
+        except (OSError, http.client.HTTPException):
+            status, first, total = None, None, None
+        with lock:
+            if status != 200:
+                errors += 1
+                return
+            latencies.append(total)
+            if first is not None:
+                ttfts.append(first)
+
+    rss_before = rss_mb(pid) if pid else None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, jobs))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "case": f"{route} c={concurrency}",
+        "route": route,
+        "concurrency": concurrency,
+        "requests": len(jobs),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": summarize(latencies),
+    }
+    if route == "stream":
+        result["ttft_ms"] = summarize(ttfts)
+    if pid:
+        result["rss_mb"] = rss_mb(pid)
+        result["rss_growth_mb"] = round(result["rss_mb"] - rss_before, 1) if result["rss_mb"] and rss_before else None
+        result["peak_rss_mb"] = peak_rss_mb(pid)
+    return result
+
+def print_result(r):
+    lat = r["latency_ms"] or {}
+    ttft = (r.get("ttft_ms") or {}).get("p50")
+    print(f"{r['case']:>14} {r['rps']:>8.1f} {lat.get('p50', 0):>8.1f} {lat.get('p95', 0):>8.1f} {lat.get('p99', 0):>8.1f} "
+          f"{ttft if ttft is not None else '-':>8} {r.get('rss_mb') or '-':>7} {r['errors']:>6}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route and concurrency level")
+    parser.add_argument("--routes", default="chat,stream")
+    parser.add_argument("--messages", default=str(DEFAULT_MESSAGES))
+    parser.add_argument("--unique", action="store_true", help="make every message unique so no response cache hits")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--chunk-ms", type=float, default=30)
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="server process id for memory readings with --url")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    messages = load_messages(args.messages)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    routes = [r.strip() for r in args.routes.split(",")]
+
+    process = log = None
+    workdir = tempfile.mkdtemp(prefix="prat-bench-")
+    if args.url:
+        url, pid = args.url.rstrip("/"), args.pid
+    else:
+        ensure_models()
+        process, url, log = start_server(args, workdir)
+        pid = process.pid
+        print(f"[OK] Server on {url} (fake Gemini {args.first_token_ms:g} ms first token, {args.chunk_ms:g} ms/chunk; SQLite in {workdir})")
+
+    results = []
+    try:
+        for route in routes:
+            run_level(url, route, message_mix(messages, args.warmup, seed=0), 1)
+        print(f"{'case':>14} {'rps':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'ttft_ms':>8} {'rss_mb':>7} {'errors':>6}")
+        for concurrency in levels:
+            for route in routes:
+                mix = message_mix(messages, args.requests, seed=concurrency, unique=args.unique)
+                result = run_level(url, route, mix, concurrency, pid)
+                results.append(result)
+                print_result(result)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+            log.close()
+
+    params = {
+        "concurrency": levels, "requests": args.requests, "routes": routes,
+        "messages": os.path.relpath(args.messages, ROOT_DIR), "unique": args.unique,
+        "first_token_ms": args.first_token_ms, "chunk_ms": args.chunk_ms, "external": bool(args.url),
+    }
+    save_results("load", results, params, args.out)
+
+if __name__ == "__main__":
+    main()
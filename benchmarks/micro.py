@@ -0,0 +1,163 @@
+"""Microbenchmarks of the hot paths at growing data sizes.
+
+  classify  IntentClassifier.predict per message vs predict_batch, by batch size
+  search    EmbeddingStore.search by corpus size (synthetic documents)
+  pdf       PDFProcessor.extract_text_from_pdf by page count (generated PDFs)
+
+Usage: python benchmarks/micro.py [--only classify,search,pdf]
+                                  [--batches 1,10,100,1000] [--docs 100,1000,5000]
+                                  [--pages 1,10,50,200] [--modes bm25] [--out FILE]
+"""
+import argparse
+import random
+import sys
+import time
+
+from common import SERVER_DIR, peak_rss_mb, rss_mb, save_results, summarize
+
+sys.path.insert(0, str(SERVER_DIR))
+
+from retrieval import synthetic_corpus
+from utils.embeddings import EmbeddingStore
+from utils.ml_model import IntentClassifier
+from utils.pdf_processor import PDFProcessor
+
+SENTENCE = "Prat.AI routes each message through an intent classifier before retrieval and generation"
+
+def timed(fn, repeat):
+    """Per-call seconds for repeat calls of fn"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def bench_classify(batches, rng):
+    classifier = IntentClassifier()
+    classifier.train()
+    patterns = [p for intent in classifier.load_intents() for p in intent['patterns']]
+    words = SENTENCE.split()
+    results = []
+    for size in batches:
+        messages = [rng.choice(patterns) if i % 2 else " ".join(rng.choices(words, k=8)) for i in range(size)]
+        repeat = max(3, 2000 // size)
+        single = timed(lambda: [classifier.predict(m) for m in messages], repeat)
+        batch = timed(lambda: classifier.predict_batch(messages), repeat)
+        results.append({
+            "case": f"classify batch={size}",
+            "batch": size,
+            "predict_us_per_msg": round(min(single) / size * 1e6, 2),
+            "predict_batch_us_per_msg": round(min(batch) / size * 1e6, 2),
+            "msgs_per_s": round(size / min(batch), 1),
+        })
+    return results
+
+def bench_search(sizes, modes, rng, queries=200):
+    seed = EmbeddingStore().load_knowledge_base()
+    results = []
+    for size in sizes:
+        docs, vocab = synthetic_corpus(seed, size)
+        query_set = [" ".join(rng.choices(vocab, k=4)) for _ in range(queries)]
+        for mode in modes:
+            rss_before = rss_mb()
+            store = EmbeddingStore(mode=mode)
+            start = time.perf_counter()
+            store._chunk_documents(docs)
+            store._index_passages()
+            if mode != "bm25":
+                store._build_dense()
+            build_s = time.perf_counter() - start
+            latencies = [timed(lambda q=q: store.search(q), 1)[0] for q in query_set]
+            results.append({
+                "case": f"search {mode} docs={size}",
+                "mode": mode,
+                "docs": size,
+                "passages": len(store.passages),
+                "build_s": round(build_s, 3),
+                "search_ms": summarize(latencies),
+                "rss_growth_mb": round(rss_mb() - rss_before, 1) if rss_before is not None else None,
+            })
+            del store
+    return results
+
+def _pdf_string(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages, lines_per_page=40, rng=None):
+    """Minimal multi-page text PDF (Helvetica, one content stream per page)"""
+    rng = rng or random.Random(0)
+    words = SENTENCE.split()
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choices(words, k=12)) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({_pdf_string(line)}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def bench_pdf(page_counts, rng):
+    processor = PDFProcessor()
+    results = []
+    for pages in page_counts:
+        content = make_pdf(pages, rng=rng)
+        repeat = max(3, 100 // pages)
+        samples = timed(lambda: processor.extract_text_from_pdf(content), repeat)
+        best = min(samples)
+        results.append({
+            "case": f"pdf pages={pages}",
+            "pages": pages,
+            "bytes": len(content),
+            "extract_ms": round(best * 1000, 3),
+            "pages_per_s": round(pages / best, 1),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", default="classify,search,pdf")
+    parser.add_argument("--batches", default="1,10,100,1000")
+    parser.add_argument("--docs", default="100,1000,5000")
+    parser.add_argument("--pages", default="1,10,50,200")
+    parser.add_argument("--modes", default="bm25")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    def sizes(value):
+        return [int(v) for v in value.split(",")]
+
+    selected = args.only.split(",")
+    rng = random.Random(7)
+    results = []
+    if "classify" in selected:
+        results += bench_classify(sizes(args.batches), rng)
+    if "search" in selected:
+        results += bench_search(sizes(args.docs), args.modes.split(","), rng)
+    if "pdf" in selected:
+        results += bench_pdf(sizes(args.pages), rng)
+
+    for result in results:
+        metrics = {k: v for k, v in result.items() if k != "case"}
+        print(f"{result['case']:>28}  {metrics}")
+
+    params = {"only": selected, "batches": args.batches, "docs": args.docs, "pages": args.pages, "modes": args.modes}
+    results.append({"case": "process", "peak_rss_mb": peak_rss_mb()})
+    save_results("micro", results, params, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark BM25 vs dense (LSA) retrieval at growing corpus sizes.
+
+Usage: python benchmarks/retrieval.py [--sizes 100,1000,5000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'server'))
+
+from utils.embeddings import EmbeddingStore, tokenize
+
+def synthetic_corpus(seed_docs, n_docs, words_per_doc=300, rng=None):
+    """Build n_docs documents by resampling the vocabulary of the seed docs"""
+    rng = rng or random.Random(42)
+    vocab = sorted({t for doc in seed_docs for t in tokenize(doc['content'])})
+    return [
+        {"filename": f"doc_{i}.txt", "content": " ".join(rng.choices(vocab, k=words_per_doc))}
+        for i in range(n_docs)
+    ], vocab
+
+def time_queries(store, queries, top_k=5):
+    start = time.perf_counter()
+    for q in queries:
+        store.search_passages(q, top_k)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    seed = EmbeddingStore().load_knowledge_base()
+    rng = random.Random(7)
+
+    print(f"{'docs':>7} {'passages':>9} {'mode':>7} {'build_s':>8} {'query_ms':>9}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        docs, vocab = synthetic_corpus(seed, size)
+        queries = [" ".join(rng.choices(vocab, k=4)) for _ in range(args.queries)]
+
+        for mode in ("bm25", "dense", "hybrid"):
+            store = EmbeddingStore(mode=mode)
+            start = time.perf_counter()
+            store._chunk_documents(docs)
+            store._index_passages()
+            if mode != "bm25":
+                store._build_dense()
+            build_s = time.perf_counter() - start
+            query_ms = time_queries(store, queries)
+            print(f"{size:>7} {len(store.passages):>9} {mode:>7} {build_s:>8.2f} {query_ms:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,12 @@ import React, { useState, useContext, useEffect } from 'react'
 import { assets } from '../../assets/assets'
 import { Context } from '../../context/Context'
 import PDFUpload from '../PDFUpload/PDFUpload'
+import { registerSessionPDF, removeSessionPDF } from '../../config/api'
 
 const Main = () => {
-  const { onSent, recentPrompt, showResult, loading, resultData, setInput, input, errorMsg, showAbout, setShowAbout, isStreaming, newChat, resetConversationHistory, attachedPDFInfo } = useContext(Context);
+  const { onSent, recentPrompt, showResult, loading, resultData, setInput, input, errorMsg, showAbout, setShowAbout, isStreaming, newChat, resetConversationHistory, attachedPDFInfo, sessionId } = useContext(Context);
   const [attachedPDF, setAttachedPDF] = useState(null);
-  const [pdfContent, setPdfContent] = useState('');
+  const [documentId, setDocumentId] = useState(null);
   const [isDragging, setIsDragging] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
 
@@ -33,10 +34,8 @@ const Main = () => {
     if (input.trim()) {
       const message = input.trim();
       const pdfInfo = attachedPDF ? { name: attachedPDF.name, size: attachedPDF.size } : null;
-      onSent(message, pdfContent, pdfInfo);
-      // Clear PDF after sending
-      setAttachedPDF(null);
-      setPdfContent('');
+      // The PDF stays attached for follow-up questions until removed
+      onSent(message, documentId ? [documentId] : [], pdfInfo);
     }
   };
 
@@ -53,35 +52,17 @@ const Main = () => {
     
     try {
       setUploadProgress(10);
-      const formData = new FormData();
-      formData.append('file', file);
-      
-      setUploadProgress(50);
-      // Use same logic as api.js for consistent URL detection
-      let apiUrl;
-      if (import.meta.env.VITE_API_URL) {
-        apiUrl = import.meta.env.VITE_API_URL;
-      } else if (window.location.hostname === 'chat-bot-inzint-assignment.vercel.app') {
-        apiUrl = 'https://chatbot-inzintassignment.onrender.com/api';
-      } else {
-        apiUrl = 'http://localhost:8000/api';
-      }
-      const baseUrl = apiUrl.replace('/api', '');
-      const response = await fetch(`${baseUrl}/api/process-pdf`, {
-        method: 'POST',
-        body: formData,
-      });
+      // Registered server-side once; chat turns send only the document handle
+      const result = await registerSessionPDF(file, sessionId);
       
       setUploadProgress(80);
-      if (response.ok) {
-        const result = await response.json();
-        setAttachedPDF(file);
-        setPdfContent(result.content);
-        setUploadProgress(100);
-        setTimeout(() => setUploadProgress(0), 1000);
-      } else {
-        throw new Error('Upload failed');
+      if (documentId && documentId !== result.document_id) {
+        removeSessionPDF(documentId, sessionId);
       }
+      setAttachedPDF(file);
+      setDocumentId(result.document_id);
+      setUploadProgress(100);
+      setTimeout(() => setUploadProgress(0), 1000);
     } catch (error) {
       console.error('PDF processing error:', error);
       alert('Failed to process PDF. Please try again.');
@@ -109,8 +90,11 @@ const Main = () => {
   };
 
   const removePDF = () => {
+    if (documentId) {
+      removeSessionPDF(documentId, sessionId);
+    }
     setAttachedPDF(null);
-    setPdfContent('');
+    setDocumentId(null);
   };
 
   const handleKeyDown = (e) => {
@@ -17,14 +17,15 @@ console.log('Using API URL:', DYNAMIC_API_URL);
 // File size limit (10MB)
 export const MAX_FILE_SIZE = 10 * 1024 * 1024;
 
-export const sendMessage = async (message, pdfContent = '', sessionId = 'default') => {
+export const sendMessage = async (message, documentIds = [], sessionId = 'default') => {
   try {
     const response = await fetch(`${DYNAMIC_API_URL}/chat`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
       },
-      body: JSON.stringify({ message, pdf_content: pdfContent, session_id: sessionId }),
+      // Attached PDFs live on the server; only their handles are sent per turn
+      body: JSON.stringify({ message, document_ids: documentIds, session_id: sessionId }),
     });
 
     if (!response.ok) {
@@ -127,6 +128,41 @@ export const uploadPDF = async (file) => {
   }
 };
 
+export const registerSessionPDF = async (file, sessionId = 'default') => {
+  try {
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('session_id', sessionId);
+    
+    const response = await fetch(`${DYNAMIC_API_URL}/session-pdf`, {
+      method: "POST",
+      body: formData,
+    });
+    
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    const data = await response.json();
+    return data;
+  } catch (error) {
+    console.error("Session PDF API Error:", error);
+    throw error;
+  }
+};
+
+export const removeSessionPDF = async (documentId, sessionId = 'default') => {
+  try {
+    const response = await fetch(`${DYNAMIC_API_URL}/session-pdf/${documentId}?session_id=${sessionId}`, {
+      method: "DELETE",
+    });
+    return response.ok;
+  } catch (error) {
+    console.error("Session PDF API Error:", error);
+    return false;
+  }
+};
+
 export const resetConversation = async (sessionId = 'default') => {
   try {
     const response = await fetch(`${DYNAMIC_API_URL}/reset?session_id=${sessionId}`, {
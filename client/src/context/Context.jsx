@@ -62,7 +62,7 @@ const ContextProvider = (props) => {
         }
     }, [historyLoaded]);
 
-    const onSent = async (prompt, pdfContent = '', pdfInfo = null) => {
+    const onSent = async (prompt, documentIds = [], pdfInfo = null) => {
         setErrorMsg("");
 
         if (!prompt || prompt.trim() === "") {
@@ -83,7 +83,7 @@ const ContextProvider = (props) => {
 
         try {
             // Use regular API with simulated streaming for reliability
-            const response = await sendMessage(prompt, pdfContent, sessionId);
+            const response = await sendMessage(prompt, documentIds, sessionId);
             
             // Stop loading spinner before streaming starts
             setLoading(false);
@@ -7,27 +7,47 @@ print("Retraining ML Model with Prat.AI branding")
 print("=" * 50)
 
 try:
-    from utils.ml_model import IntentClassifier
-    from utils.embeddings import EmbeddingStore
+    if "--online" in sys.argv:
+        # Fold recently logged conversations into the online model and publish
+        # the weights as a new classifier version
+        from utils.online_model import OnlineIntentClassifier
+        
+        print("\nUpdating online intent model from logged conversations...")
+        classifier = OnlineIntentClassifier()
+        try:
+            classifier.load()
+        except FileNotFoundError:
+            classifier.bootstrap()
+        result = classifier.update_from_conversations()
+        classifier.save()
+        print(f"   [OK] Learned {result['learned']} examples from {result['conversations']} conversations")
+        print("\nServers running with INTENT_BACKEND=online pick up the new weights automatically.")
+        sys.exit(0)
     
+    from utils.artifacts import inherit, publish, staging_dir
+    from utils.ml_model import train_and_save
+    from utils.online_model import ONLINE_MODEL_FILE
+    from utils.embeddings import build_and_save_index
+    
+    # Each artifact set is built in a staging directory and published
+    # atomically, so running servers never load a half-written model
     print("\n1. Retraining Intent Classifier...")
-    classifier = IntentClassifier()
-    classifier.train()
-    classifier.save()
+    staged = staging_dir("classifier")
+    train_and_save(model_dir=staged)
+    inherit("classifier", staged, [ONLINE_MODEL_FILE])
+    publish("classifier", staged)
     print("   [OK] Intent classifier retrained and saved")
     
     print("\n2. Rebuilding Embeddings...")
-    embedder = EmbeddingStore()
-    embedder.build_index()
-    embedder.save()
+    staged = staging_dir("store")
+    build_and_save_index(save_dir=staged)
+    publish("store", staged)
     print("   [OK] Embeddings rebuilt and saved")
     
     print("\n" + "=" * 50)
     print("Retraining complete! All models now use Prat.AI")
     print("=" * 50)
-    print("\nPlease restart your server for changes to take effect:")
-    print("  cd server")
-    print("  python main.py")
+    print("\nRunning servers reload the new models on their next requests; no restart needed.")
     
 except Exception as e:
     print(f"\n[ERROR] Retraining failed: {e}")
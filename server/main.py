@@ -20,7 +20,23 @@ from routes.process_pdf import router as process_pdf_router
 from routes.history import router as history_router
 from routes.reset import router as reset_router
 from routes.stream import router as stream_router
+from routes.classify import router as classify_router
+from routes.jobs import router as jobs_router
+from routes.session_pdf import router as session_pdf_router
+from routes.metrics import router as metrics_router
+from routes.profile import router as profile_router
 from utils.database import init_db
+from utils.registry import registry
+from utils.executors import pool_stats, shutdown_pools, run_io
+from utils.log_writer import conversation_writer
+from utils.response_cache import response_cache, semantic_cache
+from utils.batcher import intent_batcher
+from utils.jobs import job_manager
+from utils.pdf_processor import pdf_text_cache
+from utils.session_docs import session_documents
+from utils.prompt_builder import prompt_builder
+from utils.memory import conversation_memory
+from utils.profiler import ProfilerMiddleware, request_profiler
 
 app = FastAPI(title="Prat.AI API", version="1.0.0")
 
@@ -45,8 +61,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
+# Sampled per-request stack profiles of chat, stream and PDF upload requests
+app.add_middleware(ProfilerMiddleware)
+
 @app.on_event("startup")
 async def startup_event():
     try:
@@ -54,6 +74,22 @@ async def startup_event():
         print("[OK] Database initialized")
     except Exception as e:
         print(f"[ERROR] Database init error: {e}")
+    
+    await conversation_writer.start()
+    await job_manager.start()
+    
+    # Warm the shared models so the first request doesn't pay the load cost
+    registry.classifier
+    registry.store
+    registry.gemini
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Drain buffered conversation rows before the pools go away
+    await conversation_writer.stop()
+    await intent_batcher.stop()
+    await job_manager.stop()
+    shutdown_pools()
 
 app.include_router(chat_router, prefix="/api")
 app.include_router(train_router, prefix="/api")
@@ -63,6 +99,11 @@ app.include_router(process_pdf_router, prefix="/api")
 app.include_router(history_router, prefix="/api")
 app.include_router(reset_router, prefix="/api")
 app.include_router(stream_router, prefix="/api")
+app.include_router(classify_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(session_pdf_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(profile_router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -71,28 +112,29 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     try:
-        from utils.ml_model import IntentClassifier
-        from utils.gemini_client import GeminiClient
-        
+        models = registry.status()
         status = {
             "status": "healthy",
             "gemini_api_key": bool(os.getenv('GEMINI_API_KEY')),
-            "models_exist": False,
-            "database_ok": False
+            "models_exist": models["classifier_ready"],
+            "database_ok": False,
+            "models": models,
+            "pools": pool_stats(),
+            "log_writer": conversation_writer.stats(),
+            "response_cache": response_cache.stats(),
+            "semantic_cache": semantic_cache.stats(),
+            "intent_batcher": intent_batcher.stats(),
+            "jobs": job_manager.stats(),
+            "pdf_text_cache": pdf_text_cache.stats(),
+            "session_documents": session_documents.stats(),
+            "prompt_builder": prompt_builder.stats(),
+            "conversation_memory": conversation_memory.stats(),
+            "profiler": request_profiler.stats()
         }
         
-        # Check models
-        try:
-            classifier = IntentClassifier()
-            classifier.load()
-            status["models_exist"] = True
-        except:
-            status["models_exist"] = False
-            
         # Check database
         try:
-            from utils.database import init_db
-            init_db()
+            await run_io(init_db)
             status["database_ok"] = True
         except:
             status["database_ok"] = False
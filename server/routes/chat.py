@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from typing import List, Optional
 import random
+import time
 import os
 import sys
 from pathlib import Path
@@ -8,54 +10,23 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.ml_model import IntentClassifier
 from utils.sentiment import analyze_sentiment
-from utils.embeddings import EmbeddingStore
-from utils.gemini_client import GeminiClient
-from utils.database import log_conversation
+from utils.log_writer import conversation_writer
+from utils.response_cache import response_cache, retrieval_context, semantic_cache, semantic_embedder
+from utils.registry import registry
+from utils.executors import run_cpu
+from utils.batcher import intent_batcher
+from utils.session_docs import session_documents
+from utils.memory import conversation_memory
+from utils.metrics import metrics
 
 router = APIRouter()
 
-intent_classifier = IntentClassifier()
-embedding_store = EmbeddingStore()
-gemini_client = None
-
-try:
-    intent_classifier.load()
-    print("[OK] Intent classifier loaded")
-except Exception as e:
-    print(f"[WARN] Loading failed, using fallback mode: {e}")
-    # Create minimal fallback responses
-    intent_classifier.intent_responses = {
-        'greeting': ['Hello! I am Prat.AI, your hybrid AI assistant.'],
-        'goodbye': ['Goodbye! Have a great day!'],
-        'thanks': ['You\'re welcome!'],
-        'identity': ['I am Prat.AI, an India\'s Indigenous hybrid AI assistant created by Pratyush Srivastava under PratWare — Multiverse of Softwares.']
-    }
-    print("[OK] Fallback responses initialized")
-
-try:
-    embedding_store.load()
-    print("[OK] Embedding store loaded")
-except Exception as e:
-    print(f"[WARN] Loading failed, building index: {e}")
-    try:
-        kb_dir = BASE_DIR.parent / "data" / "knowledge_base"
-        embedding_store.build_index(str(kb_dir))
-        embedding_store.save()
-        print("[OK] Embedding store built and saved")
-    except Exception as build_error:
-        print(f"[ERROR] Building failed: {build_error}")
-
-try:
-    gemini_client = GeminiClient()
-    print("[OK] Gemini client initialized")
-except Exception as e:
-    print(f"[ERROR] Gemini client initialization failed: {e}")
-
 class ChatRequest(BaseModel):
     message: str
     pdf_content: str = ""
+    # Handles from /api/session-pdf; only passages relevant to this turn are sent
+    document_ids: List[str] = []
     session_id: str = "default"
 
 class ChatResponse(BaseModel):
@@ -64,38 +35,48 @@ class ChatResponse(BaseModel):
     confidence: float
     sentiment: str
     response_type: str
+    # Token count of each prompt section when an LLM prompt was assembled
+    prompt_tokens: Optional[dict] = None
 
 CONFIDENCE_THRESHOLD = 0.85
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
+    started = time.perf_counter()
     try:
         user_message = request.message
+        intent_classifier = registry.classifier
+        embedding_store = registry.store
+        gemini_client = registry.gemini
         
         # Handle prediction with fallback
-        try:
-            intent_result = intent_classifier.predict(user_message)
-        except:
-            # Fallback prediction based on keywords
-            message_lower = user_message.lower()
-            if any(word in message_lower for word in ['hello', 'hi', 'hey']):
-                intent_result = {'intent': 'greeting', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('greeting', [])}
-            elif any(word in message_lower for word in ['bye', 'goodbye']):
-                intent_result = {'intent': 'goodbye', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('goodbye', [])}
-            elif any(word in message_lower for word in ['thank', 'thanks']):
-                intent_result = {'intent': 'thanks', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('thanks', [])}
-            elif any(word in message_lower for word in ['who are you', 'what are you', 'your name']):
-                intent_result = {'intent': 'identity', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('identity', [])}
-            else:
-                intent_result = {'intent': 'unknown', 'confidence': 0.1, 'responses': []}
-        sentiment_result = analyze_sentiment(user_message)
+        with metrics.timer("classify", route="chat"):
+            try:
+                intent_result = await intent_batcher.submit(intent_classifier, user_message)
+            except:
+                # Fallback prediction based on keywords
+                message_lower = user_message.lower()
+                if any(word in message_lower for word in ['hello', 'hi', 'hey']):
+                    intent_result = {'intent': 'greeting', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('greeting', [])}
+                elif any(word in message_lower for word in ['bye', 'goodbye']):
+                    intent_result = {'intent': 'goodbye', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('goodbye', [])}
+                elif any(word in message_lower for word in ['thank', 'thanks']):
+                    intent_result = {'intent': 'thanks', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('thanks', [])}
+                elif any(word in message_lower for word in ['who are you', 'what are you', 'your name']):
+                    intent_result = {'intent': 'identity', 'confidence': 0.9, 'responses': intent_classifier.intent_responses.get('identity', [])}
+                else:
+                    intent_result = {'intent': 'unknown', 'confidence': 0.1, 'responses': []}
+        with metrics.timer("sentiment", route="chat"):
+            sentiment_result = await run_cpu(analyze_sentiment, user_message)
         
         intent = intent_result['intent']
         confidence = intent_result['confidence']
         sentiment = sentiment_result['sentiment']
+        has_pdf = bool(request.pdf_content or request.document_ids)
+        prompt_tokens = None
         
         # Use Gemini for all queries except very high confidence greetings
-        if confidence >= CONFIDENCE_THRESHOLD and intent in ['greeting', 'goodbye', 'thanks'] and not request.pdf_content:
+        if confidence >= CONFIDENCE_THRESHOLD and intent in ['greeting', 'goodbye', 'thanks'] and not has_pdf:
             responses = intent_result.get('responses', intent_classifier.intent_responses.get(intent, ['Hello!']))
             response = random.choice(responses)
             response_type = "ml_local"
@@ -103,15 +84,54 @@ async def chat(request: ChatRequest):
             # Always try Gemini for knowledge questions or PDF queries
             if gemini_client:
                 try:
-                    context_docs = embedding_store.search(user_message, top_k=3)
-                    context = "\n\n".join(context_docs) if context_docs else ""
+                    with metrics.timer("retrieval", route="chat"):
+                        passages = await run_cpu(embedding_store.retrieve_passages, user_message, refresh=True)
+                        
+                        # Add PDF content if provided
+                        if request.document_ids:
+                            passages += await run_cpu(session_documents.retrieve_passages, request.session_id, request.document_ids, user_message)
+                        elif request.pdf_content:
+                            passages.append({"text": request.pdf_content, "kind": "document", "score": 0.0})
+                    
+                    # Recent turns verbatim plus a summary of older ones
+                    with metrics.timer("memory", route="chat"):
+                        history, summary = await conversation_memory.context(request.session_id)
+                    contextual = has_pdf or bool(history)
                     
-                    # Add PDF content if provided
-                    if request.pdf_content:
-                        context = f"PDF Content:\n{request.pdf_content}\n\n{context}"
+                    # Persona, history and passages trimmed to the prompt token budget
+                    with metrics.timer("prompt", route="chat"):
+                        prompt = await run_cpu(gemini_client.build_prompt, user_message, passages, history, summary)
+                    prompt_tokens = prompt.report()
                     
-                    response = gemini_client.generate_response(user_message, context)
-                    response_type = "llm_gemini"
+                    # Repeated questions over the same passages skip the LLM call.
+                    # The cache is shared by every session, so answers that depend
+                    # on a PDF or earlier turns are neither looked up nor stored
+                    cache_key = None
+                    response = None
+                    if not contextual:
+                        with metrics.timer("cache", route="chat"):
+                            response_cache.check_fingerprint(embedding_store.fingerprint)
+                            cache_key = response_cache.make_key(user_message, retrieval_context(passages), gemini_client.model_name, embedding_store.fingerprint)
+                            response = await response_cache.aget(cache_key)
+                    if response is not None:
+                        response_type = "llm_cached"
+                    else:
+                        # Paraphrases of a recent question reuse its answer; answers
+                        # that depend on a PDF or earlier turns are skipped
+                        with metrics.timer("semantic_cache", route="chat"):
+                            semantic_cache.configure(*semantic_embedder(embedding_store))
+                            similar = None if contextual else await run_cpu(semantic_cache.lookup, user_message, intent)
+                        if similar is not None:
+                            response = similar[0]
+                            response_type = "llm_semantic_cached"
+                        else:
+                            with metrics.timer("llm", route="chat"):
+                                response = await gemini_client.generate_response_async(user_message, prompt)
+                            response_type = "llm_gemini"
+                            if not contextual:
+                                await run_cpu(semantic_cache.add, user_message, response, intent)
+                        if cache_key:
+                            await response_cache.aput(cache_key, response)
                 except Exception as gemini_error:
                     print(f"Gemini error: {gemini_error}")
                     # Fallback to ML response if available
@@ -139,20 +159,28 @@ async def chat(request: ChatRequest):
         
         try:
             # Log with PDF indicator
-            log_message = f"{user_message} [PDF: Yes]" if request.pdf_content else user_message
-            log_conversation(log_message, response, intent, confidence, sentiment, response_type, request.session_id)
+            log_message = f"{user_message} [PDF: Yes]" if has_pdf else user_message
+            with metrics.timer("log", route="chat"):
+                await conversation_writer.log(log_message, response, intent, confidence, sentiment, response_type, request.session_id)
+            await conversation_memory.add(request.session_id, user_message, response)
         except Exception as log_error:
             print(f"Logging error: {log_error}")
         
+        metrics.inc("responses_total", route="chat", response_type=response_type, intent=intent)
+        metrics.observe("request_seconds", time.perf_counter() - started, route="chat", response_type=response_type)
+        
         return ChatResponse(
             response=response,
             intent=intent,
             confidence=confidence,
             sentiment=sentiment,
-            response_type=response_type
+            response_type=response_type,
+            prompt_tokens=prompt_tokens
         )
     except Exception as e:
         print(f"Chat error: {e}")
+        metrics.inc("responses_total", route="chat", response_type="error_fallback", intent="error")
+        metrics.observe("request_seconds", time.perf_counter() - started, route="chat", response_type="error_fallback")
         # Return a friendly fallback response instead of HTTP error
         return ChatResponse(
             response="Sorry, I encountered an error. I'm Prat.AI, your hybrid AI assistant. Please try asking something else!",
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.sentiment import analyze_sentiment_batch
+from utils.registry import registry
+from utils.executors import run_cpu
+
+router = APIRouter()
+
+# Upper bound on messages per request and on messages scored per pool task
+CLASSIFY_BATCH_LIMIT = int(os.getenv("CLASSIFY_BATCH_LIMIT", "20000"))
+CLASSIFY_CHUNK_SIZE = int(os.getenv("CLASSIFY_CHUNK_SIZE", "1000"))
+
+class ClassifyBatchRequest(BaseModel):
+    messages: List[str]
+    sentiment: bool = True
+    chunk_size: int = CLASSIFY_CHUNK_SIZE
+
+def classify_chunk(classifier, messages, offset, with_sentiment):
+    intents = classifier.predict_batch(messages)
+    sentiments = analyze_sentiment_batch(messages) if with_sentiment else None
+    lines = []
+    for i, intent_result in enumerate(intents):
+        row = {
+            "index": offset + i,
+            "intent": intent_result['intent'],
+            "confidence": round(intent_result['confidence'], 4)
+        }
+        if sentiments is not None:
+            row.update(sentiments[i])
+        lines.append(json.dumps(row))
+    return "\n".join(lines) + "\n"
+
+async def generate_results(classifier, request):
+    chunk_size = max(1, min(request.chunk_size, CLASSIFY_CHUNK_SIZE))
+    for offset in range(0, len(request.messages), chunk_size):
+        messages = request.messages[offset:offset + chunk_size]
+        # Each chunk is one vectorized pass on the cpu pool, sent as soon as it is ready
+        yield await run_cpu(classify_chunk, classifier, messages, offset, request.sentiment)
+
+@router.post("/classify/batch")
+async def classify_batch(request: ClassifyBatchRequest):
+    if len(request.messages) > CLASSIFY_BATCH_LIMIT:
+        raise HTTPException(status_code=413, detail=f"At most {CLASSIFY_BATCH_LIMIT} messages per request")
+    intent_classifier = registry.classifier
+    if intent_classifier is None or not intent_classifier.ready:
+        raise HTTPException(status_code=503, detail="Intent classifier is not trained yet")
+    print(f"[CLASSIFY] Scoring {len(request.messages)} messages")
+    return StreamingResponse(
+        generate_results(intent_classifier, request),
+        media_type="application/x-ndjson"
+    )
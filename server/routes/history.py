@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import csv
+import io
+import json
 import os
 import sys
+from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.database import get_chat_history
+from utils.database import decode_cursor, get_export_page, get_history_page
+from utils.executors import run_io
 
 router = APIRouter()
 
+# Rows fetched per query while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_FIELDS = ["id", "session_id", "timestamp", "user_message", "bot_response", "intent", "confidence", "sentiment", "response_type"]
+
 class HistoryResponse(BaseModel):
     id: int
     user_message: str
@@ -24,12 +34,62 @@ class HistoryResponse(BaseModel):
 
 @router.get("/history", response_model=List[HistoryResponse])
 async def get_history(
+    response: Response,
     session_id: str = Query(default="default"),
-    limit: int = Query(default=50, le=100)
+    limit: int = Query(default=50, ge=1, le=100),
+    before: Optional[str] = Query(default=None)
 ):
+    """One page of a session's history; pass X-Next-Cursor back as `before` for older turns"""
+    if before:
+        try:
+            decode_cursor(before)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        history = get_chat_history(session_id, limit)
+        history, next_cursor = await run_io(get_history_page, session_id, limit, before)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        print(f"[OK] Retrieved {len(history)} conversations from NeonDB for session: {session_id}")
         return history
     except Exception as e:
         print(f"History error: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def _csv_lines(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+async def export_rows(session_id, start, end, fmt):
+    """Stream matching rows batch by batch; memory use is one batch at a time"""
+    cursor = None
+    first = True
+    while True:
+        rows, cursor = await run_io(get_export_page, session_id, start, end, cursor, EXPORT_BATCH_SIZE)
+        if fmt == "csv":
+            if rows or first:
+                yield _csv_lines(rows, header=first)
+        elif rows:
+            yield "".join(json.dumps(row) + "\n" for row in rows)
+        first = False
+        if cursor is None:
+            return
+
+@router.get("/history/export")
+async def export_history(
+    session_id: Optional[str] = Query(default=None),
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None),
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$")
+):
+    """Export one session, a date range, or both, as NDJSON or CSV"""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"conversations-{session_id or 'all'}.{format}"
+    return StreamingResponse(
+        export_rows(session_id, start, end, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.jobs import job_manager
+
+router = APIRouter()
+
+@router.get("/jobs")
+async def list_jobs():
+    return [job.to_dict() for job in reversed(job_manager.jobs.values())]
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
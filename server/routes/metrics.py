@@ -0,0 +1,58 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.metrics import metrics
+from utils.executors import pool_stats
+from utils.log_writer import conversation_writer
+from utils.response_cache import response_cache, semantic_cache
+from utils.batcher import intent_batcher
+from utils.pdf_processor import pdf_text_cache
+from utils.session_docs import session_documents
+from utils.prompt_builder import prompt_builder
+from utils.memory import conversation_memory
+from utils.jobs import job_manager
+
+router = APIRouter()
+
+# Components whose numeric stats() fields are exported as gauges
+GAUGE_SOURCES = {
+    "response_cache": response_cache,
+    "semantic_cache": semantic_cache,
+    "log_writer": conversation_writer,
+    "intent_batcher": intent_batcher,
+    "pdf_text_cache": pdf_text_cache,
+    "session_documents": session_documents,
+    "conversation_memory": conversation_memory,
+}
+
+def _numeric(component, stats, labels=None):
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            yield f"{component}_{key}", labels or {}, value
+
+def collect_gauges():
+    for name, stats in pool_stats().items():
+        yield from _numeric("pool", stats, {"pool": name})
+    for component, source in GAUGE_SOURCES.items():
+        yield from _numeric(component, source.stats())
+    prompts = prompt_builder.stats()
+    yield "prompt_prompts", {}, prompts["prompts"]
+    for section, tokens in prompts["avg_tokens"].items():
+        yield "prompt_avg_tokens", {"section": section}, tokens
+    for status, count in job_manager.stats()["jobs"].items():
+        yield "jobs", {"status": status}, count
+
+metrics.add_collector(collect_gauges)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
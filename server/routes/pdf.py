@@ -7,8 +7,9 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.pdf_processor import PDFProcessor
-from utils.embeddings import EmbeddingStore
+from utils.pdf_processor import PDFProcessor, extract_upload
+from utils.executors import run_cpu, run_io
+from utils.registry import registry
 
 router = APIRouter()
 pdf_processor = PDFProcessor()
@@ -25,30 +26,31 @@ async def upload_pdf(file: UploadFile = File(...)):
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        # Read file content
-        content = await file.read()
-        
-        # Extract text from PDF
-        text_content = pdf_processor.extract_text_from_pdf(content)
+        # Spool to disk and extract pages in parallel worker processes
+        # (or straight from the extraction cache for a repeated upload)
+        text_content, pages_count, _ = await extract_upload(file)
         
         if not text_content.strip():
             raise HTTPException(status_code=400, detail="No text found in PDF")
         
-        # Save PDF content
-        pdf_processor.save_pdf_content(file.filename, text_content)
-        
-        # Rebuild embeddings index to include new PDF
-        embedding_store = EmbeddingStore()
+        # The same content under another name is already searchable
+        embedding_store = registry.store
+        await run_io(embedding_store.reload_if_changed)
+        existing = embedding_store.find_document(text_content)
+        if existing is not None and existing != file.filename.replace('.pdf', '.txt'):
+            print(f"[OK] PDF content already indexed as {existing}")
+            return PDFUploadResponse(
+                message=f"PDF '{file.filename}' is already indexed as '{existing}'",
+                filename=file.filename,
+                pages_processed=pages_count
+            )
         
-        # Build index including both knowledge_base and pdf_content
-        kb_dir = BASE_DIR.parent / "data" / "knowledge_base"
-        pdf_dir = BASE_DIR.parent / "data" / "pdf_content"
-        
-        result = embedding_store.build_combined_index([str(kb_dir), str(pdf_dir)])
-        embedding_store.save()
+        # Save PDF content
+        filepath = await run_io(pdf_processor.save_pdf_content, file.filename, text_content)
         
-        # Count pages (rough estimate)
-        pages_count = len(text_content.split('\n\n'))
+        # Index only the new document; other workers pick up the segment
+        result = await run_cpu(embedding_store.add_document, Path(filepath).name, text_content)
+        print(f"[OK] Indexed PDF: {result}")
         
         return PDFUploadResponse(
             message=f"PDF '{file.filename}' uploaded and indexed successfully",
@@ -56,6 +58,8 @@ async def upload_pdf(file: UploadFile = File(...)):
             pages_processed=pages_count
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"PDF upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -6,7 +6,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.pdf_processor import PDFProcessor
+from utils.pdf_processor import PDFProcessor, extract_upload
 
 router = APIRouter()
 pdf_processor = PDFProcessor()
@@ -21,8 +21,7 @@ async def process_pdf(file: UploadFile = File(...)):
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
         
-        content = await file.read()
-        text_content = pdf_processor.extract_text_from_pdf(content)
+        text_content, _, _ = await extract_upload(file)
         
         if not text_content.strip():
             raise HTTPException(status_code=400, detail="No text found in PDF")
@@ -32,6 +31,8 @@ async def process_pdf(file: UploadFile = File(...)):
             filename=file.filename
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"PDF processing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.profiler import PROFILE_PATHS, PROFILE_TOKEN, request_profiler
+
+router = APIRouter()
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.folded$")
+
+class ProfileSettings(BaseModel):
+    rate: float = Field(ge=0.0, le=1.0)
+
+def _check_token(token):
+    # Without a configured token the admin endpoints do not exist
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token != PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+@router.get("/profile")
+async def profile_status(x_profile_token: Optional[str] = Header(default=None)):
+    _check_token(x_profile_token)
+    return dict(request_profiler.stats(), paths=list(PROFILE_PATHS), recent=request_profiler.recent())
+
+@router.post("/profile")
+async def set_profile_rate(settings: ProfileSettings, x_profile_token: Optional[str] = Header(default=None)):
+    """Set the fraction of chat/stream/upload requests profiled; 0 turns sampling off"""
+    _check_token(x_profile_token)
+    request_profiler.rate = settings.rate
+    print(f"[OK] Request profiling rate set to {settings.rate}")
+    return request_profiler.stats()
+
+@router.get("/profile/{name}")
+async def download_profile(name: str, x_profile_token: Optional[str] = Header(default=None)):
+    """Collapsed-stack file; open in speedscope or pipe through flamegraph.pl"""
+    _check_token(x_profile_token)
+    path = request_profiler.directory / name
+    if not PROFILE_NAME_PATTERN.match(name) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
@@ -8,6 +8,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
 from utils.database import clear_conversation_history
+from utils.executors import run_io
+from utils.log_writer import conversation_writer
+from utils.memory import conversation_memory
 
 router = APIRouter()
 
@@ -18,7 +21,10 @@ class ResetResponse(BaseModel):
 @router.delete("/reset")
 async def reset_conversation(session_id: str = "default"):
     try:
-        cleared_count = clear_conversation_history(session_id)
+        # Rows still buffered by the write-behind logger would land after the delete
+        await conversation_writer.flush()
+        cleared_count = await run_io(clear_conversation_history, session_id)
+        conversation_memory.clear(session_id)
         return ResetResponse(
             status="success",
             message=f"Cleared {cleared_count} conversations for session {session_id}"
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from pydantic import BaseModel
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from utils.pdf_processor import extract_upload
+from utils.executors import run_cpu
+from utils.session_docs import session_documents
+
+router = APIRouter()
+
+class SessionPDFResponse(BaseModel):
+    document_id: str
+    filename: str
+    pages: int
+    passages: int
+    tokens: int
+
+@router.post("/session-pdf", response_model=SessionPDFResponse)
+async def register_session_pdf(file: UploadFile = File(...), session_id: str = Form("default")):
+    """Attach a PDF to one chat session; chat turns then send only the document_id"""
+    try:
+        if not file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+        text_content, pages_count, digest = await extract_upload(file)
+
+        if not text_content.strip():
+            raise HTTPException(status_code=400, detail="No text found in PDF")
+
+        document = await run_cpu(session_documents.register, session_id, digest, file.filename, text_content, pages_count)
+        print(f"[OK] PDF '{file.filename}' attached to session {session_id}: {document['passages']} passages")
+        return SessionPDFResponse(**document)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Session PDF error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/session-pdf")
+async def list_session_pdfs(session_id: str = Query(default="default")):
+    return session_documents.list(session_id)
+
+@router.delete("/session-pdf/{document_id}")
+async def remove_session_pdf(document_id: str, session_id: str = Query(default="default")):
+    if not session_documents.remove(session_id, document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"status": "removed", "document_id": document_id}
@@ -1,19 +1,26 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 import os
 import sys
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
 from utils.database import get_stats
+from utils.executors import run_io
 
 router = APIRouter()
 
 @router.get("/stats")
-async def get_analytics():
+async def get_analytics(
+    session_id: Optional[str] = Query(default=None),
+    start: Optional[datetime] = Query(default=None),
+    end: Optional[datetime] = Query(default=None)
+):
     try:
-        stats = get_stats()
+        stats = await run_io(get_stats, session_id, start, end)
         return {"status": "success", "data": stats}
     except Exception as e:
         return {"status": "error", "message": str(e)}
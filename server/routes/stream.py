@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List
 import json
 import asyncio
 import random
+import time
 import os
 import sys
 from pathlib import Path
@@ -11,84 +13,191 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.ml_model import IntentClassifier
 from utils.sentiment import analyze_sentiment
-from utils.embeddings import EmbeddingStore
-from utils.gemini_client import GeminiClient
-from utils.database import log_conversation
+from utils.log_writer import conversation_writer
+from utils.response_cache import response_cache, retrieval_context, semantic_cache, semantic_embedder
+from utils.registry import registry
+from utils.gemini_client import clean_response
+from utils.executors import run_cpu
+from utils.batcher import intent_batcher
+from utils.session_docs import session_documents
+from utils.memory import conversation_memory
+from utils.metrics import metrics
 
 router = APIRouter()
 
-intent_classifier = IntentClassifier()
-embedding_store = EmbeddingStore()
-gemini_client = None
-
-try:
-    intent_classifier.load()
-    embedding_store.load()
-    gemini_client = GeminiClient()
-    print("[OK] Streaming models loaded successfully")
-except Exception as e:
-    print(f"[WARNING] Streaming models load error: {e}")
-
 class StreamRequest(BaseModel):
     message: str
+    # Handles from /api/session-pdf; only passages relevant to this turn are sent
+    document_ids: List[str] = []
     session_id: str = "default"
 
-async def generate_stream(message: str, session_id: str):
+# SSE frames are coalesced until they hold this many characters or this much
+# time has passed since the last frame, whichever comes first
+STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "24"))
+STREAM_FLUSH_MS = int(os.getenv("STREAM_FLUSH_MS", "50"))
+
+def sse_frame(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
+async def single_chunk(text):
+    yield text
+
+async def batch_chunks(source, flush_chars=None, flush_ms=None):
+    """Coalesce an async stream of text chunks into size/time bounded batches"""
+    if flush_chars is None:
+        flush_chars = STREAM_FLUSH_CHARS
+    if flush_ms is None:
+        flush_ms = STREAM_FLUSH_MS
+    loop = asyncio.get_running_loop()
+    iterator = source.__aiter__()
+    buffer = []
+    buffered = 0
+    # Start "overdue" so the first chunk is forwarded immediately
+    last_flush = loop.time() - flush_ms / 1000
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None
+            if buffer:
+                timeout = max(0.0, last_flush + flush_ms / 1000 - loop.time())
+            # Wait without cancelling the pending read so the source survives a timeout
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if done:
+                try:
+                    text = pending.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    pending = None
+                buffer.append(text)
+                buffered += len(text)
+                if buffered < flush_chars and loop.time() - last_flush < flush_ms / 1000:
+                    continue
+            if buffer:
+                yield "".join(buffer)
+                buffer = []
+                buffered = 0
+                last_flush = loop.time()
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+async def generate_stream(message: str, session_id: str, document_ids=()):
+    started = time.perf_counter()
     try:
         print(f"[STREAM] Processing: {message}")
+        intent_classifier = registry.classifier
+        embedding_store = registry.store
+        gemini_client = registry.gemini
+        fallback_responses = []
+        cache_key = None
+        prompt_tokens = None
+        contextual = bool(document_ids)
         
         # Get response using existing logic
-        if intent_classifier and hasattr(intent_classifier, 'predict'):
-            intent_result = intent_classifier.predict(message)
-            sentiment_result = analyze_sentiment(message)
+        if intent_classifier is not None and intent_classifier.ready:
+            with metrics.timer("classify", route="stream"):
+                intent_result = await intent_batcher.submit(intent_classifier, message)
+            with metrics.timer("sentiment", route="stream"):
+                sentiment_result = await run_cpu(analyze_sentiment, message)
             
             intent = intent_result['intent']
             confidence = intent_result['confidence']
             sentiment = sentiment_result['sentiment']
+            fallback_responses = intent_result['responses']
             
-            if confidence >= 0.85 and intent in ['greeting', 'goodbye', 'thanks']:
-                response = random.choice(intent_result['responses'])
+            if confidence >= 0.85 and intent in ['greeting', 'goodbye', 'thanks'] and not document_ids:
+                source = single_chunk(random.choice(intent_result['responses']))
                 response_type = "ml_local"
             else:
                 if gemini_client:
                     try:
-                        context_docs = embedding_store.search(message, top_k=3)
-                        context = "\n\n".join(context_docs) if context_docs else ""
-                        response = gemini_client.generate_response(message, context)
-                        response_type = "llm_gemini"
-                    except Exception as e:
-                        print(f"[STREAM] Gemini error: {e}")
-                        response = random.choice(intent_result['responses']) if intent_result['responses'] else "I'm having trouble right now."
-                        response_type = "ml_fallback"
+                        with metrics.timer("retrieval", route="stream"):
+                            passages = await run_cpu(embedding_store.retrieve_passages, message, refresh=True)
+                            if document_ids:
+                                passages += await run_cpu(session_documents.retrieve_passages, session_id, document_ids, message)
+                        with metrics.timer("memory", route="stream"):
+                            history, summary = await conversation_memory.context(session_id)
+                        contextual = bool(document_ids or history)
+                        with metrics.timer("prompt", route="stream"):
+                            prompt = await run_cpu(gemini_client.build_prompt, message, passages, history, summary)
+                        prompt_tokens = prompt.report()
+                        # Both caches are shared by every session: skip them for
+                        # answers that depend on a PDF or earlier turns
+                        cached = None
+                        if not contextual:
+                            with metrics.timer("cache", route="stream"):
+                                response_cache.check_fingerprint(embedding_store.fingerprint)
+                                cache_key = response_cache.make_key(message, retrieval_context(passages), gemini_client.model_name, embedding_store.fingerprint)
+                                cached = await response_cache.aget(cache_key)
+                        similar = None
+                        if cached is None and not contextual:
+                            with metrics.timer("semantic_cache", route="stream"):
+                                semantic_cache.configure(*semantic_embedder(embedding_store))
+                                similar = await run_cpu(semantic_cache.lookup, message, intent)
+                        if cached is not None:
+                            source = single_chunk(cached)
+                            response_type = "llm_cached"
+                        elif similar is not None:
+                            source = single_chunk(similar[0])
+                            response_type = "llm_semantic_cached"
+                        else:
+                            source = gemini_client.stream_response(message, prompt)
+                            response_type = "llm_gemini"
+                    except Exception as setup_error:
+                        print(f"[STREAM] Gemini error: {setup_error}")
+                        # Retrieval, memory or prompt building failed: answer from the intent model
+                        cache_key = None
+                        if fallback_responses:
+                            source = single_chunk(random.choice(fallback_responses))
+                            response_type = "ml_fallback"
+                        else:
+                            source = single_chunk("I'm having trouble connecting to my knowledge base. Please try again.")
+                            response_type = "error"
                 else:
-                    response = random.choice(intent_result['responses']) if intent_result['responses'] else "Please configure Gemini API."
+                    source = single_chunk(random.choice(intent_result['responses']) if intent_result['responses'] else "Please configure Gemini API.")
                     response_type = "ml_local"
         else:
             # Fallback response
-            response = "Hello! I'm Prat.AI, your hybrid AI assistant. How can I help you today?"
+            source = single_chunk("Hello! I'm Prat.AI, your hybrid AI assistant. How can I help you today?")
             response_type = "fallback"
             intent = "greeting"
             confidence = 0.9
             sentiment = "neutral"
         
-        response = response.replace("PratChat", "Prat.AI").replace("pratchat", "Prat.AI").replace("Pratchat", "Prat.AI")
-        print(f"[STREAM] Response: {response[:50]}...")
-        
-        # Stream response character by character for better effect
-        streamed_response = ""
+        # Forward model output as it arrives, batched into SSE frames
+        streamed = []
+        stream_started = time.perf_counter()
+        try:
+            async for content in batch_chunks(source):
+                if not streamed:
+                    metrics.observe("first_token_seconds", time.perf_counter() - started, route="stream", response_type=response_type)
+                streamed.append(content)
+                yield sse_frame({"content": content, "done": False})
+        except Exception as e:
+            print(f"[STREAM] Gemini error: {e}")
+            if not streamed:
+                content = random.choice(fallback_responses) if fallback_responses else "I'm having trouble right now."
+                response_type = "ml_fallback"
+                streamed.append(content)
+                yield sse_frame({"content": content, "done": False})
+            else:
+                # Part of the answer already went out; it is incomplete, so it must never be cached
+                response_type = "llm_partial"
         
-        for char in response:
-            streamed_response += char
-            
-            chunk = {
-                "content": char,
-                "done": False
-            }
-            
-            yield f"data: {json.dumps(chunk)}\n\n"
-            await asyncio.sleep(0.02)  # 20ms delay per character
+        metrics.observe("stage_seconds", time.perf_counter() - stream_started, stage="llm" if response_type in ("llm_gemini", "llm_partial") else "respond", route="stream")
+        streamed_response = clean_response("".join(streamed))
+        # Only an answer that streamed to the end is cached
+        if response_type == "llm_gemini" and cache_key:
+            await response_cache.aput(cache_key, streamed_response)
+            if not contextual:
+                await run_cpu(semantic_cache.add, message, streamed_response, intent)
+        print(f"[STREAM] Response: {streamed_response[:50]}...")
         
         # Send completion signal
         final_chunk = {
@@ -98,32 +207,38 @@ async def generate_stream(message: str, session_id: str):
                 "intent": intent,
                 "confidence": confidence,
                 "sentiment": sentiment,
-                "response_type": response_type
+                "response_type": response_type,
+                "prompt_tokens": prompt_tokens
             }
         }
         
-        yield f"data: {json.dumps(final_chunk)}\n\n"
+        yield sse_frame(final_chunk)
+        metrics.inc("responses_total", route="stream", response_type=response_type, intent=intent)
+        metrics.observe("request_seconds", time.perf_counter() - started, route="stream", response_type=response_type)
         
         # Log conversation
         try:
-            log_conversation(message, streamed_response.strip(), intent, confidence, sentiment, response_type, session_id)
+            with metrics.timer("log", route="stream"):
+                await conversation_writer.log(message, streamed_response.strip(), intent, confidence, sentiment, response_type, session_id)
+            await conversation_memory.add(session_id, message, streamed_response.strip())
         except Exception as e:
             print(f"[STREAM] Log error: {e}")
             
     except Exception as e:
         print(f"[STREAM] Error: {e}")
+        metrics.inc("responses_total", route="stream", response_type="error", intent="error")
         error_chunk = {
             "content": "Sorry, I encountered an error.",
             "done": True,
             "error": str(e)
         }
-        yield f"data: {json.dumps(error_chunk)}\n\n"
+        yield sse_frame(error_chunk)
 
 @router.post("/stream")
 async def stream_chat(request: StreamRequest):
     print(f"[STREAM] Received request: {request.message}")
     return StreamingResponse(
-        generate_stream(request.message, request.session_id),
+        generate_stream(request.message, request.session_id, request.document_ids),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1,14 +1,16 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from pydantic import BaseModel
 import os
 import sys
 from pathlib import Path
+from typing import List
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from utils.ml_model import IntentClassifier
-from utils.embeddings import EmbeddingStore
+from utils.registry import registry
+from utils.executors import run_cpu, run_io
+from utils.jobs import job_manager
 
 router = APIRouter()
 
@@ -17,17 +19,81 @@ class TrainResponse(BaseModel):
     message: str
     details: dict
 
+class LabelledExample(BaseModel):
+    message: str
+    intent: str
+
+class OnlineTrainRequest(BaseModel):
+    examples: List[LabelledExample] = []
+    from_logs: bool = True
+    reset: bool = False
+
+async def submit_job(kind, wait, success_message):
+    """Queue a background job; with wait=true block until it finishes like the old API"""
+    job = await job_manager.submit(kind)
+    if not wait:
+        return TrainResponse(
+            status="queued",
+            message=f"Job {job.id} queued, poll /api/jobs/{job.id} for progress",
+            details=job.to_dict()
+        )
+    await job.wait()
+    if job.status != "succeeded":
+        return TrainResponse(
+            status="error",
+            message=job.error or job.message,
+            details=job.to_dict()
+        )
+    return TrainResponse(
+        status="success",
+        message=success_message,
+        details=job.result
+    )
+
 @router.post("/train", response_model=TrainResponse)
-async def train_model():
+async def train_model(wait: bool = Query(default=False)):
     try:
-        classifier = IntentClassifier()
-        result = classifier.train()
-        classifier.save()
+        # Trained in a separate process, then published and hot-swapped in
+        return await submit_job("train", wait, "Intent classifier trained successfully")
+    except Exception as e:
+        return TrainResponse(
+            status="error",
+            message=str(e),
+            details={}
+        )
+
+@router.post("/train/online", response_model=TrainResponse)
+async def train_online(request: OnlineTrainRequest):
+    try:
+        classifier = registry.classifier
+        if not hasattr(classifier, "update_from_conversations"):
+            return TrainResponse(
+                status="error",
+                message="Online training needs INTENT_BACKEND=online",
+                details={}
+            )
+        
+        details = {}
+        if request.reset:
+            # Rebuild from intents.json without touching the served model
+            from utils.online_model import OnlineIntentClassifier
+            fresh = OnlineIntentClassifier()
+            details["reset"] = await run_cpu(fresh.bootstrap)
+            classifier = fresh
+        if request.examples:
+            details["examples"] = await run_cpu(classifier.update, [e.dict() for e in request.examples])
+        if request.from_logs:
+            details["conversations"] = await run_io(classifier.update_from_conversations)
+        
+        # Persist first so other workers pick the weights up, then swap locally
+        await run_io(classifier.save)
+        registry.swap("classifier", classifier)
+        details["model"] = classifier.stats()
         
         return TrainResponse(
             status="success",
-            message="Intent classifier trained successfully",
-            details=result
+            message="Online intent model updated",
+            details=details
         )
     except Exception as e:
         return TrainResponse(
@@ -37,17 +103,9 @@ async def train_model():
         )
 
 @router.post("/embed", response_model=TrainResponse)
-async def build_embeddings():
+async def build_embeddings(wait: bool = Query(default=False)):
     try:
-        store = EmbeddingStore()
-        result = store.build_index()
-        store.save()
-        
-        return TrainResponse(
-            status="success",
-            message="Embeddings built successfully",
-            details=result
-        )
+        return await submit_job("embed", wait, "Embeddings built successfully")
     except Exception as e:
         return TrainResponse(
             status="error",
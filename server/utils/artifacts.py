@@ -0,0 +1,84 @@
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+MODELS_DIR = BASE_DIR / "models"
+
+# Versions of each artifact kept on disk besides the current one
+ARTIFACT_KEEP = int(os.getenv("ARTIFACT_KEEP", "2"))
+POINTER_FILE = "CURRENT"
+
+# Layout: models/<kind>/<version>/... with models/<kind>/CURRENT naming the
+# live version. Builders write into a staging directory and publish() flips
+# the pointer with one atomic rename, so a reader sees either the old or the
+# new version in full. Without a pointer, kinds fall back to the flat
+# models/ directory used by older installs.
+
+def kind_dir(kind, root=None):
+    return Path(root or MODELS_DIR) / kind
+
+def artifact_dir(kind, root=None):
+    """Directory holding the live artifacts of one kind ("classifier", "store")"""
+    root = Path(root or MODELS_DIR)
+    try:
+        version = (kind_dir(kind, root) / POINTER_FILE).read_text().strip()
+    except FileNotFoundError:
+        return root
+    path = kind_dir(kind, root) / version
+    return path if path.is_dir() else root
+
+def staging_dir(kind, tag=None, root=None):
+    """Fresh private directory for a builder to write a new version into"""
+    path = kind_dir(kind, root) / f".staging-{tag or uuid.uuid4().hex[:8]}"
+    os.makedirs(path, exist_ok=False)
+    return path
+
+def publish(kind, staged, root=None):
+    """Promote a fully written staging directory to the live version"""
+    base = kind_dir(kind, root)
+    version = time.strftime("%Y%m%dT%H%M%S") + f"-{uuid.uuid4().hex[:6]}"
+    os.rename(staged, base / version)
+    tmp_pointer = base / f"{POINTER_FILE}.{os.getpid()}.tmp"
+    tmp_pointer.write_text(version)
+    os.replace(tmp_pointer, base / POINTER_FILE)
+    prune(kind, root)
+    print(f"[OK] Published {kind} artifacts version {version}")
+    return version
+
+def inherit(kind, staged, names=None, root=None):
+    """Copy files of the live version that a staged version does not write itself.
+
+    Lets a partial update (e.g. new online weights) publish a complete version.
+    The flat pre-versioning layout mixes kinds, so from there only the listed
+    names are copied.
+    """
+    live = artifact_dir(kind, root)
+    versioned = live.parent == kind_dir(kind, root)
+    staged = Path(staged)
+    copied = []
+    for path in live.iterdir() if live.is_dir() else ():
+        if not path.is_file() or (staged / path.name).exists():
+            continue
+        if (names is None and versioned) or (names is not None and path.name in names):
+            shutil.copy2(path, staged / path.name)
+            copied.append(path.name)
+    return copied
+
+def discard(staged):
+    shutil.rmtree(staged, ignore_errors=True)
+
+def versions(kind, root=None):
+    base = kind_dir(kind, root)
+    if not base.is_dir():
+        return []
+    return sorted(p.name for p in base.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+def prune(kind, root=None):
+    """Delete old versions beyond ARTIFACT_KEEP, never the live one"""
+    current = artifact_dir(kind, root).name
+    old = [v for v in versions(kind, root) if v != current]
+    for version in old[:max(0, len(old) - ARTIFACT_KEEP)]:
+        shutil.rmtree(kind_dir(kind, root) / version, ignore_errors=True)
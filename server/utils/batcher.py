@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+
+from utils.executors import run_cpu
+from utils.metrics import Histogram
+
+# Concurrent intent predictions are gathered for up to this long (or until
+# the batch is full) and scored as one matrix; a max batch of 1 disables it
+INTENT_BATCH_WINDOW_MS = float(os.getenv("INTENT_BATCH_WINDOW_MS", "2"))
+INTENT_BATCH_MAX = int(os.getenv("INTENT_BATCH_MAX", "64"))
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+class MicroBatcher:
+    """Coalesces concurrent calls into one batch function call on the cpu pool.
+
+    The collector takes the first waiting call, keeps gathering until the
+    window closes or the batch is full, then scores the whole batch while new
+    calls queue up behind it, so batches grow naturally with load.
+    batch_fn receives a list of argument tuples and returns one result each.
+    """
+
+    def __init__(self, name, batch_fn, max_batch=None, window_ms=None):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = INTENT_BATCH_MAX if max_batch is None else max_batch
+        self.window = (INTENT_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self._queue = None
+        self._task = None
+        self._loop = None
+        # Counters
+        self.items = 0
+        self.batches = 0
+        self.failed = 0
+        self.busy_s = 0.0
+        self.started_at = None
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+    @property
+    def enabled(self):
+        return self.max_batch > 1
+
+    def _ensure_started(self):
+        # Started lazily so the queue and task bind to the running server loop
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            self._task = loop.create_task(self._run())
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+
+    async def submit(self, *args):
+        if not self.enabled:
+            return (await run_cpu(self.batch_fn, [args]))[0]
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((args, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        start = time.perf_counter()
+        try:
+            results = await run_cpu(self.batch_fn, [args for args, _, _ in batch])
+        except Exception as e:
+            self.failed += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finished = time.perf_counter()
+        self.busy_s += finished - start
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes.observe(len(batch))
+        for (_, future, submitted), result in zip(batch, results):
+            self.latency_ms.observe((finished - submitted) * 1000)
+            if not future.done():
+                future.set_result(result)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {
+            "enabled": self.enabled,
+            "max_batch": self.max_batch,
+            "window_ms": self.window * 1000,
+            "items": self.items,
+            "batches": self.batches,
+            "failed": self.failed,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "throughput_per_s": round(self.items / elapsed, 2) if elapsed else 0.0,
+            "busy_throughput_per_s": round(self.items / self.busy_s, 2) if self.busy_s else 0.0,
+            "latency_ms": self.latency_ms.snapshot(),
+            "batch_size": self.batch_sizes.snapshot(),
+        }
+
+def predict_intents(items):
+    """Batch function for (classifier, text) pairs.
+
+    A registry hot swap can land mid-batch, so calls are grouped by the
+    classifier instance they were submitted with.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for i, (classifier, text) in enumerate(items):
+        groups.setdefault(id(classifier), (classifier, []))[1].append(i)
+    for classifier, indexes in groups.values():
+        predictions = classifier.predict_batch([items[i][1] for i in indexes])
+        for i, prediction in zip(indexes, predictions):
+            results[i] = prediction
+    return results
+
+intent_batcher = MicroBatcher("intent", predict_intents)
@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils.artifacts import artifact_dir
+
+COMPACT_MODEL_FILE = "intent_model.npz"
+COMPACT_FORMAT = 1
+# How often serving workers check for a model saved by another process
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "2"))
+
+def export_compact(vectorizer, classifier, intent_responses, model_dir=None):
+    """Write a fitted TF-IDF + logistic regression pair as plain arrays.
+
+    Only what inference needs is kept: the vocabulary, idf weights, the
+    linear layer and the tokenizer settings. Raises ValueError for
+    vectorizer options the NumPy scorer does not reproduce.
+    """
+    if model_dir is None:
+        model_dir = artifact_dir("classifier")
+    model_dir = Path(model_dir)
+    if vectorizer.analyzer != "word" or vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+        raise ValueError("Compact export supports the default word analyzer only")
+    if vectorizer.strip_accents or vectorizer.stop_words or vectorizer.norm not in ("l2", None):
+        raise ValueError("Compact export does not support accent stripping, stop words or non-l2 norms")
+
+    vocabulary = sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1])
+    terms = np.array([term for term, _ in vocabulary])
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms))
+
+    multi_class = getattr(classifier, "multi_class", "auto")
+    if classifier.coef_.shape[0] == 1:
+        link = "binary"
+    elif multi_class == "ovr" or (multi_class == "auto" and classifier.solver == "liblinear"):
+        link = "ovr"
+    else:
+        link = "softmax"
+
+    config = {
+        "format": COMPACT_FORMAT,
+        "token_pattern": vectorizer.token_pattern,
+        "lowercase": vectorizer.lowercase,
+        "ngram_range": list(vectorizer.ngram_range),
+        "sublinear_tf": vectorizer.sublinear_tf,
+        "norm": vectorizer.norm,
+        "link": link,
+        "intent_responses": intent_responses,
+    }
+    path = model_dir / COMPACT_MODEL_FILE
+    tmp_path = model_dir / (COMPACT_MODEL_FILE + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            terms=terms,
+            idf=np.asarray(idf, dtype=np.float64),
+            coef=np.asarray(classifier.coef_, dtype=np.float64),
+            intercept=np.asarray(classifier.intercept_, dtype=np.float64),
+            classes=np.asarray(classifier.classes_).astype(str),
+            config=np.array(json.dumps(config))
+        )
+    tmp_path.replace(path)
+    return path
+
+class CompactIntentModel:
+    """NumPy-only scorer for an exported intent model.
+
+    Mirrors IntentClassifier's inference API (predict, predict_batch, embed,
+    intent_responses, ready) without importing scikit-learn, so serving
+    workers start faster and skip the estimator call overhead.
+    """
+
+    def __init__(self):
+        self.intent_labels = []
+        self.intent_responses = {}
+        self.ready = False
+        self._source = None
+        self._checked = 0.0
+
+    def load(self, model_dir=None):
+        if model_dir is None:
+            model_dir = artifact_dir("classifier")
+        path = Path(model_dir) / COMPACT_MODEL_FILE
+        source = (path, path.stat().st_mtime_ns)
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            if config["format"] != COMPACT_FORMAT:
+                raise ValueError(f"Unsupported compact model format: {config['format']}")
+            terms = data["terms"].tolist()
+            self.idf = data["idf"]
+            # Transposed once so scoring is a single (n, vocab) @ (vocab, classes)
+            self.weights = np.ascontiguousarray(data["coef"].T)
+            self.intercept = data["intercept"]
+            self.classes = data["classes"]
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.token_re = re.compile(config["token_pattern"])
+        self.lowercase = config["lowercase"]
+        self.min_n, self.max_n = config["ngram_range"]
+        self.sublinear_tf = config["sublinear_tf"]
+        self.norm = config["norm"]
+        self.link = config["link"]
+        self.intent_responses = config["intent_responses"]
+        self.intent_labels = self.classes.tolist()
+        self._source = source
+        self.ready = True
+
+    def changed_on_disk(self, model_dir=None):
+        """True when a newer model was exported or published (checked every few seconds)"""
+        now = time.monotonic()
+        if now - self._checked < MODEL_RELOAD_INTERVAL:
+            return False
+        self._checked = now
+        if model_dir is None:
+            model_dir = artifact_dir("classifier")
+        path = Path(model_dir) / COMPACT_MODEL_FILE
+        try:
+            return (path, path.stat().st_mtime_ns) != self._source
+        except FileNotFoundError:
+            return False
+
+    def _ngrams(self, text):
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_re.findall(text)
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                yield " ".join(tokens[i:i + n])
+
+    def transform(self, texts):
+        """Dense TF-IDF rows, identical to the fitted TfidfVectorizer output"""
+        X = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float64)
+        vocabulary = self.vocabulary
+        for row, text in enumerate(texts):
+            for gram in self._ngrams(text):
+                column = vocabulary.get(gram)
+                if column is not None:
+                    X[row, column] += 1.0
+        if self.sublinear_tf:
+            present = X > 0
+            X[present] = np.log(X[present]) + 1.0
+        X *= self.idf
+        if self.norm == "l2":
+            norms = np.linalg.norm(X, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            X /= norms
+        return X
+
+    def predict_proba(self, texts):
+        scores = self.transform(texts) @ self.weights + self.intercept
+        if self.link == "binary":
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if self.link == "ovr":
+            proba = 1.0 / (1.0 + np.exp(-scores))
+            return proba / proba.sum(axis=1, keepdims=True)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        proba = self.predict_proba(texts)
+        best = proba.argmax(axis=1)
+        intents = self.classes[best]
+        confidences = proba[np.arange(len(texts)), best]
+
+        return [
+            {
+                "intent": intent,
+                "confidence": float(confidence),
+                "responses": self.intent_responses.get(intent, [])
+            }
+            for intent, confidence in zip(intents.tolist(), confidences)
+        ]
+
+    def embed(self, text):
+        return self.transform([text])[0]
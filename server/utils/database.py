@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import create_engine, delete, func, insert, make_url, select, update, and_, or_, Column, Index, Integer, String, Float, DateTime, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import base64
 import os
 from dotenv import load_dotenv
 
@@ -21,6 +22,41 @@ class Conversation(Base):
     sentiment = Column(String(50))
     response_type = Column(String(50))
     timestamp = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Session history pages and exports: filter by session, walk by time.
+        # id breaks timestamp ties so keyset cursors are exact.
+        Index('ix_conversations_session_timestamp', 'session_id', 'timestamp', 'id'),
+        # Date-range exports across all sessions
+        Index('ix_conversations_timestamp', 'timestamp', 'id'),
+    )
+
+# Analytics rollups: per-interval counters kept up to date as conversations
+# are written, so /api/stats never scans the conversations table
+ROLLUP_BUCKET_SECONDS = int(os.getenv('ROLLUP_BUCKET_SECONDS', '3600'))
+# Sentinel bucket holding all-time totals and sentinel session for all sessions
+ROLLUP_ALL_TIME = datetime(1970, 1, 1)
+ROLLUP_ALL_SESSIONS = ''
+# Marker row written in the same transaction as the backfill; outside every
+# range get_stats reads, and its count of 1 keeps it clear of cleanup
+ROLLUP_BACKFILL_MARK = datetime(1969, 1, 1)
+# Keys per upsert statement (keeps bound parameters under driver limits)
+ROLLUP_UPSERT_CHUNK = 500
+
+class ConversationRollup(Base):
+    __tablename__ = 'conversation_rollups'
+    
+    # Primary key order matches the lookups: one scope, then a bucket or bucket range
+    session_id = Column(String(255), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    intent = Column(String(100), primary_key=True)
+    sentiment = Column(String(50), primary_key=True)
+    response_type = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    confidence_count = Column(Integer, nullable=False, default=0)
+
+ROLLUP_KEY = ('session_id', 'bucket', 'intent', 'sentiment', 'response_type')
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
@@ -29,9 +65,51 @@ if not DATABASE_URL:
 engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional async engine (DB_ASYNC=1). Needs asyncpg (Postgres) or aiosqlite
+# (SQLite); without the driver everything falls back to the sync engine.
+DB_ASYNC = os.getenv('DB_ASYNC', '0') == '1'
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+_async_engine = None
+_async_engine_failed = False
+
+def _async_url():
+    url = make_url(os.getenv('DATABASE_ASYNC_URL') or DATABASE_URL)
+    connect_args = {}
+    backend = url.drivername.split('+')[0]
+    if backend in ASYNC_DRIVERS and '+' not in url.drivername:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if url.drivername == 'postgresql+asyncpg':
+        # asyncpg takes ssl as a connect argument, not libpq query params
+        if url.query.get('sslmode') in ('require', 'verify-ca', 'verify-full'):
+            connect_args['ssl'] = 'require'
+        url = url.difference_update_query(['sslmode', 'channel_binding'])
+    return url, connect_args
+
+def get_async_engine():
+    """Lazily create the async engine; returns None when disabled or unavailable"""
+    global _async_engine, _async_engine_failed
+    if not DB_ASYNC or _async_engine_failed:
+        return None
+    if _async_engine is None:
+        try:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            url, connect_args = _async_url()
+            _async_engine = create_async_engine(url, pool_pre_ping=True, pool_recycle=300, connect_args=connect_args)
+            print(f"[OK] Async database engine ready ({url.drivername})")
+        except Exception as e:
+            print(f"[WARN] Async database engine unavailable, using sync engine: {e}")
+            _async_engine_failed = True
+            return None
+    return _async_engine
+
 def init_db():
     try:
         Base.metadata.create_all(bind=engine)
+        # create_all skips indexes of tables that already exist
+        for index in Conversation.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+        backfill_rollups()
         print("[OK] NeonDB tables created/verified")
     except Exception as e:
         print(f"[ERROR] Database initialization failed: {e}")
@@ -50,6 +128,15 @@ def log_conversation(user_msg, bot_response, intent, confidence, sentiment, resp
             response_type=response_type
         )
         db.add(conv)
+        db.flush()
+        apply_rollups(db.connection(), [{
+            'session_id': session_id,
+            'intent': intent,
+            'confidence': confidence,
+            'sentiment': sentiment,
+            'response_type': response_type,
+            'timestamp': conv.timestamp
+        }])
         db.commit()
         print(f"[OK] Logged conversation to NeonDB for session: {session_id}")
     except Exception as e:
@@ -59,29 +146,237 @@ def log_conversation(user_msg, bot_response, intent, confidence, sentiment, resp
     finally:
         db.close()
 
+def bulk_insert_conversations(rows):
+    """Insert many conversation rows in one transaction (multi-row INSERT)"""
+    with engine.begin() as conn:
+        conn.execute(insert(Conversation), rows)
+        apply_rollups(conn, rows)
+    return len(rows)
+
+async def bulk_insert_conversations_async(rows):
+    async_engine = get_async_engine()
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(Conversation), rows)
+        await conn.run_sync(apply_rollups, rows)
+    return len(rows)
+
+def rollup_bucket(timestamp):
+    """Start of the ROLLUP_BUCKET_SECONDS interval containing a naive UTC timestamp"""
+    seconds = int((timestamp - ROLLUP_ALL_TIME).total_seconds())
+    return ROLLUP_ALL_TIME + timedelta(seconds=seconds - seconds % ROLLUP_BUCKET_SECONDS)
+
+def rollup_deltas(rows, deltas=None):
+    """Fold conversation rows into rollup counters.
+
+    Each row counts four times: in its interval and in the all-time totals,
+    both for its own session and for all sessions together.
+    """
+    deltas = {} if deltas is None else deltas
+    for row in rows:
+        timestamp = row.get('timestamp') or datetime.utcnow()
+        labels = (row.get('intent') or '', row.get('sentiment') or '', row.get('response_type') or '')
+        confidence = row.get('confidence')
+        for scope in (row.get('session_id') or 'default', ROLLUP_ALL_SESSIONS):
+            for bucket in (rollup_bucket(timestamp), ROLLUP_ALL_TIME):
+                totals = deltas.setdefault((scope, bucket) + labels, [0, 0.0, 0])
+                totals[0] += 1
+                if confidence is not None:
+                    totals[1] += confidence
+                    totals[2] += 1
+    return deltas
+
+def _upsert_rollups(conn, deltas):
+    """Add counters to the rollups, creating keys that do not exist yet"""
+    table = ConversationRollup.__table__
+    values = [dict(zip(ROLLUP_KEY, key), count=totals[0], confidence_sum=totals[1], confidence_count=totals[2])
+              for key, totals in deltas.items()]
+    dialect = conn.dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        # Generic path: update, insert when the key is new
+        for value in values:
+            key_filter = and_(*(table.c[column] == value[column] for column in ROLLUP_KEY))
+            result = conn.execute(update(table).where(key_filter).values(
+                count=table.c.count + value['count'],
+                confidence_sum=table.c.confidence_sum + value['confidence_sum'],
+                confidence_count=table.c.confidence_count + value['confidence_count']))
+            if not result.rowcount:
+                conn.execute(insert(table).values(**value))
+        return
+    
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    for start in range(0, len(values), ROLLUP_UPSERT_CHUNK):
+        statement = upsert(table).values(values[start:start + ROLLUP_UPSERT_CHUNK])
+        statement = statement.on_conflict_do_update(index_elements=list(ROLLUP_KEY), set_={
+            'count': table.c.count + statement.excluded.count,
+            'confidence_sum': table.c.confidence_sum + statement.excluded.confidence_sum,
+            'confidence_count': table.c.confidence_count + statement.excluded.confidence_count,
+        })
+        conn.execute(statement)
+
+def apply_rollups(conn, rows):
+    """Add freshly inserted conversation rows to the rollups, in the caller's transaction"""
+    if rows:
+        _upsert_rollups(conn, rollup_deltas(rows))
+
+def _claim_backfill(conn):
+    """Insert the backfill marker; False if another worker already has"""
+    table = ConversationRollup.__table__
+    marker = dict(session_id=ROLLUP_ALL_SESSIONS, bucket=ROLLUP_BACKFILL_MARK, intent='', sentiment='',
+                  response_type='', count=1, confidence_sum=0.0, confidence_count=0)
+    dialect = conn.dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        if conn.execute(select(table.c.count).where(table.c.bucket == ROLLUP_BACKFILL_MARK)).first() is not None:
+            return False
+        conn.execute(insert(table).values(**marker))
+        return True
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    result = conn.execute(upsert(table).values(**marker).on_conflict_do_nothing(index_elements=list(ROLLUP_KEY)))
+    return result.rowcount == 1
+
+def backfill_rollups(batch_size=5000):
+    """Build rollups from existing conversations when the rollup table is empty.
+
+    The emptiness check and the scan read one snapshot, bounded by the
+    highest id seen first. Every conversation written since rollups exist
+    commits its rollup with it, so a snapshot with no rollups holds only
+    rows nobody has counted. The totals are then added to whatever the
+    writer has upserted meanwhile, in the transaction that claims the
+    backfill marker, so concurrent workers never apply it twice.
+    """
+    columns = (Conversation.session_id, Conversation.intent, Conversation.confidence,
+               Conversation.sentiment, Conversation.response_type, Conversation.timestamp)
+    deltas = {}
+    total = 0
+    with engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn = conn.execution_options(isolation_level='REPEATABLE READ')
+        with conn.begin():
+            max_id = conn.execute(select(func.max(Conversation.id))).scalar()
+            if max_id is None:
+                return 0
+            if conn.execute(select(ConversationRollup.count).limit(1)).first() is not None:
+                return 0
+            query = select(*columns).where(Conversation.id <= max_id)
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            for batch in result.mappings().partitions(batch_size):
+                rollup_deltas(batch, deltas)
+                total += len(batch)
+    with engine.begin() as conn:
+        if not _claim_backfill(conn):
+            return 0
+        _upsert_rollups(conn, deltas)
+    print(f"[OK] Backfilled analytics rollups from {total} conversations")
+    return total
+
+# Only the columns the history API returns; no ORM objects are built
+HISTORY_COLUMNS = (
+    Conversation.id,
+    Conversation.session_id,
+    Conversation.user_message,
+    Conversation.bot_response,
+    Conversation.intent,
+    Conversation.confidence,
+    Conversation.sentiment,
+    Conversation.response_type,
+    Conversation.timestamp,
+)
+
+def encode_cursor(timestamp, row_id):
+    """Opaque keyset position: the (timestamp, id) of the last row returned"""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _history_row(row):
+    return {
+        'id': row.id,
+        'session_id': row.session_id,
+        'user_message': row.user_message,
+        'bot_response': row.bot_response,
+        'intent': row.intent,
+        'confidence': row.confidence,
+        'sentiment': row.sentiment,
+        'response_type': row.response_type,
+        'timestamp': row.timestamp.isoformat()
+    }
+
+def get_history_page(session_id='default', limit=50, before=None):
+    """Newest `limit` turns older than the `before` cursor, returned oldest first.
+
+    Returns (rows, next_cursor); next_cursor is None on the oldest page.
+    Served by the (session_id, timestamp, id) index, so every page costs the
+    same however far back it is.
+    """
+    query = select(*HISTORY_COLUMNS).where(Conversation.session_id == session_id)
+    if before:
+        timestamp, row_id = decode_cursor(before)
+        query = query.where(or_(
+            Conversation.timestamp < timestamp,
+            and_(Conversation.timestamp == timestamp, Conversation.id < row_id)
+        ))
+    query = query.order_by(Conversation.timestamp.desc(), Conversation.id.desc()).limit(limit + 1)
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return [_history_row(row) for row in reversed(rows)], next_cursor
+
 def get_chat_history(session_id='default', limit=50):
-    db = SessionLocal()
     try:
-        conversations = db.query(Conversation).filter(
-            Conversation.session_id == session_id
-        ).order_by(Conversation.timestamp.desc()).limit(limit).all()
-        
-        result = [{
-            'id': conv.id,
-            'user_message': conv.user_message,
-            'bot_response': conv.bot_response,
-            'intent': conv.intent,
-            'confidence': conv.confidence,
-            'sentiment': conv.sentiment,
-            'response_type': conv.response_type,
-            'timestamp': conv.timestamp.isoformat()
-        } for conv in reversed(conversations)]
-        
+        result, _ = get_history_page(session_id, limit)
         print(f"[OK] Retrieved {len(result)} conversations from NeonDB for session: {session_id}")
         return result
     except Exception as e:
         print(f"[ERROR] History fetch from NeonDB failed: {e}")
         return []
+
+def get_export_page(session_id=None, start=None, end=None, after=None, limit=1000):
+    """One batch of an export in (timestamp, id) order; returns (rows, next_cursor)"""
+    # Timestamps are stored as naive UTC; compare aware bounds in the same terms
+    start, end = _naive_utc(start), _naive_utc(end)
+    query = select(*HISTORY_COLUMNS)
+    if session_id is not None:
+        query = query.where(Conversation.session_id == session_id)
+    if start is not None:
+        query = query.where(Conversation.timestamp >= start)
+    if end is not None:
+        query = query.where(Conversation.timestamp < end)
+    if after:
+        timestamp, row_id = decode_cursor(after)
+        query = query.where(or_(
+            Conversation.timestamp > timestamp,
+            and_(Conversation.timestamp == timestamp, Conversation.id > row_id)
+        ))
+    query = query.order_by(Conversation.timestamp, Conversation.id).limit(limit)
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if len(rows) == limit else None
+    return [_history_row(row) for row in rows], next_cursor
+
+def get_labelled_conversations(after_id=0, min_confidence=0.9, limit=1000):
+    """Confidently classified user messages logged after a given row id, oldest first"""
+    db = SessionLocal()
+    try:
+        rows = db.query(Conversation.id, Conversation.user_message, Conversation.intent).filter(
+            Conversation.id > after_id,
+            Conversation.intent.isnot(None),
+            Conversation.confidence >= min_confidence
+        ).order_by(Conversation.id).limit(limit).all()
+        return [{'id': row[0], 'user_message': row[1], 'intent': row[2]} for row in rows]
     finally:
         db.close()
 
@@ -90,6 +385,7 @@ def clear_conversation_history(session_id='default'):
     try:
         count = db.query(Conversation).filter(Conversation.session_id == session_id).count()
         db.query(Conversation).filter(Conversation.session_id == session_id).delete()
+        _remove_session_rollups(db.connection(), session_id)
         db.commit()
         print(f"[OK] Cleared {count} conversations for session: {session_id}")
         return count
@@ -100,33 +396,71 @@ def clear_conversation_history(session_id='default'):
     finally:
         db.close()
 
-def get_stats():
-    db = SessionLocal()
+def _remove_session_rollups(conn, session_id):
+    """Take a cleared session's counts back out of the all-sessions rollups"""
+    table = ConversationRollup.__table__
+    rows = conn.execute(select(table).where(table.c.session_id == session_id)).mappings().all()
+    for row in rows:
+        key_filter = and_(table.c.session_id == ROLLUP_ALL_SESSIONS,
+                          *(table.c[column] == row[column] for column in ROLLUP_KEY[1:]))
+        conn.execute(update(table).where(key_filter).values(
+            count=table.c.count - row['count'],
+            confidence_sum=table.c.confidence_sum - row['confidence_sum'],
+            confidence_count=table.c.confidence_count - row['confidence_count']))
+    conn.execute(delete(table).where(table.c.session_id == session_id))
+    conn.execute(delete(table).where(table.c.session_id == ROLLUP_ALL_SESSIONS, table.c.count <= 0))
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def get_stats(session_id=None, start=None, end=None):
+    """Dashboard aggregates read from the rollups.
+
+    Without a time range only the all-time rows are read, so the cost does
+    not depend on how many conversations exist. Ranges are resolved to
+    whole ROLLUP_BUCKET_SECONDS intervals.
+    """
+    table = ConversationRollup.__table__
+    start, end = _naive_utc(start), _naive_utc(end)
     try:
-        total = db.query(Conversation).count()
+        query = select(
+            table.c.intent, table.c.sentiment, table.c.response_type,
+            func.sum(table.c.count), func.sum(table.c.confidence_sum), func.sum(table.c.confidence_count)
+        ).where(table.c.session_id == (session_id or ROLLUP_ALL_SESSIONS))
+        if start is None and end is None:
+            query = query.where(table.c.bucket == ROLLUP_ALL_TIME)
+        else:
+            query = query.where(table.c.bucket > ROLLUP_ALL_TIME)
+            if start is not None:
+                query = query.where(table.c.bucket >= rollup_bucket(start))
+            if end is not None:
+                query = query.where(table.c.bucket < end)
+        query = query.group_by(table.c.intent, table.c.sentiment, table.c.response_type)
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
         
-        from sqlalchemy import text
-        
-        intents = db.execute(
-            text("SELECT intent, COUNT(*) as count FROM conversations WHERE intent IS NOT NULL GROUP BY intent ORDER BY count DESC LIMIT 5")
-        ).fetchall()
-        
-        sentiments = db.execute(
-            text("SELECT sentiment, COUNT(*) as count FROM conversations WHERE sentiment IS NOT NULL GROUP BY sentiment")
-        ).fetchall()
-        
-        avg_conf = db.execute(
-            text("SELECT AVG(confidence) FROM conversations WHERE confidence IS NOT NULL")
-        ).scalar() or 0
+        total = 0
+        confidence_sum = 0.0
+        confidence_count = 0
+        intents, sentiments, response_types = {}, {}, {}
+        for intent, sentiment, response_type, count, conf_sum, conf_count in rows:
+            total += count
+            confidence_sum += conf_sum or 0.0
+            confidence_count += conf_count or 0
+            for counts, label in ((intents, intent), (sentiments, sentiment), (response_types, response_type)):
+                if label:
+                    counts[label] = counts.get(label, 0) + count
         
+        top_intents = sorted(intents.items(), key=lambda item: item[1], reverse=True)[:5]
         return {
             "total_conversations": total,
-            "top_intents": [{"intent": i[0], "count": i[1]} for i in intents],
-            "sentiment_distribution": [{"sentiment": s[0], "count": s[1]} for s in sentiments],
-            "average_confidence": round(float(avg_conf), 2)
+            "top_intents": [{"intent": i, "count": c} for i, c in top_intents],
+            "sentiment_distribution": [{"sentiment": s, "count": c} for s, c in sentiments.items()],
+            "response_types": [{"response_type": r, "count": c} for r, c in sorted(response_types.items(), key=lambda item: item[1], reverse=True)],
+            "average_confidence": round(confidence_sum / confidence_count, 2) if confidence_count else 0
         }
     except Exception as e:
         print(f"[ERROR] Stats fetch from NeonDB failed: {e}")
-        return {"total_conversations": 0, "top_intents": [], "sentiment_distribution": [], "average_confidence": 0}
-    finally:
-        db.close()
+        return {"total_conversations": 0, "top_intents": [], "sentiment_distribution": [], "response_types": [], "average_confidence": 0}
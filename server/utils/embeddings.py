@@ -1,59 +1,616 @@
 import os
+import re
+import math
 import pickle
+import hashlib
+import heapq
+import threading
+from collections import Counter
 from pathlib import Path
+import numpy as np
+
+from utils.artifacts import artifact_dir
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 KB_DIR = BASE_DIR / "data" / "knowledge_base"
+PDF_CONTENT_DIR = BASE_DIR / "data" / "pdf_content"
 MODELS_DIR = BASE_DIR / "models"
 
+INDEX_FORMAT = 4
+SEGMENTS_DIR = "segments"
+
+# Passage chunking: documents are split into overlapping word windows so
+# retrieval returns a few paragraphs instead of whole files
+CHUNK_WORDS = int(os.getenv("RAG_CHUNK_WORDS", "120"))
+CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "30"))
+# Approximate token budget for retrieved context sent to the LLM
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "600"))
+
+# Retrieval mode: "bm25" (keyword), "dense" (LSA vectors) or "hybrid" (both,
+# fused by reciprocal rank)
+RETRIEVAL_MODE = os.getenv("RAG_MODE", "bm25")
+DENSE_DIM = int(os.getenv("RAG_DENSE_DIM", "128"))
+RRF_K = 60
+
+# BM25 parameters (Robertson/Sparck Jones defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\b\w\w+\b")
+WORD_PATTERN = re.compile(r"\S+")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def estimate_tokens(text):
+    """Rough LLM token count (~4 characters per token)"""
+    return (len(text) + 3) // 4
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def chunk_text(text, source, chunk_words=None, overlap=None):
+    """Split text into overlapping word windows with character offsets"""
+    if chunk_words is None:
+        chunk_words = CHUNK_WORDS
+    if overlap is None:
+        overlap = CHUNK_OVERLAP
+    step = max(1, chunk_words - overlap)
+
+    words = [m.span() for m in WORD_PATTERN.finditer(text)]
+    passages = []
+    for start in range(0, len(words), step):
+        window = words[start:start + chunk_words]
+        char_start, char_end = window[0][0], window[-1][1]
+        passages.append({
+            "source": source,
+            "chunk": len(passages),
+            "start": char_start,
+            "end": char_end,
+            "text": text[char_start:char_end],
+        })
+        if start + chunk_words >= len(words):
+            break
+    return passages
+
 class EmbeddingStore:
-    def __init__(self):
-        self.documents = []
-        
+    def __init__(self, mode=None):
+        self.mode = mode or RETRIEVAL_MODE
+        # filename -> {"filename", "hash", "length", "passage_ids"}
+        self.documents = {}
+        # Retrieval units: {"source", "chunk", "start", "end", "text"};
+        # deleted passages are tombstoned as None until the next compaction
+        self.passages = []
+        self.deleted = set()
+        # term -> list of (passage_id, term_frequency)
+        self.postings = {}
+        self.doc_lengths = []
+        self.total_length = 0
+        # Dense retrieval: TF-IDF + SVD (LSA) encoder and L2-normalized
+        # float32 passage vectors, one row per passage. `vectors` is the
+        # (memory-mapped) base matrix, `extra_vectors` holds rows appended
+        # since the last full save.
+        self.encoder = None
+        self.vectors = None
+        self.extra_vectors = []
+        # Segment log bookkeeping for incremental updates
+        self.last_segment = 0
+        self._base_mtime = None
+        self._base_dir = None
+        self._lock = threading.RLock()
+        # Bumped on every change to the document set; see fingerprint
+        self.revision = 0
+        self._fingerprint = (None, "")
+
+    @property
+    def fingerprint(self):
+        """Content fingerprint of the indexed document set (stable across workers)"""
+        revision, value = self._fingerprint
+        if revision != self.revision:
+            digest = hashlib.sha256(self.mode.encode('utf-8'))
+            for filename in sorted(self.documents):
+                digest.update(f"{filename}:{self.documents[filename]['hash']}\n".encode('utf-8'))
+            value = digest.hexdigest()[:16]
+            self._fingerprint = (self.revision, value)
+        return value
+
+    @property
+    def avg_doc_length(self):
+        live = len(self.passages) - len(self.deleted)
+        return (self.total_length / live) if live else 0.0
+
     def load_knowledge_base(self, kb_dir=None):
         if kb_dir is None:
             kb_dir = KB_DIR
         docs = []
         if os.path.exists(kb_dir):
-            for filename in os.listdir(kb_dir):
+            for filename in sorted(os.listdir(kb_dir)):
                 if filename.endswith('.txt'):
                     with open(os.path.join(kb_dir, filename), 'r', encoding='utf-8') as f:
                         content = f.read()
                         docs.append({"filename": filename, "content": content})
         return docs
-    
+
     def build_index(self, kb_dir=None):
         if kb_dir is None:
             kb_dir = KB_DIR
-        self.documents = self.load_knowledge_base(kb_dir)
-        return {"status": "indexed", "documents": len(self.documents)}
-    
-    def search(self, query, top_k=2):
-        # Simple keyword search fallback
+        return self.build_combined_index([kb_dir])
+
+    def build_combined_index(self, dirs, progress=None):
+        """Full rebuild over every .txt file in the given directories"""
+        progress = progress or (lambda fraction, message: None)
+        progress(0.05, "Reading documents")
+        docs = []
+        for kb_dir in dirs:
+            docs.extend(self.load_knowledge_base(kb_dir))
+        with self._lock:
+            progress(0.2, f"Chunking {len(docs)} documents")
+            self._chunk_documents(docs)
+            progress(0.4, f"Indexing {len(self.passages)} passages")
+            self._index_passages()
+            if self.mode != "bm25":
+                progress(0.6, "Fitting dense encoder")
+                self._build_dense()
+        return self.info(status="indexed")
+
+    def info(self, status="ok"):
+        return {
+            "status": status,
+            "mode": self.mode,
+            "documents": len(self.documents),
+            "passages": len(self.passages) - len(self.deleted),
+            "terms": len(self.postings),
+            "dense_dim": 0 if self.vectors is None else int(self.vectors.shape[1])
+        }
+
+    def _chunk_documents(self, docs):
+        self.revision += 1
+        self.documents = {}
+        self.passages = []
+        self.deleted = set()
+        for doc in docs:
+            passages = chunk_text(doc['content'], doc['filename'])
+            start = len(self.passages)
+            self.documents[doc['filename']] = {
+                "filename": doc['filename'],
+                "hash": content_hash(doc['content']),
+                "length": len(doc['content']),
+                "passage_ids": list(range(start, start + len(passages)))
+            }
+            self.passages.extend(passages)
+
+    def _index_passages(self):
+        """Build the BM25 inverted index over self.passages"""
+        self.postings = {}
+        self.doc_lengths = []
+        self.total_length = 0
+        for passage in self.passages:
+            self._index_passage(passage)
+
+    def _index_passage(self, passage):
+        doc_id = len(self.doc_lengths)
+        tokens = tokenize(passage['text'])
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, []).append((doc_id, tf))
+
+    def _build_dense(self):
+        """Fit the LSA encoder and embed every passage into a float32 matrix"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+
+        self.encoder = None
+        self.vectors = None
+        self.extra_vectors = []
+        texts = [p['text'] for p in self.passages]
+        if len(texts) < 2:
+            return
+
+        vectorizer = TfidfVectorizer(sublinear_tf=True, ngram_range=(1, 2), max_features=50000)
+        X = vectorizer.fit_transform(texts)
+        n_components = min(DENSE_DIM, X.shape[0] - 1, X.shape[1] - 1)
+        if n_components < 1:
+            return
+
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+        self.encoder = {"vectorizer": vectorizer, "svd": svd}
+        self.vectors = self._normalize(svd.fit_transform(X))
+
+    @staticmethod
+    def _normalize(matrix):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def encode(self, texts):
+        """Embed texts into the passage vector space"""
+        X = self.encoder["vectorizer"].transform(texts)
+        return self._normalize(self.encoder["svd"].transform(X))
+
+    def _dense_rank(self, query, limit):
+        """Exact cosine top-k over the passage matrix"""
+        q = self.encode([query])[0]
+        scores = np.concatenate([self.vectors @ q] + [block @ q for block in self.extra_vectors])
+        if self.deleted:
+            scores[np.fromiter(self.deleted, dtype=np.int64)] = -np.inf
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def _bm25_rank(self, query, limit):
+        """Top `limit` passages by BM25; a bounded heap, not a sort of every match"""
+        scores = self._score(query)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def _rank(self, query, limit):
+        if self.mode == "bm25" or self.vectors is None or not len(self.vectors):
+            return self._bm25_rank(query, limit)
+        if self.mode == "dense":
+            return self._dense_rank(query, limit)
+
+        # Hybrid: reciprocal rank fusion of the keyword and dense rankings
+        fused = {}
+        for ranking in (self._bm25_rank(query, limit), self._dense_rank(query, limit)):
+            for rank, (doc_id, _) in enumerate(ranking):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+    def _score(self, query):
+        """Accumulate BM25 scores for every passage sharing a term with the query"""
+        n_docs = len(self.passages) - len(self.deleted)
+        avg_doc_length = self.avg_doc_length
+        scores = {}
+        if not n_docs or not avg_doc_length:
+            return scores
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avg_doc_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search_passages(self, query, top_k=5, token_budget=None):
+        """Return the best-scoring passages, optionally capped by a token budget"""
+        ranked = self._rank(query, max(top_k * 4, 20))
+
         results = []
-        query_lower = query.lower()
-        
-        for doc in self.documents:
-            content = doc['content'].lower()
-            if any(word in content for word in query_lower.split()):
-                results.append(doc['content'])
-                if len(results) >= top_k:
-                    break
-        
-        return results[:top_k]
-    
+        used_tokens = 0
+        for doc_id, score in ranked:
+            passage = self.passages[doc_id]
+            if passage is None:
+                continue
+            tokens = estimate_tokens(passage['text'])
+            if token_budget is not None and used_tokens + tokens > token_budget:
+                continue
+            results.append(dict(passage, id=doc_id, score=round(score, 4), tokens=tokens))
+            used_tokens += tokens
+            if len(results) >= top_k:
+                break
+        return results
+
+    def search(self, query, top_k=2):
+        return [p['text'] for p in self.search_passages(query, top_k)]
+
+    def retrieve_passages(self, query, top_k=5, token_budget=None, refresh=False):
+        """Top passages within the retrieval token budget, for the prompt builder"""
+        if refresh:
+            self.reload_if_changed()
+        if token_budget is None:
+            token_budget = CONTEXT_TOKEN_BUDGET
+        return [dict(p, kind="knowledge") for p in self.search_passages(query, top_k, token_budget)]
+
+    def retrieve_context(self, query, top_k=5, token_budget=None, refresh=False):
+        """Join the top passages into a prompt-ready context string"""
+        passages = self.retrieve_passages(query, top_k, token_budget, refresh)
+        return "\n\n".join(f"[{p['source']}]\n{p['text']}" for p in passages)
+
+    # ---- Incremental updates -------------------------------------------------
+
+    def add_document(self, filename, content, save_dir=None, persist=True):
+        """Index a single document into the existing postings/vectors.
+
+        Unchanged content (same hash) is skipped; changed content replaces the
+        previous version. With persist=True the change is appended to the
+        on-disk segment log so other workers can pick it up.
+        """
+        digest = content_hash(content)
+        with self._lock:
+            if persist:
+                self._catch_up(save_dir)
+            existing = self.documents.get(filename)
+            if existing and existing['hash'] == digest:
+                return {"status": "unchanged", "filename": filename, "passages": len(existing['passage_ids'])}
+
+            if existing:
+                self._remove_document(filename)
+                if persist:
+                    self._write_segment({"op": "delete", "filename": filename}, save_dir)
+
+            passages = chunk_text(content, filename)
+            vectors = self.encode([p['text'] for p in passages]) if (self.encoder and passages) else None
+            document = {"filename": filename, "hash": digest, "length": len(content)}
+            self._append_document(document, passages, vectors)
+            if persist:
+                self._write_segment({"op": "add", "document": document, "passages": passages, "vectors": vectors}, save_dir)
+
+        return {"status": "replaced" if existing else "added", "filename": filename, "passages": len(passages)}
+
+    def find_document(self, content):
+        """Filename already indexed with exactly this content, if any"""
+        digest = content_hash(content)
+        for filename, document in self.documents.items():
+            if document['hash'] == digest:
+                return filename
+        return None
+
+    def delete_document(self, filename, save_dir=None, persist=True):
+        with self._lock:
+            if persist:
+                self._catch_up(save_dir)
+            if filename not in self.documents:
+                return {"status": "missing", "filename": filename}
+            removed = self._remove_document(filename)
+            if persist:
+                self._write_segment({"op": "delete", "filename": filename}, save_dir)
+        return {"status": "deleted", "filename": filename, "passages": removed}
+
+    def sync_dirs(self, dirs, save_dir=None):
+        """Incrementally bring the index in line with the files in dirs"""
+        seen = set()
+        counts = {"added": 0, "replaced": 0, "unchanged": 0, "deleted": 0}
+        for kb_dir in dirs:
+            for doc in self.load_knowledge_base(kb_dir):
+                seen.add(doc['filename'])
+                counts[self.add_document(doc['filename'], doc['content'], save_dir)['status']] += 1
+        for filename in list(self.documents):
+            if filename not in seen:
+                self.delete_document(filename, save_dir)
+                counts["deleted"] += 1
+        return counts
+
+    def _append_document(self, document, passages, vectors):
+        self.revision += 1
+        start = len(self.passages)
+        for passage in passages:
+            self.passages.append(passage)
+            self._index_passage(passage)
+        if self.encoder is not None and passages:
+            # Keep one vector row per passage even if the writer had no encoder
+            if vectors is None:
+                vectors = self.encode([p['text'] for p in passages])
+            self.extra_vectors.append(vectors)
+        self.documents[document['filename']] = dict(document, passage_ids=list(range(start, len(self.passages))))
+
+    def _remove_document(self, filename):
+        self.revision += 1
+        document = self.documents.pop(filename)
+        ids = set(document['passage_ids'])
+        terms = set()
+        for doc_id in ids:
+            terms.update(tokenize(self.passages[doc_id]['text']))
+            self.total_length -= self.doc_lengths[doc_id]
+            self.passages[doc_id] = None
+        for term in terms:
+            # Rebind instead of mutating so concurrent readers see a whole list
+            remaining = [entry for entry in self.postings.get(term, []) if entry[0] not in ids]
+            if remaining:
+                self.postings[term] = remaining
+            else:
+                self.postings.pop(term, None)
+        self.deleted |= ids
+        return len(ids)
+
+    def _segment_names(self, save_dir):
+        seg_dir = save_dir / SEGMENTS_DIR
+        if not seg_dir.exists():
+            return []
+        return sorted(f for f in os.listdir(seg_dir) if f.endswith('.pkl'))
+
+    def _write_segment(self, record, save_dir=None):
+        save_dir = Path(save_dir or artifact_dir("store"))
+        if not (save_dir / "documents.pkl").exists():
+            # No base snapshot to append to yet: write one instead
+            self.save(save_dir)
+            return
+        seg_dir = save_dir / SEGMENTS_DIR
+        os.makedirs(seg_dir, exist_ok=True)
+        self._replay_segments(save_dir)
+        names = self._segment_names(save_dir)
+        seq = max([self.last_segment] + [int(n[:-4]) for n in names]) + 1
+        while True:
+            try:
+                # Exclusive create: concurrent writers never share a number
+                with open(seg_dir / f"{seq:08d}.pkl", 'xb') as f:
+                    pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+                break
+            except FileExistsError:
+                seq += 1
+        # Only advance past segments this store has applied: a gap means
+        # another worker's segment is still unread (or half written), and
+        # marking it applied would let the next save() delete it unseen
+        if seq == self.last_segment + 1:
+            self.last_segment = seq
+
+    def _catch_up(self, save_dir=None):
+        """Apply other workers' segments so a local change lands after them"""
+        save_dir = Path(save_dir or artifact_dir("store"))
+        if (save_dir / "documents.pkl").exists():
+            self._replay_segments(save_dir)
+
+    def _apply_segment(self, record):
+        if record["op"] == "add":
+            if record["document"]["filename"] in self.documents:
+                self._remove_document(record["document"]["filename"])
+            self._append_document(record["document"], record["passages"], record["vectors"])
+        elif record["op"] == "delete" and record["filename"] in self.documents:
+            self._remove_document(record["filename"])
+
+    def _replay_segments(self, save_dir):
+        applied = 0
+        for name in self._segment_names(save_dir):
+            seq = int(name[:-4])
+            if seq <= self.last_segment:
+                continue
+            try:
+                with open(save_dir / SEGMENTS_DIR / name, 'rb') as f:
+                    record = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                # Segment still being written by another worker
+                break
+            self._apply_segment(record)
+            self.last_segment = seq
+            applied += 1
+        return applied
+
+    def reload_if_changed(self, save_dir=None):
+        """Pick up a new base snapshot or new segments written by other workers"""
+        save_dir = Path(save_dir or artifact_dir("store"))
+        try:
+            mtime = (save_dir / "documents.pkl").stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        # A newly published version lives in a different directory
+        if mtime != self._base_mtime or save_dir != self._base_dir:
+            self.load(save_dir)
+            return True
+        with self._lock:
+            return self._replay_segments(save_dir) > 0
+
+    # ---- Persistence ---------------------------------------------------------
+
+    def _compact(self):
+        """Drop tombstoned passages and merge appended vector blocks"""
+        if not self.deleted and not self.extra_vectors:
+            return
+        live = [i for i, p in enumerate(self.passages) if p is not None]
+        remap = {old: new for new, old in enumerate(live)}
+        if self.vectors is not None:
+            matrix = np.concatenate([np.asarray(self.vectors)] + self.extra_vectors)
+            self.vectors = np.ascontiguousarray(matrix[live])
+        self.extra_vectors = []
+        self.passages = [self.passages[i] for i in live]
+        self.deleted = set()
+        for document in self.documents.values():
+            document['passage_ids'] = [remap[i] for i in document['passage_ids']]
+        self._index_passages()
+
     def save(self, save_dir=None):
         if save_dir is None:
-            save_dir = MODELS_DIR
+            save_dir = artifact_dir("store")
+        save_dir = Path(save_dir)
         os.makedirs(save_dir, exist_ok=True)
-        with open(save_dir / "documents.pkl", 'wb') as f:
-            pickle.dump(self.documents, f)
-    
+        with self._lock:
+            self._compact()
+            index = {
+                "format": INDEX_FORMAT,
+                "mode": self.mode,
+                "documents": self.documents,
+                "passages": self.passages,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+                "total_length": self.total_length,
+                "last_segment": self.last_segment,
+            }
+
+            # Vectors live in a plain .npy so every worker can memory-map one copy.
+            # Both files are written aside and renamed into place: writing over
+            # vectors.npy would truncate the file this and other workers have mapped
+            if self.vectors is not None:
+                import joblib
+                tmp_vectors = save_dir / "vectors.npy.tmp"
+                with open(tmp_vectors, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+                tmp_encoder = save_dir / "dense_encoder.pkl.tmp"
+                joblib.dump(self.encoder, tmp_encoder)
+                os.replace(tmp_vectors, save_dir / "vectors.npy")
+                os.replace(tmp_encoder, save_dir / "dense_encoder.pkl")
+            else:
+                for name in ("vectors.npy", "dense_encoder.pkl"):
+                    if (save_dir / name).exists():
+                        os.remove(save_dir / name)
+
+            tmp_path = save_dir / "documents.pkl.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, save_dir / "documents.pkl")
+            self._base_mtime = (save_dir / "documents.pkl").stat().st_mtime_ns
+            self._base_dir = save_dir
+
+            # Segments up to last_segment are now part of the base snapshot
+            for name in self._segment_names(save_dir):
+                if int(name[:-4]) <= self.last_segment:
+                    os.remove(save_dir / SEGMENTS_DIR / name)
+
     def load(self, save_dir=None):
         if save_dir is None:
-            save_dir = MODELS_DIR
-        try:
-            with open(save_dir / "documents.pkl", 'rb') as f:
-                self.documents = pickle.load(f)
-        except FileNotFoundError:
-            self.documents = []
\ No newline at end of file
+            save_dir = artifact_dir("store")
+        save_dir = Path(save_dir)
+        with self._lock:
+            try:
+                mtime = (save_dir / "documents.pkl").stat().st_mtime_ns
+                with open(save_dir / "documents.pkl", 'rb') as f:
+                    index = pickle.load(f)
+            except FileNotFoundError:
+                self._chunk_documents([])
+                self._index_passages()
+                return
+
+            if isinstance(index, list) or index.get("format", 0) < 3:
+                # Legacy formats stored whole documents: re-chunk and re-index them
+                docs = index if isinstance(index, list) else index["documents"]
+                self._chunk_documents(docs)
+                self._index_passages()
+                if self.mode != "bm25":
+                    self._build_dense()
+                self._base_mtime = mtime
+                self._base_dir = save_dir
+                return
+            if index["format"] < INDEX_FORMAT:
+                raise ValueError("Index format is outdated, rebuild it with /api/embed")
+
+            self.revision += 1
+            self.documents = index["documents"]
+            self.passages = index["passages"]
+            self.deleted = set()
+            self.postings = index["postings"]
+            self.doc_lengths = index["doc_lengths"]
+            self.total_length = index["total_length"]
+            self.last_segment = index["last_segment"]
+            self._load_dense(save_dir)
+            self._base_mtime = mtime
+            self._base_dir = save_dir
+            self._replay_segments(save_dir)
+
+    def _load_dense(self, save_dir):
+        self.encoder = None
+        self.vectors = None
+        self.extra_vectors = []
+        if self.mode == "bm25":
+            return
+        vectors_path = save_dir / "vectors.npy"
+        encoder_path = save_dir / "dense_encoder.pkl"
+        if not vectors_path.exists() or not encoder_path.exists():
+            print(f"[WARN] Dense index missing in {save_dir}, falling back to BM25")
+            return
+        import joblib
+        self.encoder = joblib.load(encoder_path)
+        self.vectors = np.load(vectors_path, mmap_mode='r')
+
+def build_and_save_index(dirs=None, save_dir=None, progress=None):
+    """Full index rebuild; top-level so it can run in a worker process"""
+    if dirs is None:
+        dirs = [KB_DIR, PDF_CONTENT_DIR]
+    store = EmbeddingStore()
+    result = store.build_combined_index(dirs, progress)
+    if progress:
+        progress(0.9, "Writing index")
+    store.save(save_dir)
+    return result
@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Execution model for blocking work called from async routes:
+#   io      - threads for DB sessions and file I/O
+#   cpu     - threads for short CPU work (sklearn predict, TextBlob)
+#   process - separate processes for PDF parsing and model training
+IO_WORKERS = int(os.getenv("IO_POOL_WORKERS", "8"))
+CPU_WORKERS = int(os.getenv("CPU_POOL_WORKERS", "4"))
+PROCESS_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Tasks allowed to wait inside each pool beyond its workers; further callers
+# wait on the event loop (without holding a thread) until a slot frees up
+POOL_QUEUE_LIMIT = int(os.getenv("POOL_QUEUE_LIMIT", "32"))
+
+class BoundedPool:
+    def __init__(self, name, max_workers, kind="thread", max_queue=None):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = POOL_QUEUE_LIMIT if max_queue is None else max_queue
+        self._executor = None
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.waiting = 0
+        self.total_wait_s = 0.0
+        self.total_run_s = 0.0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # spawn: forking a threaded server process is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"{self.name}-pool"
+                    )
+            return self._executor
+
+    def _get_semaphore(self):
+        # Created lazily so it binds to the running server loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, fn, *args, **kwargs):
+        semaphore = self._get_semaphore()
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.total_wait_s += time.perf_counter() - start
+        self.submitted += 1
+        run_start = time.perf_counter()
+        release = True
+        try:
+            loop = asyncio.get_running_loop()
+            future = self.executor.submit(functools.partial(fn, *args, **kwargs))
+            result = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self.failed += 1
+            self._reset()
+            raise
+        except asyncio.CancelledError:
+            # The caller went away (client disconnect, timeout); a call that
+            # already started keeps its slot until the worker is really free
+            self.cancelled += 1
+            if not future.done():
+                release = False
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(semaphore.release))
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+            return result
+        finally:
+            self.total_run_s += time.perf_counter() - run_start
+            if release:
+                semaphore.release()
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        in_flight = self.submitted - self.completed - self.failed - self.cancelled
+        finished = self.completed + self.failed + self.cancelled
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "in_flight": in_flight,
+            "queue_depth": max(0, in_flight - self.max_workers) + self.waiting,
+            "waiting_for_slot": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "avg_wait_ms": round(self.total_wait_s / max(1, self.submitted) * 1000, 2),
+            "avg_run_ms": round(self.total_run_s / max(1, finished) * 1000, 2),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+io_pool = BoundedPool("io", IO_WORKERS)
+cpu_pool = BoundedPool("cpu", CPU_WORKERS)
+process_pool = BoundedPool("process", PROCESS_WORKERS, kind="process")
+
+POOLS = {pool.name: pool for pool in (io_pool, cpu_pool, process_pool)}
+
+async def run_io(fn, *args, **kwargs):
+    return await io_pool.run(fn, *args, **kwargs)
+
+async def run_cpu(fn, *args, **kwargs):
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+async def run_process(fn, *args, **kwargs):
+    """Run a picklable top-level function in the process pool"""
+    return await process_pool.run(fn, *args, **kwargs)
+
+def pool_stats():
+    return {name: pool.stats() for name, pool in POOLS.items()}
+
+def shutdown_pools():
+    for pool in POOLS.values():
+        pool.shutdown()
@@ -0,0 +1,78 @@
+import asyncio
+import hashlib
+import os
+import time
+
+from utils.gemini_client import GeminiClient
+
+# Simulated model timings, overridable from the environment
+FAKE_FIRST_TOKEN_MS = float(os.getenv("FAKE_GEMINI_FIRST_TOKEN_MS", "300"))
+FAKE_CHUNK_MS = float(os.getenv("FAKE_GEMINI_CHUNK_MS", "30"))
+FAKE_CHUNK_CHARS = int(os.getenv("FAKE_GEMINI_CHUNK_CHARS", "40"))
+FAKE_RESPONSE_CHARS = int(os.getenv("FAKE_GEMINI_RESPONSE_CHARS", "400"))
+
+FILLER = ("Prat.AI combines a local intent classifier with retrieval-augmented "
+          "generation to answer questions quickly and transparently. ")
+
+class _FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class _FakeStream:
+    def __init__(self, chunks, chunk_delay):
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self.text = "".join(chunks)
+
+    async def __aiter__(self):
+        for i, chunk in enumerate(self._chunks):
+            if i:
+                await asyncio.sleep(self._chunk_delay)
+            yield _FakeChunk(chunk)
+
+class FakeGenerativeModel:
+    """Deterministic stand-in for genai.GenerativeModel with configurable latency"""
+
+    def __init__(self, first_token_ms=None, chunk_ms=None, chunk_chars=None, response_chars=None):
+        self.first_token_s = (FAKE_FIRST_TOKEN_MS if first_token_ms is None else first_token_ms) / 1000
+        self.chunk_s = (FAKE_CHUNK_MS if chunk_ms is None else chunk_ms) / 1000
+        self.chunk_chars = chunk_chars or FAKE_CHUNK_CHARS
+        self.response_chars = response_chars or FAKE_RESPONSE_CHARS
+        self.calls = 0
+
+    def _answer(self, prompt):
+        question = prompt.rsplit("User:", 1)[-1].replace("Prat.AI:", "").strip()
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        text = f"[fake:{digest}] You asked: {question}. "
+        while len(text) < self.response_chars:
+            text += FILLER
+        return text[:self.response_chars]
+
+    def _chunks(self, prompt):
+        text = self._answer(prompt)
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def _total_delay(self, n_chunks):
+        return self.first_token_s + self.chunk_s * max(0, n_chunks - 1)
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        chunks = self._chunks(prompt)
+        time.sleep(self._total_delay(len(chunks)))
+        return _FakeChunk("".join(chunks))
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls += 1
+        chunks = self._chunks(prompt)
+        await asyncio.sleep(self.first_token_s)
+        if stream:
+            return _FakeStream(chunks, self.chunk_s)
+        await asyncio.sleep(self.chunk_s * max(0, len(chunks) - 1))
+        return _FakeChunk("".join(chunks))
+
+class FakeGeminiClient(GeminiClient):
+    """GeminiClient backed by FakeGenerativeModel; used for tests and benchmarks"""
+
+    def __init__(self, **model_options):
+        self.model_name = "fake-gemini"
+        self.model = FakeGenerativeModel(**model_options)
@@ -1,6 +1,7 @@
-import google.generativeai as genai
 import os
 
+from utils.prompt_builder import Prompt, prompt_builder
+
 PRATCHAT_PERSONA = """I am Prat.AI, an India's Indigenous hybrid AI assistant created by Pratyush Srivastava under PratWare — Multiverse of Softwares.
 I combine lightweight, explainable machine learning models for intent and sentiment with a retrieval-augmented LLM layer powered by Gemini API.
 My design goal is to demonstrate how a developer can build a practical, locally tunable LLM-like system using open tools.
@@ -32,37 +33,81 @@ Under his leadership, PratWare is building a multiverse of software solutions th
 
 His dedication to indigenous AI development and his commitment to building practical, production-ready systems make him a rising star in India's tech ecosystem. At 22, Pratyush Srivastava is already leaving his mark on the future of artificial intelligence."""
 
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+IDENTITY_KEYWORDS = ["who are you", "what are you", "who is prat.ai", "is prat.ai an llm", "what is pratware", "tell me about yourself"]
+PRATYUSH_KEYWORDS = ["who is pratyush", "pratyush srivastava", "tell me about pratyush", "who created prat.ai", "founder of pratware", "ceo of pratware", "who made you", "your creator"]
+
+# Longest brand spelling we rewrite; streamed text keeps this many characters
+# back so a name split across chunks is still replaced
+BRAND_HOLDBACK = len("PratChat") - 1
+
+def clean_response(text):
+    # Replace any remaining PratChat references with Prat.AI
+    text = text.replace("PratChat", "Prat.AI")
+    text = text.replace("pratchat", "prat.ai")
+    text = text.replace("Pratchat", "Prat.AI")
+    return text
+
 class GeminiClient:
     def __init__(self):
+        import google.generativeai as genai
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in environment")
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = MODEL_NAME
+        self.model = genai.GenerativeModel(MODEL_NAME)
     
-    def generate_response(self, user_message, context=""):
-        identity_keywords = ["who are you", "what are you", "who is prat.ai", "is prat.ai an llm", "what is pratware", "tell me about yourself"]
-        pratyush_keywords = ["who is pratyush", "pratyush srivastava", "tell me about pratyush", "who created prat.ai", "founder of pratware", "ceo of pratware", "who made you", "your creator"]
-        
-        if any(keyword in user_message.lower() for keyword in identity_keywords):
+    def canned_response(self, user_message):
+        """Fixed answers for identity questions that never need the LLM"""
+        message = user_message.lower()
+        if any(keyword in message for keyword in IDENTITY_KEYWORDS):
             return PRATCHAT_PERSONA
-        
-        if any(keyword in user_message.lower() for keyword in pratyush_keywords):
+        if any(keyword in message for keyword in PRATYUSH_KEYWORDS):
             return PRATYUSH_BIO
+        return None
+    
+    def build_prompt(self, user_message, passages=(), history=(), summary="", context=""):
+        """Fit persona, history and passages into the prompt token budget"""
+        return prompt_builder.build(PRATCHAT_PERSONA, user_message, passages, history, summary, context)
+    
+    def prompt_text(self, user_message, context=""):
+        """context is either a Prompt from build_prompt or plain knowledge-base text"""
+        if isinstance(context, Prompt):
+            return context.text
+        return self.build_prompt(user_message, context=context).text
+    
+    def generate_response(self, user_message, context=""):
+        canned = self.canned_response(user_message)
+        if canned:
+            return canned
         
-        prompt = f"{PRATCHAT_PERSONA}\n\n"
-        
-        if context:
-            prompt += f"Context from knowledge base:\n{context}\n\n"
-        
-        prompt += f"User: {user_message}\nPrat.AI:"
-        
-        response = self.model.generate_content(prompt)
-        response_text = response.text
+        response = self.model.generate_content(self.prompt_text(user_message, context))
+        return clean_response(response.text)
+    
+    async def generate_response_async(self, user_message, context=""):
+        """Non-blocking variant of generate_response for async routes"""
+        canned = self.canned_response(user_message)
+        if canned:
+            return canned
         
-        # Replace any remaining PratChat references with Prat.AI
-        response_text = response_text.replace("PratChat", "Prat.AI")
-        response_text = response_text.replace("pratchat", "prat.ai")
-        response_text = response_text.replace("Pratchat", "Prat.AI")
+        response = await self.model.generate_content_async(self.prompt_text(user_message, context))
+        return clean_response(response.text)
+    
+    async def stream_response(self, user_message, context=""):
+        """Yield response text as the model produces it"""
+        canned = self.canned_response(user_message)
+        if canned:
+            yield canned
+            return
         
-        return response_text
+        response = await self.model.generate_content_async(self.prompt_text(user_message, context), stream=True)
+        pending = ""
+        async for chunk in response:
+            pending = clean_response(pending + chunk.text)
+            if len(pending) > BRAND_HOLDBACK:
+                yield pending[:-BRAND_HOLDBACK]
+                pending = pending[-BRAND_HOLDBACK:]
+        if pending:
+            yield pending
@@ -0,0 +1,247 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.artifacts import discard, inherit, publish, staging_dir
+from utils.executors import run_cpu, run_io
+from utils.registry import registry
+
+# Finished jobs kept for status polling
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "100"))
+# How often the supervisor checks a running job for progress or cancellation
+JOB_POLL_MS = int(os.getenv("JOB_POLL_MS", "200"))
+
+# Job kind -> registry component it rebuilds (also its artifact directory)
+JOB_KINDS = {
+    "train": "classifier",
+    "embed": "store",
+}
+
+def run_job(kind, output_dir, events):
+    """Worker process entry point: build one artifact set into output_dir"""
+    def progress(fraction, message=""):
+        events.put(("progress", fraction, message))
+
+    try:
+        if kind == "train":
+            from utils.ml_model import train_and_save
+            result = train_and_save(model_dir=output_dir, progress=progress)
+        else:
+            from utils.embeddings import build_and_save_index
+            result = build_and_save_index(save_dir=output_dir, progress=progress)
+        events.put(("done", result))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"
+        self.progress = 0.0
+        self.message = "Waiting for earlier jobs"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.version = None
+        self.cancel_requested = False
+        self._done = asyncio.Event()
+
+    def _finish(self, status, message):
+        self.status = status
+        self.message = message
+        self.finished = time.time()
+        self._done.set()
+
+    async def wait(self):
+        await self._done.wait()
+        return self
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "version": self.version,
+            "result": self.result,
+            "error": self.error,
+        }
+
+class JobManager:
+    """Runs training and indexing jobs one at a time in separate processes.
+
+    Each job writes into a private staging directory; only a job that
+    finishes cleanly is published as the new artifact version and hot
+    swapped into the registry. Cancelling a running job terminates its
+    process and throws the staging directory away.
+    """
+
+    def __init__(self):
+        self.jobs = OrderedDict()
+        self._queue = None
+        self._task = None
+        self._context = multiprocessing.get_context("spawn")
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        for job in self.jobs.values():
+            if job.status == "queued":
+                self._queue.put_nowait(job)
+        self._task = asyncio.create_task(self._run())
+        print("[OK] Job queue started")
+
+    async def submit(self, kind):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        await self.start()
+        # A job of the same kind still waiting to start already covers this request
+        for job in self.jobs.values():
+            if job.kind == kind and job.status == "queued":
+                return job
+        job = Job(kind)
+        self.jobs[job.id] = job
+        self._trim()
+        self._queue.put_nowait(job)
+        print(f"[JOB] Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == "queued":
+            job._finish("cancelled", "Cancelled before start")
+        elif job.status == "running":
+            job.cancel_requested = True
+            job.message = "Cancelling"
+        return job
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished is not None]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                continue
+            try:
+                await self._execute(job)
+            except Exception as e:
+                job.error = str(e)
+                job._finish("failed", "Job failed")
+                print(f"[ERROR] Job {job.id} failed: {e}")
+
+    async def _execute(self, job):
+        component = JOB_KINDS[job.kind]
+        staged = staging_dir(component, job.id)
+        job.status = "running"
+        job.started = time.time()
+        job.message = "Starting worker process"
+        print(f"[JOB] Running {job.kind} job {job.id}")
+        try:
+            outcome = await run_io(self._supervise, job, staged)
+            if outcome != "done":
+                discard(staged)
+                if outcome == "cancelled":
+                    job._finish("cancelled", "Cancelled")
+                else:
+                    job._finish("failed", "Job failed")
+                print(f"[JOB] {job.kind} job {job.id} {job.status}")
+                return
+
+            job.message = "Publishing artifacts"
+            if component == "classifier":
+                # Keep the online model's weights in the new version
+                from utils.online_model import ONLINE_MODEL_FILE
+                await run_io(inherit, component, staged, [ONLINE_MODEL_FILE])
+            job.version = await run_io(publish, component, staged)
+        except BaseException:
+            discard(staged)
+            raise
+
+        job.message = "Loading new version"
+        await run_io(registry.reload, component)
+        if component == "store":
+            # Pick up documents uploaded while the job was running
+            from utils.embeddings import KB_DIR, PDF_CONTENT_DIR
+            await run_cpu(registry.store.sync_dirs, [KB_DIR, PDF_CONTENT_DIR])
+        job.progress = 1.0
+        job._finish("succeeded", "Done")
+        print(f"[JOB] {job.kind} job {job.id} succeeded (version {job.version})")
+
+    def _supervise(self, job, staged):
+        """Blocking: run the job process, relay its progress, honour cancellation"""
+        events = self._context.Queue()
+        process = self._context.Process(target=run_job, args=(job.kind, str(staged), events), daemon=True)
+        process.start()
+        outcome = None
+        try:
+            while outcome is None:
+                if job.cancel_requested:
+                    process.terminate()
+                    process.join()
+                    return "cancelled"
+                try:
+                    event = events.get(timeout=JOB_POLL_MS / 1000)
+                except queue.Empty:
+                    if not process.is_alive():
+                        job.error = f"Worker process exited with code {process.exitcode}"
+                        return "failed"
+                    continue
+                if event[0] == "progress":
+                    job.progress, job.message = event[1], event[2]
+                elif event[0] == "done":
+                    job.result = event[1]
+                    outcome = "done"
+                else:
+                    job.error = event[1]
+                    outcome = "failed"
+            process.join()
+            return outcome
+        finally:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            events.close()
+
+    async def stop(self):
+        for job in self.jobs.values():
+            if job.status == "running":
+                job.cancel_requested = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"running": self.running, "jobs": counts}
+
+job_manager = JobManager()
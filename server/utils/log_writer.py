@@ -0,0 +1,152 @@
+import asyncio
+import os
+from datetime import datetime
+
+from utils.database import bulk_insert_conversations, bulk_insert_conversations_async, get_async_engine, log_conversation
+from utils.executors import run_io
+
+# Write-behind settings: rows are buffered in memory and flushed with one
+# multi-row INSERT when the batch fills up or the flush interval elapses
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "1000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "50"))
+LOG_FLUSH_MS = int(os.getenv("LOG_FLUSH_MS", "500"))
+# How long a request may wait for queue space before its row is dropped
+LOG_ENQUEUE_TIMEOUT_MS = int(os.getenv("LOG_ENQUEUE_TIMEOUT_MS", "100"))
+LOG_MAX_RETRIES = int(os.getenv("LOG_MAX_RETRIES", "3"))
+
+class ConversationWriter:
+    """Buffers conversation rows and writes them to the database in batches"""
+
+    def __init__(self, max_queue=None, batch_size=None, flush_ms=None):
+        self.max_queue = max_queue or LOG_QUEUE_SIZE
+        self.batch_size = batch_size or LOG_BATCH_SIZE
+        self.flush_interval = (flush_ms or LOG_FLUSH_MS) / 1000
+        self._queue = None
+        self._task = None
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.retried = 0
+        self.flushes = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+        print(f"[OK] Conversation write-behind logger started (batch={self.batch_size}, flush={self.flush_interval}s)")
+
+    async def log(self, user_msg, bot_response, intent, confidence, sentiment, response_type, session_id='default'):
+        if not self.running:
+            # Not started (e.g. scripts, tests): write synchronously off-loop
+            await run_io(log_conversation, user_msg, bot_response, intent, confidence, sentiment, response_type, session_id)
+            return
+
+        row = {
+            "session_id": session_id,
+            "user_message": user_msg,
+            "bot_response": bot_response,
+            "intent": intent,
+            "confidence": confidence,
+            "sentiment": sentiment,
+            "response_type": response_type,
+            "timestamp": datetime.utcnow(),
+        }
+        try:
+            # Backpressure: wait briefly for space, then shed load
+            await asyncio.wait_for(self._queue.put(row), timeout=LOG_ENQUEUE_TIMEOUT_MS / 1000)
+            self.enqueued += 1
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            print(f"[WARN] Conversation log queue full, dropped row for session: {session_id}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await self._queue.get()
+            if row is None:
+                return
+            batch = []
+            waiter = None
+            stop = False
+            deadline = loop.time() + self.flush_interval
+            while True:
+                if isinstance(row, asyncio.Future):
+                    # A flush() barrier: write everything queued before it now
+                    waiter = row
+                    break
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stop = True
+                    break
+            if batch:
+                await self._flush(batch)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+            if stop:
+                return
+
+    async def _insert(self, rows):
+        if get_async_engine() is not None:
+            return await bulk_insert_conversations_async(rows)
+        return await run_io(bulk_insert_conversations, rows)
+
+    async def _flush(self, batch):
+        for attempt in range(LOG_MAX_RETRIES + 1):
+            try:
+                await self._insert(batch)
+                self.written += len(batch)
+                self.flushes += 1
+                print(f"[OK] Logged {len(batch)} conversations to NeonDB")
+                return
+            except Exception as e:
+                print(f"[ERROR] Batch logging to NeonDB failed (attempt {attempt + 1}): {e}")
+                if attempt < LOG_MAX_RETRIES:
+                    self.retried += len(batch)
+                    await asyncio.sleep(0.2 * 2 ** attempt)
+        self.dropped += len(batch)
+
+    async def flush(self):
+        """Wait until every row logged before this call has been written (or dropped)"""
+        if not self.running:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        await self._queue.put(waiter)
+        await waiter
+
+    async def stop(self):
+        """Flush everything still buffered, then stop the background task"""
+        if not self.running:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        print(f"[OK] Conversation logger drained ({self.written} written, {self.dropped} dropped)")
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "capacity": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "retried": self.retried,
+            "flushes": self.flushes,
+        }
+
+conversation_writer = ConversationWriter()
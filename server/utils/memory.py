@@ -0,0 +1,161 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict, deque
+
+from utils.database import get_chat_history
+from utils.embeddings import estimate_tokens
+from utils.executors import run_io
+from utils.log_writer import conversation_writer
+
+# Turns per session kept verbatim; older ones are folded into the summary
+MEMORY_TURNS = int(os.getenv("MEMORY_TURNS", "6"))
+# Upper bound on the rolling summary of older turns
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "300"))
+# Logged turns read back when a session is not in memory yet
+MEMORY_SEED_TURNS = int(os.getenv("MEMORY_SEED_TURNS", "30"))
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "1000"))
+MEMORY_IDLE_TTL = int(os.getenv("MEMORY_IDLE_TTL", "1800"))
+
+# Words of each side of a turn kept in its summary line
+GIST_WORDS = 18
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+PDF_MARKER = " [PDF: Yes]"
+
+def _shorten(text, words=GIST_WORDS):
+    text = " ".join(text.split())
+    # First sentence only, then cap its length
+    text = SENTENCE_END.split(text, 1)[0]
+    parts = text.split(" ")
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+def gist(user_message, bot_response):
+    """One summary line for a turn leaving the verbatim window"""
+    return f"User asked: {_shorten(user_message)} -> Prat.AI: {_shorten(bot_response)}"
+
+class SessionMemory:
+    def __init__(self, turns=None):
+        self.turns = deque()
+        self.gists = deque()
+        self.summary_tokens = 0
+        self.used = time.time()
+        for turn in turns or []:
+            self.add(turn['user'], turn['assistant'])
+
+    def add(self, user_message, bot_response):
+        self.turns.append({"user": user_message, "assistant": bot_response})
+        while len(self.turns) > MEMORY_TURNS:
+            old = self.turns.popleft()
+            line = gist(old['user'], old['assistant'])
+            self.gists.append(line)
+            self.summary_tokens += estimate_tokens(line) + 1
+            # The oldest lines go first once the summary is over its budget
+            while self.summary_tokens > MEMORY_SUMMARY_TOKENS and len(self.gists) > 1:
+                self.summary_tokens -= estimate_tokens(self.gists.popleft()) + 1
+
+    @property
+    def summary(self):
+        return " | ".join(self.gists)
+
+class ConversationMemory:
+    """Per-session conversation memory for prompts.
+
+    The last MEMORY_TURNS turns are kept verbatim and every older turn is
+    folded into a bounded extractive summary, so the history part of a
+    prompt stays the same size however long the conversation runs. A
+    session is read from the conversations table once, on first use in
+    this worker, and then updated in memory as turns complete.
+
+    Memory is not shared between worker processes: with several workers a
+    session must stay on one of them (single worker or sticky routing), or
+    turns answered by another worker are missing from its prompts.
+    """
+
+    def __init__(self):
+        self._sessions = OrderedDict()
+        self._loading = {}
+        # Counters
+        self.hits = 0
+        self.seeded = 0
+        self.evicted = 0
+
+    def _evict(self):
+        now = time.time()
+        for session_id in [sid for sid, m in self._sessions.items() if now - m.used > MEMORY_IDLE_TTL]:
+            del self._sessions[session_id]
+            self.evicted += 1
+        while len(self._sessions) > MEMORY_MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def _touch(self, session_id, memory):
+        memory.used = time.time()
+        self._sessions[session_id] = memory
+        self._sessions.move_to_end(session_id)
+        self._evict()
+        return memory
+
+    async def _seed(self, session_id):
+        # Turns still buffered by the write-behind logger belong in the seed
+        await conversation_writer.flush()
+        rows = await run_io(get_chat_history, session_id, MEMORY_SEED_TURNS)
+        turns = [{"user": row['user_message'].replace(PDF_MARKER, ""), "assistant": row['bot_response']} for row in rows]
+        return SessionMemory(turns)
+
+    async def get(self, session_id):
+        memory = self._sessions.get(session_id)
+        if memory is not None:
+            self.hits += 1
+            return self._touch(session_id, memory)
+        return await self._load(session_id)
+
+    async def _load(self, session_id):
+        # Concurrent first requests of a session share one database read
+        loading = self._loading.get(session_id)
+        if loading is None:
+            loading = asyncio.ensure_future(self._seed(session_id))
+            self._loading[session_id] = loading
+            try:
+                memory = await loading
+            finally:
+                del self._loading[session_id]
+            self.seeded += 1
+            return self._touch(session_id, memory)
+        return await loading
+
+    async def context(self, session_id):
+        """(recent turns, summary of older turns) for the prompt builder"""
+        memory = await self.get(session_id)
+        return list(memory.turns), memory.summary
+
+    async def add(self, session_id, user_message, bot_response):
+        """Record a finished turn; call after the turn has been logged"""
+        memory = self._sessions.get(session_id)
+        if memory is None:
+            loading = self._loading.get(session_id)
+            if loading is None:
+                # Seed now rather than drop the turn: the log read includes it
+                await self._load(session_id)
+                return
+            memory = await loading
+            # A read that was already in flight may or may not have seen this turn
+            if memory.turns and memory.turns[-1] == {"user": user_message, "assistant": bot_response}:
+                return
+        memory.add(user_message, bot_response)
+        self._touch(session_id, memory)
+
+    def clear(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "seeded": self.seeded,
+            "evicted": self.evicted,
+            "turns": MEMORY_TURNS,
+            "summary_tokens": MEMORY_SUMMARY_TOKENS,
+        }
+
+conversation_memory = ConversationMemory()
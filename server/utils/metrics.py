@@ -0,0 +1,169 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Set METRICS_ENABLED=0 to turn every record call into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PREFIX = "prat"
+
+# Seconds; spans a cached answer (sub-millisecond) to a slow LLM call
+LATENCY_BUCKETS_S = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds values <= buckets[i], the last slot overflows"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def percentile(self, q):
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+class Metrics:
+    """In-process counters and latency histograms with Prometheus text output.
+
+    Recording is a dict lookup and an increment under one lock, cheap enough
+    to leave on in production. Gauges are not stored: collectors registered
+    with add_collector are read when /api/metrics is scraped.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = METRICS_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = []
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=None, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets or LATENCY_BUCKETS_S)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Time one stage of a request into the stage latency histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def add_collector(self, collector):
+        """collector() returns (name, labels dict, value) gauge samples at scrape time"""
+        self._collectors.append(collector)
+
+    def _header(self, lines, name, default_kind):
+        kind, text = self._help.get(name, (default_kind, name.replace("_", " ")))
+        full = f"{METRICS_PREFIX}_{name}"
+        lines.append(f"# HELP {full} {text}")
+        lines.append(f"# TYPE {full} {kind}")
+        return full
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(h.counts), h.total, h.sum, h.buckets)) for key, h in self._histograms.items())
+
+        lines = []
+        last = None
+        for (name, labels), value in counters:
+            if name != last:
+                full = self._header(lines, name, "counter")
+                last = name
+            lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+
+        last = None
+        for (name, labels), (counts, total, value_sum, buckets) in histograms:
+            if name != last:
+                full = self._header(lines, name, "histogram")
+                last = name
+            cumulative = 0
+            for bound, count in zip(buckets + [float("inf")], counts):
+                cumulative += count
+                lines.append(f"{full}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{full}_sum{_format_labels(labels)} {value_sum!r}")
+            lines.append(f"{full}_count{_format_labels(labels)} {total}")
+
+        samples = {}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    samples.setdefault(name, []).append((_labels(labels), value))
+            except Exception as e:
+                print(f"[WARN] Metrics collector failed: {e}")
+        for name in sorted(samples):
+            full = self._header(lines, name, "gauge")
+            for labels, value in samples[name]:
+                lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+metrics = Metrics()
+metrics.describe("stage_seconds", "histogram", "Time spent in each request stage")
+metrics.describe("request_seconds", "histogram", "End-to-end request latency by route and response type")
+metrics.describe("responses_total", "counter", "Responses by route, response type and intent")
+metrics.describe("first_token_seconds", "histogram", "Time from request start to the first streamed chunk")
@@ -1,21 +1,27 @@
 import json
 import joblib
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
 from pathlib import Path
 import os
 
+from utils.artifacts import artifact_dir
+from utils.compact_model import export_compact
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 MODELS_DIR = BASE_DIR / "models"
 
 class IntentClassifier:
     def __init__(self):
+        # Imported here so serving workers using the compact model never load sklearn
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
         self.vectorizer = TfidfVectorizer(max_features=100, ngram_range=(1, 2))
         self.classifier = LogisticRegression(max_iter=200)
         self.intent_labels = []
         self.intent_responses = {}
+        self.ready = False
         
     def load_intents(self, filepath=None):
         if filepath is None:
@@ -41,34 +47,66 @@ class IntentClassifier:
         
         X_vec = self.vectorizer.fit_transform(X)
         self.classifier.fit(X_vec, y)
+        self.ready = True
         
         return {"status": "trained", "intents": len(self.intent_labels), "samples": len(X)}
     
     def predict(self, text):
-        X_vec = self.vectorizer.transform([text.lower()])
-        intent = self.classifier.predict(X_vec)[0]
+        return self.predict_batch([text])[0]
+    
+    def predict_batch(self, texts):
+        """Classify many messages with one sparse transform and one predict_proba"""
+        if not texts:
+            return []
+        X_vec = self.vectorizer.transform([text.lower() for text in texts])
         proba = self.classifier.predict_proba(X_vec)
-        confidence = float(np.max(proba))
+        best = proba.argmax(axis=1)
+        intents = self.classifier.classes_[best]
+        confidences = proba[np.arange(len(texts)), best]
         
-        return {
-            "intent": intent,
-            "confidence": confidence,
-            "responses": self.intent_responses.get(intent, [])
-        }
+        return [
+            {
+                "intent": intent,
+                "confidence": float(confidence),
+                "responses": self.intent_responses.get(intent, [])
+            }
+            for intent, confidence in zip(intents.tolist(), confidences)
+        ]
+    
+    def embed(self, text):
+        return self.vectorizer.transform([text.lower()]).toarray()[0]
     
     def save(self, model_dir=None):
         if model_dir is None:
-            model_dir = MODELS_DIR
+            model_dir = artifact_dir("classifier")
+        model_dir = Path(model_dir)
         os.makedirs(model_dir, exist_ok=True)
         joblib.dump(self.vectorizer, model_dir / "vectorizer.pkl")
         joblib.dump(self.classifier, model_dir / "classifier.pkl")
         joblib.dump(self.intent_labels, model_dir / "intent_labels.pkl")
         joblib.dump(self.intent_responses, model_dir / "intent_responses.pkl")
+        self.export_compact(model_dir)
+    
+    def export_compact(self, model_dir=None):
+        """Write the array-only copy served by CompactIntentModel; the pickles stay the training source"""
+        return export_compact(self.vectorizer, self.classifier, self.intent_responses, model_dir)
     
     def load(self, model_dir=None):
         if model_dir is None:
-            model_dir = MODELS_DIR
+            model_dir = artifact_dir("classifier")
+        model_dir = Path(model_dir)
         self.vectorizer = joblib.load(model_dir / "vectorizer.pkl")
         self.classifier = joblib.load(model_dir / "classifier.pkl")
         self.intent_labels = joblib.load(model_dir / "intent_labels.pkl")
         self.intent_responses = joblib.load(model_dir / "intent_responses.pkl")
+        self.ready = True
+
+def train_and_save(intents_filepath=None, model_dir=None, progress=None):
+    """Train and persist a classifier; top-level so it can run in a worker process"""
+    progress = progress or (lambda fraction, message: None)
+    progress(0.1, "Fitting intent classifier")
+    classifier = IntentClassifier()
+    result = classifier.train(intents_filepath)
+    progress(0.8, "Writing model files")
+    classifier.save(model_dir)
+    return result
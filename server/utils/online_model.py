@@ -0,0 +1,226 @@
+import copy
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from utils.artifacts import artifact_dir, discard, inherit, kind_dir, publish, staging_dir
+from utils.compact_model import MODEL_RELOAD_INTERVAL
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+DATA_DIR = BASE_DIR / "data"
+
+ONLINE_MODEL_FILE = "online_intent.joblib"
+# Hashed feature space: memory is fixed by this, not by vocabulary growth
+ONLINE_HASH_FEATURES = int(os.getenv("ONLINE_HASH_FEATURES", str(2 ** 16)))
+# Passes over intents.json when (re)building the model from scratch
+ONLINE_EPOCHS = int(os.getenv("ONLINE_EPOCHS", "20"))
+# Logged conversations are folded in as training examples only when the
+# served model was at least this confident about their intent
+ONLINE_MIN_CONFIDENCE = float(os.getenv("ONLINE_MIN_CONFIDENCE", "0.9"))
+
+PDF_SUFFIX = re.compile(r"\s*\[PDF: Yes\]$")
+
+class OnlineIntentClassifier:
+    """Incrementally trainable intent model (HashingVectorizer + SGD log-loss).
+
+    Updates are copy-on-write: partial_fit runs on a copy of the estimator
+    and the finished copy replaces the served one in a single assignment,
+    so concurrent predictions never see half-updated weights. Saved weights
+    are published as a new classifier artifact version (so a rollback takes
+    them along) and picked up by other workers through changed_on_disk and a
+    registry reload.
+    """
+
+    def __init__(self):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(
+            n_features=ONLINE_HASH_FEATURES,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm='l2'
+        )
+        self.model = None
+        self.intent_labels = []
+        self.intent_responses = {}
+        self.last_conversation_id = 0
+        self.examples_seen = 0
+        self.updates = 0
+        self.ready = False
+        self._update_lock = threading.Lock()
+        self._source = None
+        self._checked = 0.0
+
+    def _new_model(self):
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss='log_loss', alpha=1e-4, random_state=0)
+
+    def _features(self, texts):
+        return self.vectorizer.transform([text.lower() for text in texts])
+
+    def bootstrap(self, intents_filepath=None):
+        """Build the model from intents.json; every intent tag becomes a class"""
+        if intents_filepath is None:
+            intents_filepath = DATA_DIR / "intents.json"
+        with open(intents_filepath, 'r', encoding='utf-8') as f:
+            intents = json.load(f)['intents']
+
+        samples = []
+        for intent in intents:
+            self.intent_responses[intent['tag']] = intent['responses']
+            samples.extend((pattern, intent['tag']) for pattern in intent['patterns'])
+        self.intent_labels = sorted(self.intent_responses)
+
+        model = self._new_model()
+        rng = random.Random(0)
+        for _ in range(ONLINE_EPOCHS):
+            rng.shuffle(samples)
+            texts, labels = zip(*samples)
+            model.partial_fit(self._features(texts), labels, classes=self.intent_labels)
+        self.model = model
+        self.examples_seen = len(samples) * ONLINE_EPOCHS
+        self.ready = True
+        return {"status": "trained", "intents": len(self.intent_labels), "samples": len(samples)}
+
+    def update(self, examples):
+        """Fold labelled examples ([{"message", "intent"}]) into the model.
+
+        Intents the model was not built with are skipped: SGD's class set is
+        fixed, adding one needs a full rebuild.
+        """
+        texts, labels = [], []
+        skipped = 0
+        for example in examples:
+            text = PDF_SUFFIX.sub("", example['message']).strip()
+            if text and example['intent'] in self.intent_responses:
+                texts.append(text)
+                labels.append(example['intent'])
+            else:
+                skipped += 1
+
+        if texts:
+            with self._update_lock:
+                model = copy.deepcopy(self.model)
+                model.partial_fit(self._features(texts), labels)
+                self.model = model
+                self.examples_seen += len(texts)
+                self.updates += 1
+        return {"learned": len(texts), "skipped": skipped}
+
+    def update_from_conversations(self, limit=1000, min_confidence=None):
+        """Fold in conversations logged since the last call"""
+        from utils.database import get_labelled_conversations
+
+        if min_confidence is None:
+            min_confidence = ONLINE_MIN_CONFIDENCE
+        rows = get_labelled_conversations(self.last_conversation_id, min_confidence, limit)
+        examples = [{"message": row['user_message'], "intent": row['intent']} for row in rows]
+        result = self.update(examples)
+        if rows:
+            self.last_conversation_id = rows[-1]['id']
+        result["conversations"] = len(rows)
+        return result
+
+    def predict(self, text):
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts):
+        if not texts:
+            return []
+        model = self.model
+        proba = model.predict_proba(self._features(texts))
+        best = proba.argmax(axis=1)
+        intents = model.classes_[best]
+        confidences = proba[np.arange(len(texts)), best]
+
+        return [
+            {
+                "intent": intent,
+                "confidence": float(confidence),
+                "responses": self.intent_responses.get(intent, [])
+            }
+            for intent, confidence in zip(intents.tolist(), confidences)
+        ]
+
+    # No embed(): hashed rows are too wide for the semantic cache buffer
+
+    def save(self, model_dir=None):
+        """Write the weights; by default as a new version of the classifier artifacts"""
+        if model_dir is not None:
+            return self._write(Path(model_dir))
+        live = artifact_dir("classifier")
+        if live.parent != kind_dir("classifier"):
+            # Flat pre-versioning layout: nothing to publish into
+            return self._write(live)
+        staged = staging_dir("classifier")
+        try:
+            self._write(staged)
+            inherit("classifier", staged)
+            version = publish("classifier", staged)
+        except BaseException:
+            discard(staged)
+            raise
+        path = kind_dir("classifier") / version / ONLINE_MODEL_FILE
+        self._source = (path, path.stat().st_mtime_ns)
+
+    def _write(self, model_dir):
+        os.makedirs(model_dir, exist_ok=True)
+        state = {
+            "model": self.model,
+            "n_features": self.vectorizer.n_features,
+            "intent_labels": self.intent_labels,
+            "intent_responses": self.intent_responses,
+            "last_conversation_id": self.last_conversation_id,
+            "examples_seen": self.examples_seen,
+        }
+        path = model_dir / ONLINE_MODEL_FILE
+        tmp_path = model_dir / (ONLINE_MODEL_FILE + f".{os.getpid()}.tmp")
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, path)
+        self._source = (path, path.stat().st_mtime_ns)
+
+    def load(self, model_dir=None):
+        if model_dir is None:
+            model_dir = artifact_dir("classifier")
+        path = Path(model_dir) / ONLINE_MODEL_FILE
+        source = (path, path.stat().st_mtime_ns)
+        state = joblib.load(path)
+        if state["n_features"] != self.vectorizer.n_features:
+            raise ValueError("Saved online model uses a different ONLINE_HASH_FEATURES")
+        self.intent_labels = state["intent_labels"]
+        self.intent_responses = state["intent_responses"]
+        self.last_conversation_id = state["last_conversation_id"]
+        self.examples_seen = state["examples_seen"]
+        self.model = state["model"]
+        self._source = source
+        self.ready = True
+
+    def changed_on_disk(self, model_dir=None):
+        """True when another worker saved or published newer weights (checked every few seconds)"""
+        now = time.monotonic()
+        if now - self._checked < MODEL_RELOAD_INTERVAL:
+            return False
+        self._checked = now
+        if model_dir is None:
+            model_dir = artifact_dir("classifier")
+        path = Path(model_dir) / ONLINE_MODEL_FILE
+        try:
+            return (path, path.stat().st_mtime_ns) != self._source
+        except FileNotFoundError:
+            return False
+
+    def stats(self):
+        return {
+            "hash_features": self.vectorizer.n_features,
+            "intents": len(self.intent_labels),
+            "examples_seen": self.examples_seen,
+            "updates": self.updates,
+            "last_conversation_id": self.last_conversation_id,
+        }
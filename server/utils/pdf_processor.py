@@ -1,28 +1,209 @@
 import PyPDF2
+import asyncio
+import hashlib
 import io
+import json
+import math
+import tempfile
+import threading
+import time
 from pathlib import Path
 import os
 
+from utils.executors import PROCESS_WORKERS, run_io, run_process
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 UPLOADS_DIR = BASE_DIR / "uploads"
 
+# Uploads are copied to disk in chunks of this size and rejected above the limit
+PDF_SPOOL_CHUNK = 1024 * 1024
+PDF_MAX_UPLOAD_MB = int(os.getenv("PDF_MAX_UPLOAD_MB", "50"))
+# Minimum pages per process-pool task. Each task re-opens the PDF, so large
+# documents are split into a few ranges per worker rather than many small ones.
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+# Extracted text is cached on disk by the SHA-256 of the uploaded bytes;
+# least recently used entries are evicted above the size limit
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", str(BASE_DIR / "cache" / "pdf_text")))
+PDF_CACHE_MB = int(os.getenv("PDF_CACHE_MB", "200"))
+
+def extract_text(pdf_content):
+    """Extract text from PDF bytes; top-level so it can run in a worker process"""
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
+        return "\n".join(page.extract_text() for page in pdf_reader.pages).strip()
+    except Exception as e:
+        raise Exception(f"Error extracting text from PDF: {str(e)}")
+
+def count_pages(path):
+    with open(path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+def extract_pages(path, start, stop):
+    """Text of pages [start, stop); reads from the file instead of loading it into memory"""
+    with open(path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+
+def iter_page_text(path):
+    """Generator over page texts, for callers outside the event loop"""
+    with open(path, 'rb') as f:
+        for page in PyPDF2.PdfReader(f).pages:
+            yield page.extract_text()
+
+class PDFTextCache:
+    """Content-addressed on-disk cache of extracted PDF text.
+
+    One JSON file per upload digest; reads touch the file's mtime so
+    eviction drops the least recently used entries first. Safe to share
+    between workers: entries are written with an atomic rename.
+    """
+
+    def __init__(self, cache_dir=None, max_mb=None):
+        self.cache_dir = Path(cache_dir or PDF_CACHE_DIR)
+        self.max_bytes = (PDF_CACHE_MB if max_mb is None else max_mb) * 1024 * 1024
+        self._lock = threading.Lock()
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, digest):
+        return self.cache_dir / f"{digest}.json"
+
+    def get(self, digest):
+        path = self._path(digest)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["text"], entry["pages"]
+
+    def put(self, digest, text, pages):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.cache_dir / f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"text": text, "pages": pages, "created": time.time()}, f)
+        os.replace(tmp_path, self._path(digest))
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "max_mb": self.max_bytes // (1024 * 1024),
+        }
+
+pdf_text_cache = PDFTextCache()
+
+def _spool(source, directory):
+    limit = PDF_MAX_UPLOAD_MB * 1024 * 1024
+    written = 0
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".pdf", delete=False) as spooled:
+        try:
+            while True:
+                chunk = source.read(PDF_SPOOL_CHUNK)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > limit:
+                    raise ValueError(f"PDF is larger than {PDF_MAX_UPLOAD_MB} MB")
+                digest.update(chunk)
+                spooled.write(chunk)
+        except BaseException:
+            spooled.close()
+            os.remove(spooled.name)
+            raise
+    return Path(spooled.name), digest.hexdigest()
+
+async def spool_upload(upload, directory=None):
+    """Copy an UploadFile to a temporary file on disk in fixed-size chunks.
+
+    Returns the spooled path and the SHA-256 of the uploaded bytes.
+    """
+    directory = directory or UPLOADS_DIR
+    os.makedirs(directory, exist_ok=True)
+    await upload.seek(0)
+    return await run_io(_spool, upload.file, directory)
+
+async def stream_pages(path, pages_per_task=None):
+    """Yield page texts in order while later page ranges extract in parallel.
+
+    At most two ranges per process worker are in flight, so memory stays
+    bounded no matter how many pages the document has.
+    """
+    total = await run_process(count_pages, str(path))
+    pages_per_task = pages_per_task or max(PDF_PAGES_PER_TASK, math.ceil(total / (PROCESS_WORKERS * 4)))
+    ranges = [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+    pending = []
+    try:
+        for start, stop in ranges:
+            pending.append(asyncio.ensure_future(run_process(extract_pages, str(path), start, stop)))
+            if len(pending) >= PROCESS_WORKERS * 2:
+                for text in await pending.pop(0):
+                    yield text
+        while pending:
+            for text in await pending.pop(0):
+                yield text
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def extract_upload(upload):
+    """Spool, extract page-parallel and clean up; returns (text, page_count, digest).
+
+    Identical uploads are answered from the extraction cache without
+    parsing the PDF again.
+    """
+    path, digest = await spool_upload(upload)
+    try:
+        cached = await run_io(pdf_text_cache.get, digest)
+        if cached is not None:
+            return cached[0], cached[1], digest
+        try:
+            pages = [text async for text in stream_pages(path)]
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+    finally:
+        await run_io(os.remove, path)
+    text = "\n".join(pages).strip()
+    await run_io(pdf_text_cache.put, digest, text, len(pages))
+    return text, len(pages), digest
+
 class PDFProcessor:
     def __init__(self):
         os.makedirs(UPLOADS_DIR, exist_ok=True)
     
     def extract_text_from_pdf(self, pdf_content):
         """Extract text from uploaded PDF file content"""
-        try:
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            raise Exception(f"Error extracting text from PDF: {str(e)}")
+        return extract_text(pdf_content)
     
     def save_pdf_content(self, filename, content):
         """Save extracted PDF content to text file"""
@@ -0,0 +1,199 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from utils.executors import run_io
+from utils.metrics import metrics
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(BASE_DIR / "cache" / "profiles")))
+# Fraction of profiled-route requests sampled; 0 leaves the hook idle (change at runtime via POST /api/profile)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# When set, "X-Profile: <token>" forces a profile of that request; the admin
+# endpoints are disabled without it and require it in X-Profile-Token
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# Requests profiled at once; further sampled requests run unprofiled
+PROFILE_MAX_ACTIVE = int(os.getenv("PROFILE_MAX_ACTIVE", "4"))
+# Profile files kept on disk; the oldest are deleted first
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+PROFILE_PATHS = ("/api/chat", "/api/stream", "/api/upload-pdf")
+
+# Leaf functions of a pool thread waiting for work
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def collapse(frame, limit=128):
+    """Root-first 'a;b;c' stack of a frame, one label per function"""
+    labels = []
+    while frame is not None and len(labels) < limit:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class Profile:
+    def __init__(self, route):
+        self.id = uuid.uuid4().hex[:12]
+        self.route = route
+        self.started = time.time()
+        # The event loop thread serving the request
+        self.thread = threading.get_ident()
+        self.samples = Counter()
+        self.count = 0
+
+    def write(self, directory):
+        """Collapsed-stack file ('thread;frame;... count' per line), readable by flamegraph.pl and speedscope"""
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{self.route.strip('/').replace('/', '_')}-{self.id}.folded"
+        path = directory / name
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+class RequestProfiler:
+    """Sampled wall-clock stack profiling of individual requests.
+
+    While at least one profiled request is in flight, a sampler thread reads
+    every thread's stack each PROFILE_INTERVAL_MS and adds it to each active
+    profile, so work handed to the io/cpu pools is captured along with the
+    event loop. With concurrent traffic a profile also contains the other
+    requests' frames; profile under light load for clean attribution. The
+    sampler is not running otherwise, and an unsampled request costs one
+    path check and one random() call.
+    """
+
+    def __init__(self, rate=None, directory=None):
+        self.rate = PROFILE_SAMPLE_RATE if rate is None else rate
+        self.directory = Path(directory or PROFILE_DIR)
+        self._lock = threading.Lock()
+        self._active = {}
+        self._thread = None
+        # Counters
+        self.profiled = 0
+        self.skipped = 0
+        self.samples = 0
+        self.written = 0
+
+    def wants(self, path, headers):
+        """Whether to profile a request, given its path and raw ASGI headers"""
+        if path not in PROFILE_PATHS:
+            return False
+        if PROFILE_TOKEN:
+            for key, value in headers:
+                if key == b"x-profile":
+                    return value.decode("latin-1") == PROFILE_TOKEN
+        return self.rate > 0 and random.random() < self.rate
+
+    def start(self, route):
+        with self._lock:
+            if len(self._active) >= PROFILE_MAX_ACTIVE:
+                self.skipped += 1
+                return None
+            profile = Profile(route)
+            self._active[profile.id] = profile
+            self.profiled += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile):
+        """Detach a profile and write it out; returns the file path (None if nothing was sampled)"""
+        with self._lock:
+            self._active.pop(profile.id, None)
+        if not profile.samples:
+            return None
+        try:
+            path = profile.write(self.directory)
+            self.written += 1
+            self._prune()
+            metrics.inc("profiles_total", route=profile.route)
+            print(f"[OK] Profiled {profile.route} ({profile.count} samples): {path.name}")
+            return path
+        except Exception as e:
+            print(f"[WARN] Could not write profile {profile.id}: {e}")
+            return None
+
+    def _sample(self):
+        interval = PROFILE_INTERVAL_MS / 1000
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._thread = None
+                    return
+            loops = {profile.thread for profile in active}
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                name = names.get(ident, str(ident))
+                # Idle pool threads say nothing about the request; the event loop waiting on I/O does
+                if ident not in loops and os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                stacks.append(f"{name};{collapse(frame)}")
+            for profile in active:
+                profile.samples.update(stacks)
+                profile.count += 1
+            self.samples += 1
+            time.sleep(interval)
+
+    def _prune(self):
+        files = sorted(self.directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for path in files[:max(0, len(files) - PROFILE_KEEP)]:
+            path.unlink(missing_ok=True)
+
+    def recent(self, limit=20):
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [path.name for path in files[:limit]]
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "active": len(self._active),
+            "profiled": self.profiled,
+            "skipped": self.skipped,
+            "samples": self.samples,
+            "written": self.written,
+            "interval_ms": PROFILE_INTERVAL_MS,
+        }
+
+request_profiler = RequestProfiler()
+
+class ProfilerMiddleware:
+    """ASGI middleware; wraps the whole response so streamed bodies are profiled to the last chunk"""
+
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope["path"], scope.get("headers", ())):
+            return await self.app(scope, receive, send)
+
+        profile = self.profiler.start(scope["path"])
+        if profile is None:
+            return await self.app(scope, receive, send)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # Writing is a small local file; keep it off the event loop anyway
+            await run_io(self.profiler.stop, profile)
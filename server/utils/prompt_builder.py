@@ -0,0 +1,181 @@
+import os
+import re
+import threading
+
+from utils.embeddings import estimate_tokens
+
+# Whole-prompt token budget shared by persona, history, passages and message
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Most of the budget conversation history may take before passages get the rest
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "800"))
+
+# Passage kinds in prompt order; documents the user attached outrank the knowledge base
+PASSAGE_SECTIONS = {
+    "document": "PDF Content:",
+    "knowledge": "Context from knowledge base:",
+}
+PASSAGE_PRIORITY = {"document": 1, "knowledge": 0}
+
+SPACE_RUNS = re.compile(r"[ \t\r\f\v]+")
+BLANK_LINES = re.compile(r"\n\s*\n+")
+
+def compress(text):
+    """Collapse whitespace runs (common in extracted PDF text) without merging lines"""
+    return BLANK_LINES.sub("\n", SPACE_RUNS.sub(" ", text)).strip()
+
+def uncovered_spans(start, end, covered):
+    """Parts of [start, end) not already inside one of the covered spans"""
+    spans = []
+    for covered_start, covered_end in sorted(covered):
+        if covered_end <= start or covered_start >= end:
+            continue
+        if covered_start > start:
+            spans.append((start, covered_start))
+        start = max(start, covered_end)
+        if start >= end:
+            return spans
+    spans.append((start, end))
+    return spans
+
+class Prompt:
+    """An assembled prompt plus the token count of each section"""
+
+    def __init__(self, text, sections, dropped=0, deduped=0):
+        self.text = text
+        self.sections = sections
+        self.dropped = dropped
+        self.deduped = deduped
+
+    def report(self):
+        return dict(self.sections, dropped=self.dropped, deduped=self.deduped)
+
+class PromptBuilder:
+    """Fits persona, conversation history and retrieved passages into a token budget.
+
+    The persona and the user message are always sent. History takes up to
+    PROMPT_HISTORY_TOKENS, newest turns first; passages fill what is left,
+    best-ranked first, with words already sent by an overlapping passage cut
+    out and exact repeats skipped. Passages that do not fit are dropped; if
+    not even the best one fits, its beginning is truncated into the space left.
+    """
+
+    def __init__(self, budget=None, history_tokens=None):
+        self.budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+        self.history_tokens = PROMPT_HISTORY_TOKENS if history_tokens is None else history_tokens
+        self._lock = threading.Lock()
+        # Counters
+        self.prompts = 0
+        self.totals = {"persona": 0, "history": 0, "passages": 0, "message": 0, "total": 0}
+        self.dropped = 0
+        self.deduped = 0
+
+    def _history(self, history, summary, budget):
+        lines = []
+        used = 0
+        # The summary is already bounded and covers everything older, so it goes in first
+        if summary:
+            text = f"Summary of earlier conversation: {summary}"
+            tokens = estimate_tokens(text) + 1
+            if tokens <= budget:
+                lines.append(text)
+                used += tokens
+        # Newest turns are the most useful; walk backwards until the budget is spent
+        turns = []
+        for turn in reversed(history or []):
+            text = f"User: {turn['user']}\nPrat.AI: {turn['assistant']}"
+            tokens = estimate_tokens(text) + 1
+            if used + tokens > budget:
+                break
+            turns.insert(0, text)
+            used += tokens
+        lines += turns
+        if not lines:
+            return ""
+        return "Conversation so far:\n" + "\n".join(lines) + "\n\n"
+
+    def _passages(self, passages, budget):
+        # Room for the section headings
+        budget = max(0, budget - sum(estimate_tokens(heading) + 1 for heading in PASSAGE_SECTIONS.values()))
+        ranked = sorted(passages, key=lambda p: (PASSAGE_PRIORITY.get(p.get('kind', "knowledge"), 0), p.get('score', 0.0)), reverse=True)
+
+        chosen = []
+        used = 0
+        deduped = 0
+        seen = set()
+        # Character spans already sent per document: chunks are cut with a word
+        # overlap, so neighbouring hits only contribute the words not yet included
+        covered = {}
+        for passage in ranked:
+            text = passage['text']
+            span_key = (passage.get('kind', "knowledge"), passage.get('document_id') or passage.get('source'))
+            has_span = passage.get('start') is not None and passage.get('end') is not None
+            if has_span:
+                offset = passage['start']
+                spans = uncovered_spans(passage['start'], passage['end'], covered.get(span_key, []))
+                text = " ... ".join(passage['text'][s - offset:e - offset] for s, e in spans)
+            text = compress(text)
+            if not text or text.lower() in seen:
+                deduped += 1
+                continue
+            block = f"[{passage['source']}]\n{text}" if passage.get('source') else text
+            tokens = estimate_tokens(block) + 1
+            if used + tokens > budget:
+                continue
+            chosen.append((passage, block))
+            used += tokens
+            seen.add(text.lower())
+            if has_span:
+                covered.setdefault(span_key, []).append((passage['start'], passage['end']))
+        if not chosen and ranked and budget > 0:
+            # Better a truncated best passage than no context at all
+            block = compress(ranked[0]['text'])[:budget * 4].rsplit(" ", 1)[0]
+            chosen.append((ranked[0], block))
+        dropped = len(ranked) - len(chosen) - deduped
+
+        sections = []
+        for kind, heading in PASSAGE_SECTIONS.items():
+            blocks = [block for passage, block in chosen if passage.get('kind', "knowledge") == kind]
+            if blocks:
+                sections.append(heading + "\n" + "\n\n".join(blocks) + "\n\n")
+        return "".join(sections), dropped, deduped
+
+    def build(self, persona, user_message, passages=(), history=(), summary="", context=""):
+        """Assemble one prompt; plain-string context is treated as one knowledge passage"""
+        passages = list(passages)
+        if context:
+            passages.append({"text": context, "kind": "knowledge", "score": 0.0})
+
+        persona_text = f"{persona}\n\n"
+        message_text = f"User: {user_message}\nPrat.AI:"
+        remaining = max(0, self.budget - estimate_tokens(persona_text) - estimate_tokens(message_text))
+
+        history_text = self._history(history, summary, min(self.history_tokens, remaining))
+        remaining -= estimate_tokens(history_text)
+        passage_text, dropped, deduped = self._passages(passages, remaining)
+
+        sections = {
+            "persona": estimate_tokens(persona_text),
+            "history": estimate_tokens(history_text),
+            "passages": estimate_tokens(passage_text),
+            "message": estimate_tokens(message_text),
+        }
+        sections["total"] = sum(sections.values())
+        with self._lock:
+            self.prompts += 1
+            for name, tokens in sections.items():
+                self.totals[name] += tokens
+            self.dropped += dropped
+            self.deduped += deduped
+        return Prompt(persona_text + history_text + passage_text + message_text, sections, dropped, deduped)
+
+    def stats(self):
+        prompts = self.prompts
+        return {
+            "budget": self.budget,
+            "prompts": prompts,
+            "avg_tokens": {name: round(total / prompts, 1) if prompts else 0.0 for name, total in self.totals.items()},
+            "passages_dropped": self.dropped,
+            "passages_deduped": self.deduped,
+        }
+
+prompt_builder = PromptBuilder()
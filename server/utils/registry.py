@@ -0,0 +1,184 @@
+import asyncio
+import os
+import threading
+import time
+
+# Minimal canned responses used when no trained intent model is available
+FALLBACK_RESPONSES = {
+    'greeting': ['Hello! I am Prat.AI, your hybrid AI assistant.'],
+    'goodbye': ['Goodbye! Have a great day!'],
+    'thanks': ['You\'re welcome!'],
+    'identity': ['I am Prat.AI, an India\'s Indigenous hybrid AI assistant created by Pratyush Srivastava under PratWare — Multiverse of Softwares.']
+}
+
+class ModelRegistry:
+    """Process-wide holder for the intent classifier, retrieval store and LLM client.
+
+    Each component is loaded lazily on first access and shared by every
+    router. Retraining swaps in a fully built replacement under a lock, so
+    requests always see either the old or the new object, never a mix.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._components = {}
+        self.timings = {}
+        self.versions = {}
+        self.errors = {}
+        self._reloading = None
+
+    def _get(self, name):
+        component = self._components.get(name)
+        if component is not None or name in self._components:
+            return component
+        with self._lock:
+            if name not in self._components:
+                start = time.perf_counter()
+                self.errors.pop(name, None)
+                try:
+                    component = self._loaders[name](self)
+                except Exception as e:
+                    print(f"[WARN] Loading {name} failed: {e}")
+                    component = None
+                    self.errors[name] = str(e)
+                self._set(name, component, time.perf_counter() - start)
+            return self._components[name]
+
+    def _set(self, name, component, elapsed):
+        self._components[name] = component
+        self.timings[name] = round(elapsed * 1000, 2)
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def swap(self, name, component, elapsed=0.0):
+        """Atomically replace a component with an already built instance"""
+        with self._lock:
+            self._set(name, component, elapsed)
+            self.errors.pop(name, None)
+        print(f"[OK] Registry swapped {name} (version {self.versions[name]})")
+
+    def reload(self, name):
+        """Rebuild a component from disk and swap it in"""
+        loader = self._loaders[name]
+        start = time.perf_counter()
+        self.errors.pop(name, None)
+        component = loader(self)
+        with self._lock:
+            self._set(name, component, time.perf_counter() - start)
+        print(f"[OK] Registry reloaded {name} (version {self.versions[name]})")
+        return component
+
+    def _load_classifier(self):
+        backend = os.getenv("INTENT_BACKEND", "compact")
+        if backend == "online":
+            return self._load_online_classifier()
+        # Prefer the exported NumPy model: it loads without importing sklearn
+        if backend == "compact":
+            from utils.compact_model import CompactIntentModel
+            classifier = CompactIntentModel()
+            try:
+                classifier.load()
+                print("[OK] Intent classifier loaded (compact)")
+                return classifier
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[WARN] Compact intent model unusable, trying sklearn model: {e}")
+        from utils.ml_model import IntentClassifier
+        classifier = IntentClassifier()
+        try:
+            classifier.load()
+            print("[OK] Intent classifier loaded")
+        except Exception as e:
+            print(f"[WARN] Loading failed, using fallback mode: {e}")
+            classifier.intent_responses = dict(FALLBACK_RESPONSES)
+            self.errors["classifier"] = str(e)
+        return classifier
+
+    def _load_online_classifier(self):
+        from utils.online_model import OnlineIntentClassifier
+        classifier = OnlineIntentClassifier()
+        try:
+            classifier.load()
+            print("[OK] Online intent classifier loaded")
+        except FileNotFoundError:
+            classifier.bootstrap()
+            classifier.save()
+            print("[OK] Online intent classifier built from intents.json")
+        return classifier
+
+    def _load_store(self):
+        from utils.embeddings import EmbeddingStore, KB_DIR, PDF_CONTENT_DIR
+        store = EmbeddingStore()
+        try:
+            store.load()
+            print("[OK] Embedding store loaded")
+        except Exception as e:
+            print(f"[WARN] Loading failed, building index: {e}")
+            store.build_combined_index([KB_DIR, PDF_CONTENT_DIR])
+            store.save()
+            print("[OK] Embedding store built and saved")
+        return store
+
+    def _load_gemini(self):
+        if os.getenv("GEMINI_BACKEND") == "fake":
+            from utils.fake_gemini import FakeGeminiClient
+            client = FakeGeminiClient()
+            print("[OK] Fake Gemini backend initialized")
+            return client
+        from utils.gemini_client import GeminiClient
+        client = GeminiClient()
+        print("[OK] Gemini client initialized")
+        return client
+
+    _loaders = {
+        "classifier": _load_classifier,
+        "store": _load_store,
+        "gemini": _load_gemini,
+    }
+
+    @property
+    def classifier(self):
+        classifier = self._get("classifier")
+        # Another worker (or retrain_model.py) saved new weights: load them in
+        # the background and keep serving the current model until they swap in
+        changed_on_disk = getattr(classifier, "changed_on_disk", None)
+        reloading = self._reloading is not None and not self._reloading.done()
+        if changed_on_disk is not None and not reloading and changed_on_disk():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Scripts and worker threads have no event loop to block
+                classifier = self._reload_classifier() or classifier
+            else:
+                self._reloading = loop.create_task(self._reload_classifier_async())
+        return classifier
+
+    def _reload_classifier(self):
+        try:
+            return self.reload("classifier")
+        except Exception as e:
+            print(f"[WARN] Reloading classifier failed, keeping current model: {e}")
+
+    async def _reload_classifier_async(self):
+        from utils.executors import run_cpu
+        await run_cpu(self._reload_classifier)
+
+    @property
+    def store(self):
+        return self._get("store")
+
+    @property
+    def gemini(self):
+        return self._get("gemini")
+
+    def status(self):
+        classifier = self._components.get("classifier")
+        return {
+            "loaded": sorted(name for name, c in self._components.items() if c is not None),
+            "classifier_ready": bool(classifier is not None and classifier.ready),
+            "load_ms": dict(self.timings),
+            "versions": dict(self.versions),
+            "errors": dict(self.errors),
+        }
+
+registry = ModelRegistry()
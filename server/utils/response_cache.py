@@ -0,0 +1,316 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.executors import run_io
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Optional SQLite file for a second tier that survives restarts and is
+# shared by all workers on the host; empty keeps the cache in memory only
+RESPONSE_CACHE_DB = os.getenv("RESPONSE_CACHE_DB", "")
+# Near-duplicate answer cache: recent answered queries whose embedding is at
+# least this cosine-similar to a new message are reused. Raising the threshold
+# trades hit rate for precision; a size of 0 disables it.
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# Share of a message's words the retrieval encoder must know before its
+# embedding is trusted; unknown words contribute nothing to the vector, so
+# two questions differing only in them would look identical
+SEMANTIC_MIN_COVERAGE = float(os.getenv("SEMANTIC_MIN_COVERAGE", "0.8"))
+
+def normalize_message(message):
+    message = re.sub(r"\s+", " ", message.lower()).strip()
+    return message.rstrip("?!. ")
+
+def retrieval_context(passages):
+    """Cache-key context of a turn without history or PDF: the retrieved passages"""
+    return "\n\n".join(passage['text'] for passage in passages)
+
+class ResponseCache:
+    """LRU + TTL cache of LLM answers keyed on message, context and model.
+
+    The retrieval index fingerprint is part of every key, so answers built
+    from an older knowledge base are never served; when the fingerprint
+    changes the stale entries are also purged to free memory.
+    """
+
+    def __init__(self, max_entries=None, ttl=None, db_path=None):
+        self.max_entries = max_entries or RESPONSE_CACHE_SIZE
+        self.ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.db_path = RESPONSE_CACHE_DB if db_path is None else db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._db = None
+        if self.db_path:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, fingerprint TEXT, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        # Counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, message, context, model_name, fingerprint=""):
+        context_hash = hashlib.sha256(context.encode('utf-8')).hexdigest()
+        raw = "\x1f".join([normalize_message(message), context_hash, model_name, fingerprint])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def check_fingerprint(self, fingerprint):
+        """Drop every entry when the knowledge-base index has changed"""
+        if fingerprint == self._fingerprint:
+            return False
+        with self._lock:
+            first_seen = self._fingerprint is None
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache WHERE fingerprint IS NOT ?", (fingerprint,))
+                self._db.commit()
+        if not first_seen:
+            self.invalidations += 1
+            print("[OK] Response cache invalidated after index change")
+        return True
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, fingerprint, created) VALUES (?, ?, ?, ?)",
+                    (key, value, self._fingerprint, now)
+                )
+                self._db.execute("DELETE FROM response_cache WHERE created < ?", (now - self.ttl,))
+                self._db.commit()
+
+    def _store(self, key, value, created):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def aget(self, key):
+        # The SQLite tier touches disk, so keep it off the event loop
+        if self._db is None:
+            return self.get(key)
+        return await run_io(self.get, key)
+
+    async def aput(self, key, value):
+        if self._db is None:
+            return self.put(key, value)
+        return await run_io(self.put, key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "disk_tier": bool(self._db is not None),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+def semantic_embedder(store):
+    """Pick the embedding used for similarity lookups.
+
+    Only the retrieval encoder (dense/hybrid modes) is used. The intent
+    classifier's TF-IDF vocabulary is far too small: unrelated questions
+    built from the same few known words embed identically. Messages whose
+    words are mostly unknown to the encoder are skipped for the same reason.
+    The returned key changes whenever the encoder is swapped or the
+    knowledge base changes, which tells the cache its stored vectors or
+    answers are stale. Without an encoder the semantic tier is disabled.
+    """
+    if store is None or getattr(store, "encoder", None) is None:
+        return None, None
+    vectorizer = store.encoder["vectorizer"]
+    vocabulary = vectorizer.vocabulary_
+    analyze = vectorizer.build_analyzer()
+
+    def embed(text):
+        words = [term for term in analyze(text) if " " not in term]
+        known = sum(word in vocabulary for word in words)
+        if not words or known / len(words) < SEMANTIC_MIN_COVERAGE:
+            return None
+        return store.encode([text])[0]
+
+    return f"store:{id(store.encoder)}:{store.fingerprint}", embed
+
+class SemanticCache:
+    """Bounded ring buffer of answered queries searched by cosine similarity.
+
+    Embeddings are kept unit-normalised in one float32 matrix so a lookup is
+    a single matrix-vector product. A hit must also share the predicted
+    intent, which keeps short, similar-looking questions about different
+    things apart. The oldest entry is overwritten once the buffer is full.
+    """
+
+    def __init__(self, capacity=None, threshold=None, ttl=None):
+        self.capacity = SEMANTIC_CACHE_SIZE if capacity is None else capacity
+        self.threshold = SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._embedder_key = None
+        self._embed = None
+        self._reset()
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.invalidations = 0
+        self.best_scores = []
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def _reset(self):
+        self._vectors = None
+        self._answers = [None] * self.capacity
+        self._intents = [None] * self.capacity
+        self._created = np.zeros(self.capacity, dtype=np.float64)
+        self._next = 0
+        self._size = 0
+
+    def configure(self, embedder_key, embed):
+        """Switch embedding model; stored vectors from another model are dropped"""
+        if embedder_key == self._embedder_key:
+            return
+        with self._lock:
+            had_entries = self._size > 0
+            self._embedder_key = embedder_key
+            self._embed = embed
+            self._reset()
+        if had_entries:
+            self.invalidations += 1
+            print("[OK] Semantic cache invalidated after model change")
+
+    def _vector(self, message):
+        vector = self._embed(message)
+        if vector is None:
+            # Too few known words for the embedding to mean anything
+            return None
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            # Nothing in the vocabulary; similarity would be meaningless
+            return None
+        return vector / norm
+
+    def lookup(self, message, intent=None):
+        """Return (answer, score) for the closest fresh entry above threshold"""
+        if not self.enabled or self._embed is None:
+            return None
+        query = self._vector(message)
+        if query is None:
+            self.skipped += 1
+            return None
+        with self._lock:
+            if self._size == 0 or self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+            scores = self._vectors[:self._size] @ query
+            valid = (time.time() - self._created[:self._size]) <= self.ttl
+            if intent is not None:
+                valid &= np.array([i == intent for i in self._intents[:self._size]], dtype=bool)
+            scores = np.where(valid, scores, -1.0)
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            self._record_score(score)
+            if score >= self.threshold:
+                self.hits += 1
+                return self._answers[best], score
+            self.misses += 1
+            return None
+
+    def add(self, message, answer, intent=None):
+        if not self.enabled or self._embed is None:
+            return
+        vector = self._vector(message)
+        if vector is None:
+            return
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._reset()
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            slot = self._next
+            self._vectors[slot] = vector
+            self._answers[slot] = answer
+            self._intents[slot] = intent
+            self._created[slot] = time.time()
+            self._next = (slot + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def _record_score(self, score):
+        # Recent best similarities, to help pick a threshold from live traffic
+        self.best_scores.append(score)
+        if len(self.best_scores) > 1000:
+            del self.best_scores[:500]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        scores = np.array(self.best_scores) if self.best_scores else None
+        return {
+            "enabled": self.enabled,
+            "embedder": self._embedder_key.split(":", 1)[0] if self._embedder_key else None,
+            "entries": self._size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "best_score_p50": round(float(np.percentile(scores, 50)), 3) if scores is not None else None,
+            "best_score_p90": round(float(np.percentile(scores, 90)), 3) if scores is not None else None,
+        }
+
+response_cache = ResponseCache()
+semantic_cache = SemanticCache()
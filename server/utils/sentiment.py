@@ -1,17 +1,33 @@
 from textblob import TextBlob
+from textblob.en import sentiment as pattern_sentiment
+
+def _label(polarity):
+    if polarity > 0.1:
+        return "positive"
+    elif polarity < -0.1:
+        return "negative"
+    return "neutral"
 
 def analyze_sentiment(text):
     blob = TextBlob(text)
     polarity = blob.sentiment.polarity
     
-    if polarity > 0.1:
-        sentiment = "positive"
-    elif polarity < -0.1:
-        sentiment = "negative"
-    else:
-        sentiment = "neutral"
-    
     return {
-        "sentiment": sentiment,
+        "sentiment": _label(polarity),
         "polarity": round(polarity, 2)
     }
+
+def analyze_sentiment_batch(texts):
+    """Score many messages with the same lexicon TextBlob uses.
+
+    Calls the pattern analyzer directly instead of building a TextBlob per
+    message, and scores repeated messages only once.
+    """
+    scores = {}
+    results = []
+    for text in texts:
+        if text not in scores:
+            polarity = pattern_sentiment(text)[0]
+            scores[text] = {"sentiment": _label(polarity), "polarity": round(polarity, 2)}
+        results.append(dict(scores[text]))
+    return results
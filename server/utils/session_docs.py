@@ -0,0 +1,153 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from utils.embeddings import EmbeddingStore, estimate_tokens
+from utils.pdf_processor import pdf_text_cache
+
+# Per-session PDF context: documents are chunked and BM25-indexed once at
+# upload, and each chat turn pulls only the passages relevant to it
+SESSION_DOCS_MAX_SESSIONS = int(os.getenv("SESSION_DOCS_MAX_SESSIONS", "500"))
+SESSION_DOCS_PER_SESSION = int(os.getenv("SESSION_DOCS_PER_SESSION", "5"))
+SESSION_DOCS_IDLE_TTL = int(os.getenv("SESSION_DOCS_IDLE_TTL", "3600"))
+SESSION_DOC_TOP_K = int(os.getenv("SESSION_DOC_TOP_K", "4"))
+SESSION_DOC_TOKEN_BUDGET = int(os.getenv("SESSION_DOC_TOKEN_BUDGET", "1500"))
+
+# Handles are the SHA-256 of the uploaded bytes
+DOCUMENT_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+class SessionDocuments:
+    """PDF documents attached to chat sessions, addressed by document handle.
+
+    Each session gets a small BM25 EmbeddingStore keyed by document_id,
+    guarded by its own lock since uploads index off the event loop.
+    Sessions are evicted least recently used and after SESSION_DOCS_IDLE_TTL
+    seconds without use. Handles are content hashes, so a worker that has
+    never seen a handle rebuilds it from the shared PDF text cache.
+    """
+
+    def __init__(self):
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        # Counters
+        self.registered = 0
+        self.rebuilt = 0
+        self.evicted = 0
+
+    def _session(self, session_id, create=True):
+        now = time.time()
+        with self._lock:
+            for expired_id in [sid for sid, s in self._sessions.items() if now - s["used"] > SESSION_DOCS_IDLE_TTL]:
+                del self._sessions[expired_id]
+                self.evicted += 1
+            session = self._sessions.get(session_id)
+            if session is None:
+                if not create:
+                    return None
+                session = {"store": EmbeddingStore(mode="bm25"), "documents": OrderedDict(), "used": now, "lock": threading.RLock()}
+                self._sessions[session_id] = session
+                while len(self._sessions) > SESSION_DOCS_MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            session["used"] = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def register(self, session_id, document_id, filename, text, pages):
+        session = self._session(session_id)
+        with session["lock"]:
+            documents = session["documents"]
+            if document_id not in documents:
+                session["store"].add_document(document_id, text, persist=False)
+                documents[document_id] = {"document_id": document_id, "filename": filename, "pages": pages, "tokens": estimate_tokens(text)}
+                self.registered += 1
+                # Oldest attachment makes room for the newest
+                while len(documents) > SESSION_DOCS_PER_SESSION:
+                    old_id, _ = documents.popitem(last=False)
+                    session["store"].delete_document(old_id, persist=False)
+            documents.move_to_end(document_id)
+            return dict(documents[document_id], passages=len(session["store"].documents[document_id]["passage_ids"]))
+
+    def _ensure(self, session, session_id, document_id):
+        if document_id in session["documents"]:
+            return True
+        if not DOCUMENT_ID_PATTERN.fullmatch(document_id):
+            return False
+        # Registered on another worker (or before a restart): rebuild from the cache
+        cached = pdf_text_cache.get(document_id)
+        if cached is None:
+            return False
+        text, pages = cached
+        self.register(session_id, document_id, f"document-{document_id[:12]}.pdf", text, pages)
+        self.rebuilt += 1
+        return True
+
+    def list(self, session_id):
+        session = self._session(session_id, create=False)
+        if session is None:
+            return []
+        with session["lock"]:
+            return list(session["documents"].values())
+
+    def remove(self, session_id, document_id):
+        session = self._session(session_id, create=False)
+        if session is None:
+            return False
+        with session["lock"]:
+            if document_id not in session["documents"]:
+                return False
+            del session["documents"][document_id]
+            session["store"].delete_document(document_id, persist=False)
+        return True
+
+    def retrieve_passages(self, session_id, document_ids, query, top_k=None, token_budget=None):
+        """Passages from the given documents relevant to this turn, best first"""
+        top_k = top_k or SESSION_DOC_TOP_K
+        token_budget = SESSION_DOC_TOKEN_BUDGET if token_budget is None else token_budget
+        session = self._session(session_id)
+        with session["lock"]:
+            wanted = [d for d in document_ids if self._ensure(session, session_id, d)]
+            if not wanted:
+                return []
+            store = session["store"]
+            names = {d: session["documents"][d]["filename"] for d in wanted}
+
+            # Rank every passage in the session and drop other attachments
+            # before applying the budget, so they cannot use it up
+            ranked = [p for p in store.search_passages(query, len(store.passages)) if p['source'] in names]
+            if not ranked:
+                # No term overlap (e.g. "summarize this"): fall back to the opening passages
+                ranked = [dict(store.passages[pid], id=pid, score=0.0, tokens=estimate_tokens(store.passages[pid]['text']))
+                          for document_id in wanted for pid in store.documents[document_id]["passage_ids"]]
+
+        passages = []
+        used = 0
+        for passage in ranked:
+            if used + passage['tokens'] > token_budget:
+                continue
+            passages.append(passage)
+            used += passage['tokens']
+            if len(passages) >= top_k:
+                break
+
+        # Label with the uploaded filename; source stays unique per document for merging
+        return [dict(p, kind="document", document_id=p['source'], source=names[p['source']]) for p in passages]
+
+    def retrieve(self, session_id, document_ids, query, top_k=None, token_budget=None):
+        """Prompt-ready text of retrieve_passages, in document order"""
+        passages = self.retrieve_passages(session_id, document_ids, query, top_k, token_budget)
+        passages.sort(key=lambda p: (p['document_id'], p['start']))
+        return "\n\n".join(f"[{p['source']}]\n{p['text']}" for p in passages)
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "documents": sum(len(s["documents"]) for s in self._sessions.values()),
+            "registered": self.registered,
+            "rebuilt": self.rebuilt,
+            "evicted": self.evicted,
+        }
+
+session_documents = SessionDocuments()
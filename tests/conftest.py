@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Configure before any server module is imported: those read settings at import time
+TEST_DIR = Path(tempfile.mkdtemp(prefix="prat-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR}/test.db"
+os.environ["GEMINI_BACKEND"] = "fake"
+os.environ.setdefault("FAKE_GEMINI_FIRST_TOKEN_MS", "0")
+os.environ.setdefault("FAKE_GEMINI_CHUNK_MS", "0")
+os.environ["PDF_CACHE_DIR"] = str(TEST_DIR / "pdf_text")
+os.environ["PROFILE_DIR"] = str(TEST_DIR / "profiles")
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "server"
+BENCH_DIR = SERVER_DIR.parent / "benchmarks"
+sys.path.insert(0, str(SERVER_DIR))
+
+from utils.database import init_db
+
+init_db()
+
+def run(coro):
+    """Run a coroutine to completion on a fresh event loop"""
+    return asyncio.run(coro)
+
+@pytest.fixture(scope="session")
+def trained_classifier():
+    from utils.ml_model import IntentClassifier
+    classifier = IntentClassifier()
+    classifier.train()
+    return classifier
+
+KB_DOCS = {
+    "about.txt": (
+        "Prat.AI is a hybrid AI assistant that combines classical machine learning with LLM generation. "
+        "It uses intent classification, sentiment analysis and retrieval augmented generation."
+    ),
+    "creator.txt": (
+        "Pratyush created Prat.AI as part of the PratWare initiative. "
+        "PratWare builds transparent and explainable software for developers."
+    ),
+    "cooking.txt": (
+        "To bake bread, mix flour, water, yeast and salt, knead the dough and let it rise before baking."
+    ),
+}
+
+@pytest.fixture
+def kb_dir(tmp_path):
+    directory = tmp_path / "kb"
+    directory.mkdir()
+    for name, text in KB_DOCS.items():
+        (directory / name).write_text(text, encoding="utf-8")
+    return directory
+
+@pytest.fixture
+def store(kb_dir):
+    from utils.embeddings import EmbeddingStore
+    store = EmbeddingStore(mode="bm25")
+    store.build_combined_index([kb_dir])
+    return store
+
+@pytest.fixture
+def dense_store(kb_dir):
+    from utils.embeddings import EmbeddingStore
+    store = EmbeddingStore(mode="dense")
+    store.build_combined_index([kb_dir])
+    return store
+
+@pytest.fixture
+def fresh_db():
+    """Empty conversation tables for one test"""
+    from utils.database import SessionLocal, Conversation, ConversationRollup
+    with SessionLocal() as session:
+        session.query(Conversation).delete()
+        session.query(ConversationRollup).delete()
+        session.commit()
+    yield
+
+@pytest.fixture(scope="session")
+def make_pdf():
+    """The benchmark suite's generator of multi-page text PDFs"""
+    sys.path.insert(0, str(BENCH_DIR))
+    from micro import make_pdf
+    return make_pdf
@@ -0,0 +1,73 @@
+import asyncio
+
+from conftest import run
+from utils.batcher import MicroBatcher, predict_intents
+
+def test_concurrent_calls_share_one_batch():
+    calls = []
+
+    def double(items):
+        calls.append(len(items))
+        return [value * 2 for (value,) in items]
+
+    batcher = MicroBatcher("test", double, max_batch=8, window_ms=50)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert run(scenario()) == [0, 2, 4, 6, 8]
+    assert calls == [5]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["avg_batch_size"] == 5
+
+def test_batches_are_capped_at_max_batch():
+    calls = []
+
+    def identity(items):
+        calls.append(len(items))
+        return [value for (value,) in items]
+
+    batcher = MicroBatcher("test", identity, max_batch=3, window_ms=50)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+        await batcher.stop()
+        return results
+
+    assert run(scenario()) == list(range(7))
+    assert max(calls) == 3
+    assert sum(calls) == 7
+
+def test_batch_failure_reaches_every_caller():
+    def broken(items):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher("test", broken, max_batch=4, window_ms=10)
+
+    async def scenario():
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    assert all(isinstance(result, ValueError) for result in run(scenario()))
+    assert batcher.failed == 2
+
+def test_disabled_batcher_calls_through():
+    batcher = MicroBatcher("test", lambda items: [len(items)], max_batch=1)
+    assert not batcher.enabled
+    assert run(batcher.submit("x")) == 1
+
+class Labeller:
+    def __init__(self, label):
+        self.label = label
+
+    def predict_batch(self, texts):
+        return [f"{self.label}:{text}" for text in texts]
+
+def test_predict_intents_keeps_each_call_on_its_own_classifier():
+    old, new = Labeller("old"), Labeller("new")
+    results = predict_intents([(old, "a"), (new, "b"), (old, "c")])
+    assert results == ["old:a", "new:b", "old:c"]
@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BENCH_DIR
+
+sys.path.insert(0, str(BENCH_DIR))
+
+from common import save_results, summarize
+from compare import flatten
+
+def test_summarize_uses_nearest_rank_percentiles():
+    summary = summarize([i / 1000 for i in range(1, 101)])
+    assert summary["p50"] == 50.0
+    assert summary["p95"] == 95.0
+    assert summary["p99"] == 99.0
+    assert summary["max"] == 100.0
+    assert summarize([]) is None
+
+def test_flatten_keeps_measurements_only():
+    result = {"case": "chat c=8", "route": "chat", "concurrency": 8, "rps": 12.5,
+              "latency_ms": {"p50": 10.0, "p95": 20.0}, "ok": True}
+    assert flatten(result) == {"rps": 12.5, "latency_ms.p50": 10.0, "latency_ms.p95": 20.0}
+
+def write_run(tmp_path, name, rps, p95):
+    results = [{"case": "chat c=8", "rps": rps, "latency_ms": {"p95": p95}}]
+    return save_results("load", results, {"requests": 10}, tmp_path / name)
+
+@pytest.mark.parametrize("rps, p95, failed", [(100, 50, False), (80, 50, True), (100, 70, True), (120, 40, False)])
+def test_compare_flags_regressions_in_either_direction(tmp_path, rps, p95, failed):
+    baseline = write_run(tmp_path, "base.json", 100, 50)
+    candidate = write_run(tmp_path, "cand.json", rps, p95)
+    assert json.loads(baseline.read_text())["benchmark"] == "load"
+    result = subprocess.run(
+        [sys.executable, str(BENCH_DIR / "compare.py"), str(baseline), str(candidate), "--threshold", "10", "--fail"],
+        capture_output=True, text=True,
+    )
+    assert (result.returncode != 0) == failed
+    assert ("REGRESSION" in result.stdout) == failed
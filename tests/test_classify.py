@@ -0,0 +1,47 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import classify
+from utils.registry import registry
+from utils.sentiment import analyze_sentiment, analyze_sentiment_batch
+
+MESSAGES = ["Hello there!", "This is terrible and I hate it", "Thanks a lot, great work", "who are you", "Hello there!"]
+
+@pytest.fixture
+def client(trained_classifier):
+    saved = dict(registry._components)
+    registry.swap("classifier", trained_classifier)
+    app = FastAPI()
+    app.include_router(classify.router, prefix="/api")
+    yield TestClient(app)
+    registry._components.clear()
+    registry._components.update(saved)
+
+def test_batch_matches_single_message_predictions(trained_classifier):
+    batch = trained_classifier.predict_batch(MESSAGES)
+    for message, result in zip(MESSAGES, batch):
+        single = trained_classifier.predict(message)
+        assert result["intent"] == single["intent"]
+        assert result["confidence"] == pytest.approx(single["confidence"])
+
+def test_batch_sentiment_matches_textblob():
+    for message, result in zip(MESSAGES, analyze_sentiment_batch(MESSAGES)):
+        assert result == analyze_sentiment(message)
+
+def test_batch_endpoint_streams_one_line_per_message_in_chunks(client, trained_classifier):
+    response = client.post("/api/classify/batch", json={"messages": MESSAGES, "chunk_size": 2})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["index"] for row in rows] == list(range(len(MESSAGES)))
+    assert rows[0]["intent"] == trained_classifier.predict(MESSAGES[0])["intent"]
+    assert rows[1]["sentiment"] == analyze_sentiment(MESSAGES[1])["sentiment"]
+
+    no_sentiment = client.post("/api/classify/batch", json={"messages": MESSAGES[:1], "sentiment": False})
+    assert "sentiment" not in json.loads(no_sentiment.text)
+
+def test_batch_endpoint_rejects_oversized_requests(client, monkeypatch):
+    monkeypatch.setattr(classify, "CLASSIFY_BATCH_LIMIT", 3)
+    assert client.post("/api/classify/batch", json={"messages": MESSAGES}).status_code == 413
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from utils import compact_model
+from utils.compact_model import CompactIntentModel
+
+MESSAGES = [
+    "Hello there!", "who are you", "Thanks a lot", "bye for now",
+    "Explain retrieval augmented generation", "", "PratWare PratWare PratWare",
+]
+
+@pytest.fixture
+def exported(trained_classifier, tmp_path):
+    trained_classifier.save(tmp_path)
+    model = CompactIntentModel()
+    model.load(tmp_path)
+    return model
+
+def test_compact_model_matches_sklearn_predictions(trained_classifier, exported):
+    expected = trained_classifier.predict_batch(MESSAGES)
+    actual = exported.predict_batch(MESSAGES)
+    for want, got in zip(expected, actual):
+        assert got["intent"] == want["intent"]
+        assert got["confidence"] == pytest.approx(want["confidence"], abs=1e-9)
+        assert got["responses"] == want["responses"]
+    assert exported.predict("who are you")["intent"] == expected[1]["intent"]
+
+def test_compact_features_match_the_vectorizer(trained_classifier, exported):
+    for message in MESSAGES:
+        assert np.allclose(exported.embed(message), trained_classifier.embed(message))
+
+def test_reexport_is_detected(trained_classifier, exported, tmp_path, monkeypatch):
+    monkeypatch.setattr(compact_model, "MODEL_RELOAD_INTERVAL", 0)
+    assert not exported.changed_on_disk(tmp_path)
+    trained_classifier.export_compact(tmp_path)
+    assert exported.changed_on_disk(tmp_path)
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from utils.embeddings import EmbeddingStore, chunk_text, estimate_tokens
+
+def test_dense_search_ranks_related_passage_first(dense_store):
+    results = dense_store.search_passages("who created PratWare", top_k=1)
+    assert results[0]["source"] == "creator.txt"
+
+def test_resave_keeps_memory_mapped_vectors_intact(dense_store, tmp_path):
+    dense_store.save(tmp_path)
+    reader = EmbeddingStore(mode="dense")
+    reader.load(tmp_path)
+    assert isinstance(reader.vectors, np.memmap)
+    before = np.array(reader.vectors)
+    inode = os.stat(tmp_path / "vectors.npy").st_ino
+
+    # Saving again must not write through the mapping another reader holds
+    dense_store.save(tmp_path)
+    assert os.stat(tmp_path / "vectors.npy").st_ino != inode
+    assert np.array_equal(np.array(reader.vectors), before)
+    assert not list(tmp_path.glob("*.tmp"))
+    assert reader.search_passages("who created PratWare", top_k=1)[0]["source"] == "creator.txt"
+
+def test_chunks_overlap_and_map_back_to_the_source():
+    text = " ".join(f"word{i}" for i in range(25))
+    passages = chunk_text(text, "doc.txt", chunk_words=10, overlap=3)
+    assert [p["chunk"] for p in passages] == [0, 1, 2, 3]
+    assert passages[0]["text"].split() == [f"word{i}" for i in range(10)]
+    # Each window starts `overlap` words before the previous one ended
+    assert passages[1]["text"].split()[:3] == [f"word{i}" for i in range(7, 10)]
+    assert passages[-1]["text"].endswith("word24")
+    for passage in passages:
+        assert text[passage["start"]:passage["end"]] == passage["text"]
+
+def test_bm25_ranking_is_a_top_k_of_the_full_scores(store):
+    query = "bread flour yeast PratWare Prat.AI"
+    scores = store._score(query)
+    full = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    assert store._bm25_rank(query, 2) == full[:2]
+    assert store._bm25_rank(query, 100) == full
+
+def test_passages_respect_the_token_budget(store):
+    results = store.search_passages("Prat.AI PratWare bread", top_k=5, token_budget=60)
+    assert results
+    assert sum(p["tokens"] for p in results) <= 60
+    assert all(p["tokens"] == estimate_tokens(p["text"]) for p in results)
+    assert store.search_passages("knead the dough", top_k=1)[0]["source"] == "cooking.txt"
+
+def test_bm25_prefers_rare_terms_and_survives_a_reload(store, tmp_path):
+    # "prat" appears in two documents, "yeast" only in one
+    ranked = store._bm25_rank("prat yeast", 3)
+    assert store.passages[ranked[0][0]]["source"] == "cooking.txt"
+    assert store.search_passages("unrelated zebra") == []
+
+    store.save(tmp_path)
+    reloaded = EmbeddingStore(mode="bm25")
+    reloaded.load(tmp_path)
+    assert reloaded._bm25_rank("prat yeast", 3) == ranked
+
+def test_other_workers_replay_incremental_segments(store, tmp_path):
+    store.save(tmp_path)
+    reader = EmbeddingStore(mode="bm25")
+    reader.load(tmp_path)
+    assert reader.fingerprint == store.fingerprint
+
+    added = store.add_document("garden.txt", "Tomatoes need sun, compost and steady watering.", save_dir=tmp_path)
+    assert added["status"] == "added"
+    assert store.add_document("garden.txt", "Tomatoes need sun, compost and steady watering.", save_dir=tmp_path)["status"] == "unchanged"
+    store.delete_document("cooking.txt", save_dir=tmp_path)
+    assert len(list((tmp_path / "segments").iterdir())) == 2
+
+    assert reader.reload_if_changed(tmp_path)
+    assert reader.search_passages("compost watering", top_k=1)[0]["source"] == "garden.txt"
+    assert reader.search_passages("knead dough yeast") == []
+    assert reader.fingerprint == store.fingerprint
+    assert not reader.reload_if_changed(tmp_path)
+
+def test_writer_keeps_segments_it_has_not_seen_yet(store, tmp_path):
+    store.save(tmp_path)
+    other = EmbeddingStore(mode="bm25")
+    other.load(tmp_path)
+    other.add_document("garden.txt", "Tomatoes need sun, compost and steady watering.", save_dir=tmp_path)
+
+    store.add_document("notes.txt", "Meeting notes about the quarterly roadmap.", save_dir=tmp_path)
+    assert "garden.txt" in store.documents
+    assert store.last_segment == 2
+
+    # A segment still being written leaves a gap the writer must not skip over
+    (tmp_path / "segments" / "00000003.pkl").touch()
+    store.add_document("travel.txt", "Pack light and book trains early.", save_dir=tmp_path)
+    assert store.last_segment == 2
+    store.save(tmp_path)
+    assert sorted(os.listdir(tmp_path / "segments")) == ["00000003.pkl", "00000004.pkl"]
+
+    fresh = EmbeddingStore(mode="bm25")
+    fresh.load(tmp_path)
+    assert {"garden.txt", "notes.txt"} <= set(fresh.documents)
+
+def test_save_compacts_tombstones_and_folds_segments(store, tmp_path):
+    store.save(tmp_path)
+    before = store.fingerprint
+    store.delete_document("cooking.txt", save_dir=tmp_path)
+    assert store.fingerprint != before
+    assert None in store.passages
+
+    store.save(tmp_path)
+    assert None not in store.passages
+    assert not store.deleted
+    assert list((tmp_path / "segments").iterdir()) == []
+    fresh = EmbeddingStore(mode="bm25")
+    fresh.load(tmp_path)
+    assert sorted(fresh.documents) == ["about.txt", "creator.txt"]
+    assert fresh.search_passages("PratWare developers", top_k=1)[0]["source"] == "creator.txt"
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import run
+from utils.executors import BoundedPool
+
+def test_results_and_failures_are_counted():
+    pool = BoundedPool("t", 2, max_queue=2)
+
+    async def scenario():
+        assert await pool.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(lambda: 1 / 0)
+
+    run(scenario())
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+    pool.shutdown()
+
+def test_callers_beyond_workers_and_queue_wait_for_a_slot():
+    pool = BoundedPool("t", 1, max_queue=0)
+    gate = threading.Event()
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(gate.wait))
+        second = asyncio.ensure_future(pool.run(lambda: "second"))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["waiting_for_slot"] == 1
+        gate.set()
+        assert await second == "second"
+        await first
+
+    try:
+        run(scenario())
+    finally:
+        gate.set()
+        pool.shutdown()
+    assert pool.stats()["waiting_for_slot"] == 0
+
+def test_cancelled_callers_do_not_leak_in_flight_or_waiting():
+    pool = BoundedPool("t", 1, max_queue=0)
+    gate = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(gate.wait))
+        waiting = asyncio.ensure_future(pool.run(lambda: None))
+        await asyncio.sleep(0.05)
+        # Client disconnects: both the running and the queued caller are cancelled
+        waiting.cancel()
+        running.cancel()
+        await asyncio.gather(running, waiting, return_exceptions=True)
+        stats = pool.stats()
+        assert stats["in_flight"] == 0
+        assert stats["waiting_for_slot"] == 0
+        assert stats["cancelled"] == 1
+
+        # The abandoned call still occupies the only worker, so its slot is not handed out yet
+        late = asyncio.ensure_future(pool.run(lambda: "late"))
+        await asyncio.sleep(0.05)
+        assert not late.done()
+        gate.set()
+        assert await asyncio.wait_for(late, 1) == "late"
+
+    try:
+        run(scenario())
+    finally:
+        # Never leave a worker blocked, or shutdown would hang on a failure
+        gate.set()
+        pool.shutdown()
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.history import router
+from utils.database import Conversation, SessionLocal, decode_cursor
+
+BASE = datetime(2026, 3, 1, 12, 0, 0)
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    return TestClient(app)
+
+@pytest.fixture
+def conversations(fresh_db):
+    # Two turns share each timestamp so pages have to break ties on id
+    with SessionLocal() as session:
+        for i in range(25):
+            session.add(Conversation(
+                session_id="paged", user_message=f"question {i}", bot_response=f"answer {i}",
+                intent="general", confidence=0.5, sentiment="neutral", response_type="llm_gemini",
+                timestamp=BASE + timedelta(minutes=i // 2),
+            ))
+        session.add(Conversation(session_id="other", user_message="elsewhere", bot_response="-", timestamp=BASE))
+        session.commit()
+
+def test_history_pages_walk_back_without_gaps_or_repeats(client, conversations):
+    seen = []
+    before = None
+    while True:
+        params = {"session_id": "paged", "limit": 7}
+        if before:
+            params["before"] = before
+        response = client.get("/api/history", params=params)
+        assert response.status_code == 200
+        page = [row["user_message"] for row in response.json()]
+        seen = page + seen
+        before = response.headers.get("X-Next-Cursor")
+        if not before:
+            break
+        decode_cursor(before)
+    assert seen == [f"question {i}" for i in range(25)]
+
+def test_history_limit_must_be_positive(client, conversations):
+    assert client.get("/api/history", params={"session_id": "paged", "limit": 0}).status_code == 422
+    assert client.get("/api/history", params={"before": "not-a-cursor"}).status_code == 400
+
+def test_export_streams_every_batch(client, conversations, monkeypatch):
+    monkeypatch.setattr("routes.history.EXPORT_BATCH_SIZE", 4)
+    response = client.get("/api/history/export", params={"session_id": "paged"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["user_message"] for row in rows] == [f"question {i}" for i in range(25)]
+
+    response = client.get("/api/history/export", params={"session_id": "paged", "format": "csv"})
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("id,session_id,timestamp")
+    assert len(lines) == 26
+
+def test_export_range_accepts_timezone_aware_bounds(client, conversations):
+    # 14:00+02:00 is 12:00 UTC, the first stored (naive UTC) timestamp
+    start = datetime(2026, 3, 1, 14, 0, 0, tzinfo=timezone(timedelta(hours=2)))
+    end = start + timedelta(minutes=2)
+    response = client.get("/api/history/export", params={
+        "session_id": "paged", "start": start.isoformat(), "end": end.isoformat()
+    })
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["user_message"] for row in rows] == [f"question {i}" for i in range(4)]
+
+    naive = client.get("/api/history/export", params={
+        "session_id": "paged", "start": BASE.isoformat(), "end": (BASE + timedelta(minutes=2)).isoformat()
+    })
+    assert naive.text == response.text
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import run
+from utils import artifacts, jobs
+from utils.jobs import JobManager
+from utils.registry import registry
+
+class StubStore:
+    def __init__(self):
+        self.synced = []
+
+    def sync_dirs(self, dirs):
+        self.synced.append(dirs)
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "MODELS_DIR", tmp_path)
+    reloaded = []
+    monkeypatch.setattr(registry, "reload", reloaded.append)
+    monkeypatch.setitem(registry._components, "store", StubStore())
+    manager = JobManager()
+    manager.reloaded = reloaded
+    return manager
+
+def fake_supervise(outcome, gate=None):
+    def supervise(job, staged):
+        if gate is not None:
+            gate.wait(5)
+        (staged / "built.txt").write_text(job.kind)
+        job.progress, job.message = 0.5, "Halfway"
+        if outcome == "failed":
+            job.error = "boom"
+        return outcome
+    return supervise
+
+def test_successful_job_is_published_and_reloaded(manager, monkeypatch, tmp_path):
+    monkeypatch.setattr(manager, "_supervise", fake_supervise("done"))
+
+    async def scenario():
+        job = await manager.submit("embed")
+        await asyncio.wait_for(job.wait(), 10)
+        await manager.stop()
+        return job
+
+    job = run(scenario())
+    assert job.status == "succeeded"
+    assert job.progress == 1.0
+    assert (artifacts.artifact_dir("store") / "built.txt").read_text() == "embed"
+    assert artifacts.versions("store") == [job.version]
+    assert manager.reloaded == ["store"]
+    assert registry._components["store"].synced
+
+def test_failed_job_discards_its_staging_directory(manager, monkeypatch, tmp_path):
+    monkeypatch.setattr(manager, "_supervise", fake_supervise("failed"))
+
+    async def scenario():
+        job = await manager.submit("train")
+        await asyncio.wait_for(job.wait(), 10)
+        await manager.stop()
+        return job
+
+    job = run(scenario())
+    assert job.status == "failed"
+    assert job.to_dict()["error"] == "boom"
+    assert artifacts.versions("classifier") == []
+    assert list((tmp_path / "classifier").iterdir()) == []
+    assert manager.reloaded == []
+
+def test_queued_jobs_are_deduplicated_and_cancellable(manager, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(manager, "_supervise", fake_supervise("done", gate))
+
+    async def scenario():
+        running = await manager.submit("train")
+        await asyncio.sleep(0.05)
+        queued = await manager.submit("train")
+        assert await manager.submit("train") is queued
+        manager.cancel(queued.id)
+        gate.set()
+        await asyncio.wait_for(running.wait(), 10)
+        await manager.stop()
+        return running, queued
+
+    running, queued = run(scenario())
+    assert running.status == "succeeded"
+    assert queued.status == "cancelled"
+    assert manager.stats()["jobs"] == {"succeeded": 1, "cancelled": 1}
+
+def test_unknown_job_kind_is_rejected(manager):
+    with pytest.raises(ValueError):
+        run(manager.submit("compile"))
+
+def test_job_runs_in_a_worker_process_with_progress(manager, monkeypatch):
+    # The real supervisor: a spawned process builds the index into the staging directory
+    monkeypatch.setattr(jobs, "JOB_POLL_MS", 50)
+
+    async def scenario():
+        job = await manager.submit("embed")
+        await asyncio.wait_for(job.wait(), 120)
+        await manager.stop()
+        return job
+
+    job = run(scenario())
+    assert job.status == "succeeded", job.error
+    assert job.result
+    assert (artifacts.artifact_dir("store") / "documents.pkl").exists()
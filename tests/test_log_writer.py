@@ -0,0 +1,53 @@
+from conftest import run
+from routes.reset import reset_conversation
+from utils.database import get_chat_history
+from utils.log_writer import ConversationWriter, conversation_writer
+
+def turn(writer, i, session_id):
+    return writer.log(f"question {i}", f"answer {i}", "general", 0.5, "neutral", "llm_gemini", session_id)
+
+def test_rows_are_written_in_batches(fresh_db):
+    writer = ConversationWriter(batch_size=3, flush_ms=10_000)
+
+    async def scenario():
+        await writer.start()
+        for i in range(7):
+            await turn(writer, i, "batched")
+        await writer.stop()
+
+    run(scenario())
+    assert writer.written == 7
+    # Two full batches, then the remainder flushed on stop
+    assert writer.flushes == 3
+    assert [row["user_message"] for row in get_chat_history("batched")] == [f"question {i}" for i in range(7)]
+
+def test_flush_waits_for_buffered_rows(fresh_db):
+    writer = ConversationWriter(batch_size=100, flush_ms=10_000)
+
+    async def scenario():
+        await writer.start()
+        await turn(writer, 0, "flushed")
+        await writer.flush()
+        count = len(get_chat_history("flushed"))
+        await writer.stop()
+        return count
+
+    assert run(scenario()) == 1
+
+def test_reset_deletes_rows_still_buffered(fresh_db, monkeypatch):
+    monkeypatch.setattr(conversation_writer, "flush_interval", 10)
+
+    async def scenario():
+        await conversation_writer.start()
+        try:
+            for i in range(3):
+                await turn(conversation_writer, i, "reset-me")
+            result = await reset_conversation("reset-me")
+        finally:
+            await conversation_writer.stop()
+        return result
+
+    result = run(scenario())
+    assert result.status == "success"
+    assert "Cleared 3" in result.message
+    assert get_chat_history("reset-me") == []
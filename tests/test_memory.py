@@ -0,0 +1,58 @@
+from conftest import run
+from utils import memory
+from utils.database import log_conversation
+from utils.log_writer import ConversationWriter
+from utils.memory import ConversationMemory, SessionMemory, gist
+
+def test_old_turns_fold_into_a_bounded_summary(monkeypatch):
+    monkeypatch.setattr(memory, "MEMORY_TURNS", 2)
+    monkeypatch.setattr(memory, "MEMORY_SUMMARY_TOKENS", 40)
+    session = SessionMemory()
+    for i in range(10):
+        session.add(f"Question number {i}. With a second sentence.", f"Answer number {i}.")
+    assert [turn["user"] for turn in session.turns] == ["Question number 8. With a second sentence.", "Question number 9. With a second sentence."]
+    # Only the newest gists fit the summary budget, first sentences only
+    assert session.summary.endswith(gist("Question number 7.", "Answer number 7."))
+    assert "Question number 0" not in session.summary
+    assert "second sentence" not in session.summary
+    assert session.summary_tokens <= 40
+
+def test_session_is_seeded_from_the_log_once(fresh_db):
+    log_conversation("What is Prat.AI? [PDF: Yes]", "A hybrid assistant.", "identity", 0.9, "neutral", "llm_gemini", "seeded")
+    conversation_memory = ConversationMemory()
+
+    history, summary = run(conversation_memory.context("seeded"))
+    assert history == [{"user": "What is Prat.AI?", "assistant": "A hybrid assistant."}]
+    assert summary == ""
+
+    run(conversation_memory.add("seeded", "And who made it?", "Pratyush."))
+    history, _ = run(conversation_memory.context("seeded"))
+    assert len(history) == 2
+    assert conversation_memory.seeded == 1
+    assert conversation_memory.hits == 1
+
+    conversation_memory.clear("seeded")
+    assert conversation_memory.stats()["sessions"] == 0
+
+def test_turns_of_a_session_not_loaded_yet_are_kept(fresh_db, monkeypatch):
+    writer = ConversationWriter(batch_size=100, flush_ms=10_000)
+    monkeypatch.setattr(memory, "conversation_writer", writer)
+    conversation_memory = ConversationMemory()
+
+    async def scenario():
+        await writer.start()
+        # A greeting answered locally: logged (still buffered) but never read back
+        await writer.log("hi", "Hello!", "greeting", 0.9, "positive", "ml_local", "early")
+        await conversation_memory.add("early", "hi", "Hello!")
+        await writer.log("what is Prat.AI", "A hybrid assistant.", "identity", 0.9, "neutral", "llm_gemini", "early")
+        await conversation_memory.add("early", "what is Prat.AI", "A hybrid assistant.")
+        context = await conversation_memory.context("early")
+        await writer.stop()
+        return context
+
+    history, _ = run(scenario())
+    assert history == [
+        {"user": "hi", "assistant": "Hello!"},
+        {"user": "what is Prat.AI", "assistant": "A hybrid assistant."},
+    ]
+    assert conversation_memory.seeded == 1
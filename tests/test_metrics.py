@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.metrics import router
+from utils.metrics import Histogram, Metrics
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram([1, 5, 10])
+    for value in [0.5, 1, 3, 7, 20]:
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.percentile(0.5) == 5
+    assert histogram.percentile(1.0) == float("inf")
+    assert histogram.snapshot()["count"] == 5
+
+def test_render_prometheus_text():
+    metrics = Metrics(enabled=True)
+    metrics.describe("responses_total", "counter", "Answers by route")
+    metrics.inc("responses_total", route="chat", response_type="llm_cached")
+    metrics.inc("responses_total", route="chat", response_type="llm_cached")
+    metrics.observe("stage_seconds", 0.003, buckets=[0.001, 0.01], stage="classify", route='a"b')
+    metrics.add_collector(lambda: [("queue_depth", {"pool": "io"}, 3)])
+    text = metrics.render()
+
+    assert "# HELP prat_responses_total Answers by route" in text
+    assert 'prat_responses_total{response_type="llm_cached",route="chat"} 2' in text
+    # Buckets are cumulative and end at +Inf
+    assert 'prat_stage_seconds_bucket{route="a\\"b",stage="classify",le="0.001"} 0' in text
+    assert 'prat_stage_seconds_bucket{route="a\\"b",stage="classify",le="0.01"} 1' in text
+    assert 'prat_stage_seconds_bucket{route="a\\"b",stage="classify",le="+Inf"} 1' in text
+    assert 'prat_stage_seconds_count{route="a\\"b",stage="classify"} 1' in text
+    assert "# TYPE prat_queue_depth gauge" in text
+    assert 'prat_queue_depth{pool="io"} 3' in text
+
+def test_timer_and_disabled_metrics():
+    metrics = Metrics(enabled=True)
+    with metrics.timer("retrieval", route="chat"):
+        pass
+    assert "prat_stage_seconds_count" in metrics.render()
+
+    off = Metrics(enabled=False)
+    off.inc("responses_total")
+    with off.timer("retrieval"):
+        pass
+    assert off.render() == "\n"
+
+def test_metrics_endpoint_exports_component_gauges():
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    response = TestClient(app).get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "prat_response_cache_hits" in response.text
+    assert 'prat_pool_in_flight{pool="cpu"}' in response.text
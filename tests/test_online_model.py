@@ -0,0 +1,80 @@
+import pytest
+
+from utils import artifacts, online_model
+from utils.online_model import ONLINE_MODEL_FILE, OnlineIntentClassifier
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "MODELS_DIR", tmp_path)
+    monkeypatch.setattr(online_model, "ONLINE_EPOCHS", 2)
+    monkeypatch.setattr(online_model, "MODEL_RELOAD_INTERVAL", 0)
+    return tmp_path
+
+def publish_classifier(files):
+    staged = artifacts.staging_dir("classifier")
+    for name, text in files.items():
+        (staged / name).write_text(text)
+    return artifacts.publish("classifier", staged)
+
+def test_save_publishes_a_classifier_version(models_dir):
+    first = publish_classifier({"intent_model.npz": "batch model"})
+    online = OnlineIntentClassifier()
+    online.bootstrap()
+    online.save()
+
+    live = artifacts.artifact_dir("classifier")
+    assert live.name != first
+    assert (live / ONLINE_MODEL_FILE).exists()
+    # The rest of the classifier version comes along unchanged
+    assert (live / "intent_model.npz").read_text() == "batch model"
+    assert not (models_dir / ONLINE_MODEL_FILE).exists()
+    assert not online.changed_on_disk()
+
+def test_workers_follow_new_versions_and_rollbacks(models_dir):
+    publish_classifier({})
+    writer = OnlineIntentClassifier()
+    writer.bootstrap()
+    writer.save()
+    before = artifacts.artifact_dir("classifier").name
+
+    reader = OnlineIntentClassifier()
+    reader.load()
+    writer.update([{"message": "who built you", "intent": writer.intent_labels[0]}])
+    writer.save()
+    assert reader.changed_on_disk()
+    reader.load()
+    assert reader.examples_seen == writer.examples_seen
+
+    # Rolling the classifier back restores the older weights
+    (models_dir / "classifier" / artifacts.POINTER_FILE).write_text(before)
+    assert reader.changed_on_disk()
+    reader.load()
+    assert reader.examples_seen < writer.examples_seen
+
+def test_full_retrain_carries_online_weights_forward(models_dir):
+    publish_classifier({})
+    online = OnlineIntentClassifier()
+    online.bootstrap()
+    online.save()
+
+    staged = artifacts.staging_dir("classifier")
+    (staged / "intent_model.npz").write_text("retrained")
+    assert artifacts.inherit("classifier", staged, [ONLINE_MODEL_FILE]) == [ONLINE_MODEL_FILE]
+    artifacts.publish("classifier", staged)
+
+    reloaded = OnlineIntentClassifier()
+    reloaded.load()
+    assert reloaded.examples_seen == online.examples_seen
+
+def test_flat_layout_saves_in_place(models_dir):
+    (models_dir / "vectors.npy").write_text("store file")
+    online = OnlineIntentClassifier()
+    online.bootstrap()
+    online.save()
+    assert (models_dir / ONLINE_MODEL_FILE).exists()
+    assert artifacts.versions("classifier") == []
+
+    # Only named files are inherited from the mixed flat directory
+    staged = artifacts.staging_dir("classifier")
+    assert artifacts.inherit("classifier", staged, [ONLINE_MODEL_FILE]) == [ONLINE_MODEL_FILE]
+    assert not (staged / "vectors.npy").exists()
@@ -0,0 +1,74 @@
+import io
+import os
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from conftest import run
+from utils import pdf_processor
+from utils.pdf_processor import PDFTextCache, extract_text, extract_upload, stream_pages
+
+@pytest.fixture
+def text_cache(tmp_path, monkeypatch):
+    cache = PDFTextCache(tmp_path / "pdf_text")
+    monkeypatch.setattr(pdf_processor, "pdf_text_cache", cache)
+    monkeypatch.setattr(pdf_processor, "UPLOADS_DIR", tmp_path / "uploads")
+    return cache
+
+def upload(content):
+    return UploadFile(file=io.BytesIO(content), filename="doc.pdf")
+
+def test_pages_stream_in_order_across_parallel_ranges(make_pdf, tmp_path):
+    content = make_pdf(7, lines_per_page=3)
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(content)
+
+    async def collect():
+        return [text async for text in stream_pages(path, pages_per_task=2)]
+
+    pages = run(collect())
+    assert len(pages) == 7
+    assert "\n".join(pages).strip() == extract_text(content)
+
+def test_upload_is_spooled_extracted_and_removed(make_pdf, text_cache, tmp_path):
+    content = make_pdf(3, lines_per_page=2)
+    text, pages, digest = run(extract_upload(upload(content)))
+    assert pages == 3
+    assert text == extract_text(content)
+    assert len(digest) == 64
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+def test_oversized_upload_is_rejected_without_leftovers(make_pdf, text_cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_processor, "PDF_MAX_UPLOAD_MB", 0)
+    with pytest.raises(ValueError):
+        run(extract_upload(upload(make_pdf(1))))
+    assert list((tmp_path / "uploads").iterdir()) == []
+
+def test_identical_upload_is_answered_from_the_cache(make_pdf, text_cache, monkeypatch):
+    content = make_pdf(2, lines_per_page=2)
+    first = run(extract_upload(upload(content)))
+
+    def no_parsing(*args, **kwargs):
+        raise AssertionError("cached PDF was parsed again")
+
+    monkeypatch.setattr(pdf_processor, "stream_pages", no_parsing)
+    assert run(extract_upload(upload(content))) == first
+    assert text_cache.stats()["hits"] == 1
+    assert text_cache.stats()["misses"] == 1
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = PDFTextCache(tmp_path)
+    for i, digest in enumerate(["a" * 64, "b" * 64, "c" * 64]):
+        cache.put(digest, "x" * 60, 1)
+        # Distinct, increasing access times regardless of filesystem resolution
+        os.utime(cache._path(digest), (1000 + i, 1000 + i))
+    os.utime(cache._path("a" * 64), (2000, 2000))
+    # Room for exactly the two entries that should stay; entry sizes vary
+    # slightly, so measure them rather than assuming they are equal
+    sizes = {d: cache._path(d * 64).stat().st_size for d in "abc"}
+    cache.max_bytes = sizes["a"] + sizes["c"] + sizes["b"] // 2
+    cache.evict()
+    assert cache.get("a" * 64) == ("x" * 60, 1)
+    assert cache.get("b" * 64) is None
+    assert cache.get("c" * 64) is not None
+    assert cache.evictions == 1
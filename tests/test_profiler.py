@@ -0,0 +1,69 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import profile as profile_routes
+from utils import profiler
+from utils.profiler import ProfilerMiddleware, RequestProfiler
+
+@pytest.fixture
+def request_profiler(tmp_path, monkeypatch):
+    instance = RequestProfiler(rate=0, directory=tmp_path)
+    monkeypatch.setattr(profile_routes, "request_profiler", instance)
+    monkeypatch.setattr(profiler, "PROFILE_INTERVAL_MS", 1)
+    return instance
+
+def admin_client():
+    app = FastAPI()
+    app.include_router(profile_routes.router, prefix="/api")
+    return TestClient(app)
+
+def test_admin_endpoints_are_disabled_without_a_token(request_profiler, monkeypatch):
+    monkeypatch.setattr(profile_routes, "PROFILE_TOKEN", "")
+    client = admin_client()
+    assert client.get("/api/profile").status_code == 404
+    assert client.post("/api/profile", json={"rate": 1.0}).status_code == 404
+    assert request_profiler.rate == 0
+
+def test_admin_endpoints_require_the_token(request_profiler, monkeypatch):
+    monkeypatch.setattr(profile_routes, "PROFILE_TOKEN", "secret")
+    client = admin_client()
+    assert client.get("/api/profile", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    response = client.post("/api/profile", json={"rate": 0.5}, headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    assert request_profiler.rate == 0.5
+    assert client.get("/api/profile/../../etc.folded", headers={"X-Profile-Token": "secret"}).status_code == 404
+
+def test_sampling_is_limited_to_profiled_routes(request_profiler, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_TOKEN", "secret")
+    assert not request_profiler.wants("/api/chat", [])
+    assert request_profiler.wants("/api/chat", [(b"x-profile", b"secret")])
+    assert not request_profiler.wants("/api/chat", [(b"x-profile", b"guess")])
+    request_profiler.rate = 1.0
+    assert request_profiler.wants("/api/stream", [])
+    assert not request_profiler.wants("/api/history", [])
+
+def test_profiled_request_writes_a_collapsed_stack_file(request_profiler):
+    request_profiler.rate = 1.0
+    app = FastAPI()
+
+    @app.post("/api/chat")
+    def chat():
+        # Sync handler: runs in a pool thread the sampler has to pick up
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    app.add_middleware(ProfilerMiddleware, profiler=request_profiler)
+    response = TestClient(app).post("/api/chat")
+    profile_id = response.headers["x-profile-id"]
+
+    [name] = request_profiler.recent()
+    assert profile_id in name
+    lines = (request_profiler.directory / name).read_text().splitlines()
+    assert any("chat (test_profiler.py" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert request_profiler.stats()["written"] == 1
@@ -0,0 +1,50 @@
+from utils.embeddings import chunk_text, estimate_tokens
+from utils.prompt_builder import PromptBuilder, compress, uncovered_spans
+
+PERSONA = "I am Prat.AI."
+
+def passage(text, score, kind="knowledge", source="kb.txt", **extra):
+    return dict(text=text, score=score, kind=kind, source=source, **extra)
+
+def test_prompt_stays_within_budget_and_reports_sections():
+    builder = PromptBuilder(budget=120, history_tokens=40)
+    passages = [passage(f"fact number {i} " * 20, score=1.0 - i / 10) for i in range(5)]
+    history = [{"user": f"question {i}", "assistant": f"answer {i}"} for i in range(10)]
+    prompt = builder.build(PERSONA, "What now?", passages, history, summary="Earlier we talked about bread.")
+
+    assert prompt.sections["total"] <= 120
+    assert prompt.sections["history"] <= 40
+    assert prompt.text.startswith(PERSONA)
+    assert prompt.text.endswith("User: What now?\nPrat.AI:")
+    # Newest turns are kept, the summary goes first
+    assert "answer 9" in prompt.text and "answer 0" not in prompt.text
+    assert prompt.text.index("Summary of earlier") < prompt.text.index("answer 9")
+    assert prompt.dropped > 0
+    assert builder.stats()["prompts"] == 1
+
+def test_attached_documents_outrank_the_knowledge_base():
+    builder = PromptBuilder(budget=1000)
+    prompt = builder.build(PERSONA, "q", [
+        passage("knowledge text", 0.9),
+        passage("document text", 0.1, kind="document", source="lease.pdf"),
+    ])
+    assert prompt.text.index("PDF Content:") < prompt.text.index("Context from knowledge base:")
+
+def test_overlapping_chunks_send_each_word_once():
+    text = " ".join(f"w{i}" for i in range(40))
+    chunks = [dict(c, kind="knowledge", score=1.0) for c in chunk_text(text, "doc.txt", chunk_words=20, overlap=10)]
+    prompt = PromptBuilder(budget=2000).build(PERSONA, "q", chunks + [dict(chunks[0])])
+    for i in range(40):
+        assert prompt.text.count(f"w{i} ") + prompt.text.count(f"w{i}\n") <= 1
+    assert prompt.deduped == 1
+
+def test_best_passage_is_truncated_rather_than_dropped():
+    huge = passage("word " * 2000, 1.0)
+    prompt = PromptBuilder(budget=200).build(PERSONA, "q", [huge])
+    assert "word" in prompt.text
+    assert prompt.sections["total"] <= 200 + estimate_tokens("Context from knowledge base:") + 2
+
+def test_helpers():
+    assert compress("  a   b\n\n\nc \t d  ") == "a b\nc d"
+    assert uncovered_spans(0, 10, [(3, 5), (8, 12)]) == [(0, 3), (5, 8)]
+    assert uncovered_spans(0, 10, [(0, 10)]) == []
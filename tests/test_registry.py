@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+from conftest import run
+from utils.registry import ModelRegistry
+
+class FakeClassifier:
+    ready = True
+
+    def __init__(self, version):
+        self.version = version
+        self.stale = False
+
+    def changed_on_disk(self):
+        return self.stale
+
+def make_registry():
+    registry = ModelRegistry()
+    loads = []
+
+    def load_classifier(_registry):
+        loads.append(threading.get_ident())
+        return FakeClassifier(len(loads))
+
+    registry._loaders = {"classifier": load_classifier}
+    return registry, loads
+
+def test_changed_classifier_reloads_off_the_event_loop():
+    registry, loads = make_registry()
+
+    async def scenario():
+        first = registry.classifier
+        first.stale = True
+        # The request still gets the current model; the reload runs in the cpu pool
+        assert registry.classifier is first
+        assert registry.classifier is first
+        await registry._reloading
+        return first
+
+    first = run(scenario())
+    assert len(loads) == 2
+    assert loads[1] != threading.get_ident()
+    assert registry.classifier is not first
+    assert registry.classifier.version == 2
+
+def test_failed_reload_keeps_serving_the_current_model():
+    registry, _ = make_registry()
+
+    async def scenario():
+        first = registry.classifier
+        first.stale = True
+        registry._loaders = {"classifier": lambda _registry: 1 / 0}
+        registry.classifier
+        await registry._reloading
+        return first
+
+    first = run(scenario())
+    assert registry.classifier is first
+
+def test_classifier_without_event_loop_reloads_inline():
+    registry, loads = make_registry()
+    registry.classifier.stale = True
+    assert registry.classifier.version == 2
+    assert loads == [threading.get_ident()] * 2
+    assert registry._reloading is None
+
+def test_pending_reload_from_a_closed_loop_does_not_block_later_reloads():
+    registry, _ = make_registry()
+
+    async def schedule_only():
+        registry.classifier.stale = True
+        registry.classifier
+        await asyncio.sleep(0)
+
+    run(schedule_only())
+    assert registry._reloading.done()
+
+def test_components_load_once_and_swaps_bump_the_version():
+    registry, loads = make_registry()
+    assert registry.classifier is registry.classifier
+    assert len(loads) == 1
+    assert registry.status()["versions"] == {"classifier": 1}
+
+    replacement = FakeClassifier("swapped")
+    registry.swap("classifier", replacement)
+    assert registry.classifier is replacement
+    assert registry.status()["versions"] == {"classifier": 2}
+    assert registry.status()["classifier_ready"]
+
+def test_failed_load_is_reported_not_raised():
+    registry = ModelRegistry()
+
+    def broken(_registry):
+        raise RuntimeError("no index on disk")
+
+    registry._loaders = {"store": broken}
+    assert registry.store is None
+    assert registry.status()["errors"] == {"store": "no index on disk"}
+    assert registry.status()["loaded"] == []
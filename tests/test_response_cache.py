@@ -0,0 +1,78 @@
+import time
+
+from utils.response_cache import ResponseCache, SemanticCache, semantic_embedder
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, ttl=60, db_path="")
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.evictions == 1
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(max_entries=10, ttl=0.05, db_path="")
+    cache.put("a", "A")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+def test_key_ignores_case_and_trailing_punctuation_but_not_context():
+    cache = ResponseCache(db_path="")
+    key = cache.make_key("What is Prat.AI?", "ctx", "model", "fp")
+    assert cache.make_key("  what is prat.ai ", "ctx", "model", "fp") == key
+    assert cache.make_key("What is Prat.AI?", "other ctx", "model", "fp") != key
+    assert cache.make_key("What is Prat.AI?", "ctx", "model", "fp2") != key
+
+def test_fingerprint_change_clears_entries():
+    cache = ResponseCache(db_path="")
+    cache.check_fingerprint("v1")
+    cache.put("a", "A")
+    assert cache.check_fingerprint("v1") is False
+    assert cache.check_fingerprint("v2") is True
+    assert cache.get("a") is None
+    assert cache.invalidations == 1
+
+def test_sqlite_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = ResponseCache(db_path=path)
+    first.check_fingerprint("v1")
+    first.put("a", "A")
+    second = ResponseCache(db_path=path)
+    second.check_fingerprint("v1")
+    assert second.get("a") == "A"
+    assert second.disk_hits == 1
+
+def test_semantic_cache_returns_near_duplicates_of_the_same_intent(dense_store):
+    cache = SemanticCache(capacity=8, threshold=0.9, ttl=60)
+    cache.configure(*semantic_embedder(dense_store))
+    cache.add("mix flour and yeast to bake bread", "Knead it.", intent="cooking")
+    assert cache.lookup("Mix the flour and yeast to bake bread!", intent="cooking")[0] == "Knead it."
+    assert cache.lookup("mix flour and yeast to bake bread", intent="goodbye") is None
+
+def test_semantic_cache_does_not_match_unrelated_questions_of_the_same_intent(dense_store):
+    cache = SemanticCache(capacity=8, threshold=0.9, ttl=60)
+    cache.configure(*semantic_embedder(dense_store))
+    cache.add("tell me the capital of France", "Paris.", intent="question")
+    assert cache.lookup("tell me the boiling point of mercury", intent="question") is None
+    assert cache.skipped >= 1
+
+def test_semantic_cache_is_disabled_without_a_retrieval_encoder(store):
+    assert semantic_embedder(store) == (None, None)
+    cache = SemanticCache(capacity=8, threshold=0.9, ttl=60)
+    cache.configure(*semantic_embedder(store))
+    cache.add("tell me the capital of France", "Paris.", intent="question")
+    assert cache.lookup("tell me the boiling point of mercury", intent="question") is None
+    assert cache._size == 0
+
+def test_semantic_cache_is_invalidated_by_knowledge_base_changes(dense_store):
+    cache = SemanticCache(capacity=8, threshold=0.9, ttl=60)
+    cache.configure(*semantic_embedder(dense_store))
+    cache.add("mix flour and yeast to bake bread", "Knead it.", intent="cooking")
+
+    dense_store.add_document("new.txt", "Prat.AI now also supports voice input.", persist=False)
+    cache.configure(*semantic_embedder(dense_store))
+    assert cache.lookup("mix flour and yeast to bake bread", intent="cooking") is None
+    assert cache.invalidations == 1
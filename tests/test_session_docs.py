@@ -0,0 +1,88 @@
+import hashlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import session_docs
+from utils.pdf_processor import PDFTextCache
+from utils.session_docs import SessionDocuments
+
+CONTRACT = (
+    "The tenant pays rent on the first day of each month. "
+    "Late payments incur a fee of five percent. "
+    "The landlord maintains the heating system and the roof."
+)
+RECIPE = "Whisk eggs with sugar, fold in flour and bake the sponge for twenty minutes."
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+@pytest.fixture
+def text_cache(tmp_path, monkeypatch):
+    cache = PDFTextCache(tmp_path)
+    monkeypatch.setattr(session_docs, "pdf_text_cache", cache)
+    return cache
+
+def test_turns_get_only_relevant_passages_of_attached_documents(text_cache):
+    documents = SessionDocuments()
+    documents.register("s1", digest(CONTRACT), "lease.pdf", CONTRACT, 1)
+    documents.register("s1", digest(RECIPE), "cake.pdf", RECIPE, 1)
+
+    passages = documents.retrieve_passages("s1", [digest(CONTRACT), digest(RECIPE)], "late payment fee")
+    assert {p["source"] for p in passages} == {"lease.pdf"}
+    assert all(p["kind"] == "document" for p in passages)
+    # Another session cannot read the documents without the handle being cached
+    assert documents.retrieve_passages("s2", [digest(CONTRACT)], "late payment fee") == []
+
+def test_other_attachments_do_not_use_up_the_token_budget(text_cache):
+    notice = "Rent fee rules: a late rent fee applies to every late rent payment."
+    documents = SessionDocuments()
+    documents.register("s1", digest(notice), "notice.pdf", notice, 1)
+    documents.register("s1", digest(CONTRACT), "lease.pdf", CONTRACT, 1)
+
+    budget = session_docs.estimate_tokens(CONTRACT)
+    passages = documents.retrieve_passages("s1", [digest(CONTRACT)], "late rent fee", token_budget=budget)
+    assert [p["source"] for p in passages] == ["lease.pdf"]
+    assert passages[0]["score"] > 0
+
+def test_concurrent_uploads_keep_the_session_consistent(text_cache, monkeypatch):
+    monkeypatch.setattr(session_docs, "SESSION_DOCS_PER_SESSION", 3)
+    documents = SessionDocuments()
+    texts = [f"Invoice {i} lists {i} crates of apples shipped to the harbour warehouse." for i in range(200)]
+    # Switch threads often so unsynchronised updates would interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda text: documents.register("s1", digest(text), "invoice.pdf", text, 1), texts))
+    finally:
+        sys.setswitchinterval(interval)
+
+    session = documents._session("s1")
+    assert len(session["documents"]) == 3
+    assert set(session["store"].documents) == set(session["documents"])
+    assert documents.registered == 200
+
+def test_no_term_overlap_falls_back_to_opening_passages(text_cache):
+    documents = SessionDocuments()
+    documents.register("s1", digest(RECIPE), "cake.pdf", RECIPE, 1)
+    passages = documents.retrieve_passages("s1", [digest(RECIPE)], "zzz qqq")
+    assert passages and passages[0]["start"] == 0
+
+def test_unknown_handles_are_rebuilt_from_the_text_cache(text_cache):
+    text_cache.put(digest(CONTRACT), CONTRACT, 3)
+    documents = SessionDocuments()
+    passages = documents.retrieve_passages("s1", [digest(CONTRACT), "not-a-handle"], "heating roof")
+    assert passages
+    assert documents.rebuilt == 1
+    assert documents.list("s1")[0]["pages"] == 3
+
+def test_oldest_attachment_makes_room(text_cache, monkeypatch):
+    monkeypatch.setattr(session_docs, "SESSION_DOCS_PER_SESSION", 1)
+    documents = SessionDocuments()
+    documents.register("s1", digest(CONTRACT), "lease.pdf", CONTRACT, 1)
+    documents.register("s1", digest(RECIPE), "cake.pdf", RECIPE, 1)
+    assert [d["filename"] for d in documents.list("s1")] == ["cake.pdf"]
+    assert documents.remove("s1", digest(RECIPE))
+    assert not documents.remove("s1", digest(RECIPE))
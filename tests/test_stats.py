@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+import utils.database as database
+from utils.database import (
+    Conversation, backfill_rollups, bulk_insert_conversations, clear_conversation_history, engine, get_stats,
+)
+
+def rows(n, session_id="s1", intent="greeting", start=None):
+    start = start or datetime(2024, 1, 1, 12, 0)
+    return [{
+        "session_id": session_id, "user_message": f"m{i}", "bot_response": f"r{i}",
+        "intent": intent, "confidence": 0.5, "sentiment": "neutral",
+        "response_type": "llm_gemini", "timestamp": start + timedelta(minutes=i),
+    } for i in range(n)]
+
+def insert_without_rollups(batch):
+    # Conversations logged before rollups existed
+    with engine.begin() as conn:
+        conn.execute(insert(Conversation), batch)
+
+def test_stats_follow_inserts_per_session_and_range(fresh_db):
+    bulk_insert_conversations(rows(3, "s1") + rows(2, "s2", intent="thanks"))
+    assert get_stats()["total_conversations"] == 5
+    assert get_stats(session_id="s2")["top_intents"] == [{"intent": "thanks", "count": 2}]
+    assert get_stats()["average_confidence"] == 0.5
+
+    later = datetime(2024, 1, 2, 12, 0)
+    bulk_insert_conversations(rows(4, "s1", start=later))
+    assert get_stats(start=later)["total_conversations"] == 4
+    # Timezone-aware bounds are normalised to UTC
+    assert get_stats(start=later.replace(tzinfo=timezone.utc))["total_conversations"] == 4
+    assert get_stats(end=later)["total_conversations"] == 5
+
+def test_clearing_a_session_removes_it_from_all_session_totals(fresh_db):
+    bulk_insert_conversations(rows(3, "s1") + rows(2, "s2"))
+    clear_conversation_history("s1")
+    assert get_stats()["total_conversations"] == 2
+    assert get_stats(session_id="s1")["total_conversations"] == 0
+
+def test_backfill_counts_existing_rows_once(fresh_db):
+    insert_without_rollups(rows(5, "s1") + rows(3, "s2"))
+    assert backfill_rollups() == 8
+    assert get_stats()["total_conversations"] == 8
+    assert get_stats(session_id="s2")["total_conversations"] == 3
+    # Later starts see the rollups and do nothing
+    assert backfill_rollups() == 0
+    assert get_stats()["total_conversations"] == 8
+
+def test_writes_during_backfill_are_added_not_dropped(fresh_db, monkeypatch):
+    insert_without_rollups(rows(5, "s1"))
+    claim = database._claim_backfill
+
+    def writer_races_backfill(conn):
+        # The write-behind writer upserts the same rollup keys after the scan
+        bulk_insert_conversations(rows(2, "s1"))
+        return claim(conn)
+
+    monkeypatch.setattr(database, "_claim_backfill", writer_races_backfill)
+    backfill_rollups()
+    assert get_stats()["total_conversations"] == 7
+    assert get_stats(session_id="s1")["total_conversations"] == 7
+
+def test_backfill_is_applied_by_one_worker_only(fresh_db, monkeypatch):
+    insert_without_rollups(rows(4, "s1"))
+    claim = database._claim_backfill
+
+    def second_worker_finishes_first(conn):
+        monkeypatch.setattr(database, "_claim_backfill", claim)
+        backfill_rollups()
+        return claim(conn)
+
+    monkeypatch.setattr(database, "_claim_backfill", second_worker_finishes_first)
+    backfill_rollups()
+    assert get_stats()["total_conversations"] == 4
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from conftest import run
+from utils.fake_gemini import FakeGeminiClient
+from utils.gemini_client import GeminiClient
+from utils.registry import registry
+from utils.response_cache import response_cache, semantic_cache
+from routes.stream import batch_chunks, generate_stream
+
+class BrokenStreamClient(FakeGeminiClient):
+    """Streams a couple of chunks, then fails like a dropped Gemini connection"""
+
+    async def stream_response(self, user_message, context=""):
+        yield "The first part of a long answer "
+        yield "that never gets to the end"
+        raise RuntimeError("connection reset")
+
+class BrokenPromptClient(FakeGeminiClient):
+    """Fails before streaming starts, like a retrieval or prompt-building error"""
+
+    def build_prompt(self, *args, **kwargs):
+        raise RuntimeError("prompt budget misconfigured")
+
+@pytest.fixture
+def components(trained_classifier, store, fresh_db):
+    saved = dict(registry._components)
+    registry.swap("classifier", trained_classifier)
+    registry.swap("store", store)
+    registry.swap("gemini", FakeGeminiClient())
+    response_cache._entries.clear()
+    semantic_cache._reset()
+    yield
+    registry._components.clear()
+    registry._components.update(saved)
+
+def frames(message, session_id):
+    async def collect():
+        return [json.loads(frame[len("data: "):]) async for frame in generate_stream(message, session_id)]
+    return run(collect())
+
+def test_stream_sends_chunks_then_done_with_metadata(components):
+    result = frames("Explain how retrieval augmented generation works", "s-ok")
+    assert result[-1]["done"] is True
+    assert result[-1]["metadata"]["response_type"] == "llm_gemini"
+    assert "".join(f["content"] for f in result[:-1])
+
+def test_interrupted_stream_is_not_cached(components):
+    registry.swap("gemini", BrokenStreamClient())
+    result = frames("Explain how retrieval augmented generation works", "s-partial")
+    assert result[-1]["metadata"]["response_type"] == "llm_partial"
+    assert "first part" in "".join(f["content"] for f in result)
+    assert len(response_cache._entries) == 0
+    assert semantic_cache._size == 0
+
+    # The next identical question goes to the model again instead of replaying the cut-off answer
+    registry.swap("gemini", FakeGeminiClient())
+    result = frames("Explain how retrieval augmented generation works", "s-partial-2")
+    assert result[-1]["metadata"]["response_type"] == "llm_gemini"
+
+def test_first_turns_share_the_exact_cache(components):
+    first = frames("Explain how retrieval augmented generation works", "s-fresh-1")
+    assert first[-1]["metadata"]["response_type"] == "llm_gemini"
+    again = frames("Explain how retrieval augmented generation works", "s-fresh-2")
+    assert again[-1]["metadata"]["response_type"] == "llm_cached"
+
+def test_answers_depending_on_history_are_not_shared_between_sessions(components):
+    frames("My secret code is 12345, remember it", "s-alice")
+    alice = frames("tell me more about that", "s-alice")
+    assert alice[-1]["metadata"]["response_type"] == "llm_gemini"
+
+    frames("Bread recipe please", "s-bob")
+    bob = frames("tell me more about that", "s-bob")
+    # Same message over the same passages, but a different conversation
+    assert bob[-1]["metadata"]["response_type"] == "llm_gemini"
+    assert len(response_cache._entries) == 2
+
+def test_failure_before_streaming_falls_back_to_the_intent_model(components):
+    registry.swap("gemini", BrokenPromptClient())
+    result = frames("Explain how retrieval augmented generation works", "s-setup")
+    done = result[-1]
+    assert "error" not in done
+    assert done["metadata"]["response_type"] in ("ml_fallback", "error")
+    assert "".join(f["content"] for f in result[:-1])
+    assert len(response_cache._entries) == 0
+
+def test_batch_chunks_coalesces_small_chunks():
+    async def source():
+        for word in ["a", "b", "c", "d"]:
+            yield word
+
+    async def collect():
+        return [batch async for batch in batch_chunks(source(), flush_chars=2, flush_ms=10_000)]
+
+    batches = run(collect())
+    # The first chunk is forwarded immediately, the rest in batches of at least 2 characters
+    assert batches[0] == "a"
+    assert "".join(batches) == "abcd"
+    assert all(len(b) >= 2 for b in batches[1:-1])
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStreamingModel:
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    async def generate_content_async(self, prompt, stream=False):
+        async def chunks():
+            for piece in self.pieces:
+                yield FakeChunk(piece)
+        return chunks()
+
+def test_brand_split_across_chunks_is_still_rewritten():
+    client = GeminiClient.__new__(GeminiClient)
+    client.model = FakeStreamingModel(["I am Pra", "tCh", "at, happy to help. Prat", "Chat!"])
+
+    async def collect():
+        return [text async for text in client.stream_response("explain retrieval", "plain context")]
+
+    chunks = run(collect())
+    assert "".join(chunks) == "I am Prat.AI, happy to help. Prat.AI!"
+    assert all("PratChat" not in chunk for chunk in chunks)
+    assert len(chunks) > 1